@@ -0,0 +1,149 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Benchmark serializing a large list of sequences with the bulk encoding
+(iosequencebulk) against serializing each sequence with
+FileSequence.SerializeValue and against pickling the list, then the cost of
+handing the list to a worker process by pickling it against sharing it in
+shared memory.
+
+Usage:
+    python benchmarks/bench_bulk_serialization.py [num_sequences]
+"""
+
+import concurrent.futures
+import pickle
+import random
+import sys
+import time
+
+import iograft_standin
+iograft_standin.Install()
+
+import fileseq
+
+import iosequencebulk
+import iosequencetypes
+
+
+def _Sequences(num_sequences):
+    """
+    Sequences spread over shots, layers and passes like a render tree, with
+    a mix of dense, stepped and sparse frame ranges.
+    """
+    rng = random.Random(0)
+    frame_ranges = ["1001-1240", "1001-1240x2", "1001-1120"]
+    frame_ranges += [",".join(str(frame) for frame in sorted(
+                        rng.sample(range(1001, 1241), 30)))
+                     for _ in range(20)]
+    sequences = []
+    for index in range(num_sequences):
+        shot, layer = divmod(index, 100)
+        sequence = fileseq.FileSequence(
+                    "/projects/show/seq/shot_{:04d}/render/layer_{:02d}/"
+                    "pass_{:02d}.####.exr".format(shot, layer // 10,
+                                                  layer % 10),
+                    pad_style=fileseq.PAD_STYLE_HASH1)
+        sequence.setFrameSet(fileseq.FrameSet(rng.choice(frame_ranges)))
+        sequences.append(sequence)
+    return sequences
+
+
+def _CheckDictionaryForm():
+    """
+    Check that sequences stored in their to_dict form (other padding styles,
+    including sequences without a frame set) round trip.
+    """
+    sequences = [fileseq.FileSequence(pattern) for pattern in (
+                    "/a/b/shot.#.exr", "shot_####.tif", "x.%04d.dpx",
+                    "/a/b/shot.1-5#.exr")]
+    for sequence, result in zip(sequences, iosequencebulk.DecodeSequences(
+                        iosequencebulk.EncodeSequences(sequences))):
+        assert sequence.to_dict() == result.to_dict(), \
+               "Round trip mismatch: {}".format(sequence)
+
+
+def _SerializeEach(sequences):
+    return [iosequencetypes.FileSequence.SerializeValue(sequence)
+            for sequence in sequences]
+
+
+def _DeserializeEach(values):
+    iosequencetypes.FileSequence.deserialize_cache.Clear()
+    return [iosequencetypes.FileSequence.DeserializeValue(value)
+            for value in values]
+
+
+def _Size(serialized):
+    if isinstance(serialized, list):
+        return sum(len(value) for value in serialized)
+    return len(serialized)
+
+
+def _Time(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def _CountFrames(sequences):
+    return sum(len(sequence) for sequence in sequences)
+
+
+def _CountSharedFrames(shared, start=0, stop=None):
+    # The list arrives as its name and is attached in the worker.
+    try:
+        return _CountFrames(shared[start:stop])
+    finally:
+        shared.Close()
+
+
+def main(num_sequences=20000):
+    _CheckDictionaryForm()
+    sequences = _Sequences(num_sequences)
+    print("{} sequences\n".format(num_sequences))
+    print("{:<14}  {:>12}  {:>12}  {:>12}".format(
+                    "method", "encode (s)", "decode (s)", "bytes"))
+    for name, serialize, deserialize in (
+                ("per element", _SerializeEach, _DeserializeEach),
+                ("pickle", pickle.dumps, pickle.loads),
+                ("bulk", iosequencebulk.EncodeSequences,
+                 iosequencebulk.DecodeSequences)):
+        serialized, encode_time = _Time(serialize, sequences)
+        result, decode_time = _Time(deserialize, serialized)
+        assert len(result) == len(sequences), "Round trip mismatch"
+        for expected, sequence in zip(sequences, result):
+            assert expected.to_dict() == sequence.to_dict(), \
+                   "Round trip mismatch: {}".format(expected)
+        print("{:<14}  {:>12.4f}  {:>12.4f}  {:>12}".format(
+                    name, encode_time, decode_time, _Size(serialized)))
+
+    # Hand the list to a worker process that counts its frames (or the
+    # frames of a slice of it).
+    expected = _CountFrames(sequences)
+    print("\n{:<30}  {:>10}".format("hand-off to a worker", "seconds"))
+    with concurrent.futures.ProcessPoolExecutor(1) as executor:
+        # Start the worker before timing.
+        executor.submit(_CountFrames, []).result()
+
+        count, elapsed = _Time(
+                    lambda: executor.submit(_CountFrames, sequences).result())
+        assert count == expected, "Frame count mismatch"
+        print("{:<30}  {:>10.4f}".format("pickled list", elapsed))
+
+        with iosequencebulk.Share(sequences) as shared:
+            count, elapsed = _Time(lambda: executor.submit(
+                            _CountSharedFrames, shared).result())
+            assert count == expected, "Frame count mismatch"
+            print("{:<30}  {:>10.4f}".format("shared memory", elapsed))
+
+            stop = max(num_sequences // 100, 1)
+            count, elapsed = _Time(lambda: executor.submit(
+                            _CountSharedFrames, shared, 0, stop).result())
+            assert count == _CountFrames(sequences[:stop]), \
+                   "Frame count mismatch"
+            print("{:<30}  {:>10.4f}".format(
+                    "shared memory, first 1%", elapsed))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,69 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Benchmark the shared directory listing cache across the disk queries made
+by a typical graph: FindSequencesOnDisk, FindSequenceOnDisk,
+FilterExistingFrames, FilterMissingFrames and SplitExistingFrames all
+looking at the same render directory.
+
+Usage:
+    python benchmarks/bench_directory_cache.py [num_frames] [runs]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import fileseq
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "types"))
+import iosequencedircache
+import iosequencedisk
+
+
+def _RunGraph(directory, pattern):
+    sequences = iosequencedisk.FindSequencesOnDiskBatch([directory])[0]
+    sequence = iosequencedisk.FindSequenceOnDisk(pattern)
+    sequence.setFrameSet(fileseq.FrameSet("1-{}".format(
+                                        sequence.end() + 100)))
+    existing, _ = iosequencedisk.SplitExistingFrames(sequence)
+    _, missing = iosequencedisk.SplitExistingFrames(sequence)
+    iosequencedisk.SplitExistingFrames(sequence)
+    return len(sequences), str(existing), str(missing)
+
+
+def main(num_frames=5000, runs=10):
+    with tempfile.TemporaryDirectory() as directory:
+        for layer in ("beauty", "diffuse", "specular"):
+            for frame in range(1, num_frames + 1):
+                if frame % 97:
+                    open(os.path.join(directory, "{}.{:04d}.exr".format(
+                                                layer, frame)), "w").close()
+        pattern = os.path.join(directory, "beauty.####.exr")
+
+        print("{} graph runs over {} files".format(
+                                    runs, len(os.listdir(directory))))
+        results = []
+        for name, max_entries in (("uncached", 0), ("cached", 512)):
+            iosequencedircache.Invalidate()
+            iosequencedircache.Configure(max_entries=max_entries)
+            iosequencedircache.cache.ResetStats()
+
+            start = time.perf_counter()
+            for _ in range(runs):
+                result = _RunGraph(directory, pattern)
+            elapsed = time.perf_counter() - start
+            results.append(result)
+
+            stats = iosequencedircache.Stats()
+            print("{:<10} {:>8.4f}s  listings={} hits={} revalidations={} "
+                  "query hits={}".format(name, elapsed, stats["misses"],
+                                         stats["hits"],
+                                         stats["revalidations"],
+                                         stats["query_hits"]))
+        assert results[0] == results[1], "Results do not match"
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args)
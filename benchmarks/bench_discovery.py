@@ -0,0 +1,113 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Benchmark single-sequence lookups through the discovery service against
+calling iosequencedisk.FindSequenceOnDisk for one pattern at a time, and
+count the disk searches made when many threads (or coroutines) ask for the
+same few patterns at once.
+
+Usage:
+    python benchmarks/bench_discovery.py [num_directories] [callers]
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import sys
+import time
+
+import fileseq
+
+import iograft_standin
+iograft_standin.Install()
+
+import iosequencedircache
+import iosequencediscovery
+import iosequencedisk
+import sequence_generators
+
+
+class _SearchCounter(object):
+    """
+    Count the calls to fileseq.findSequenceOnDisk.
+    """
+    def __init__(self):
+        self.calls = 0
+
+    def __enter__(self):
+        self._function = fileseq.findSequenceOnDisk
+
+        def counting(*args, **kwargs):
+            self.calls += 1
+            return self._function(*args, **kwargs)
+
+        fileseq.findSequenceOnDisk = counting
+        return self
+
+    def __exit__(self, *args):
+        fileseq.findSequenceOnDisk = self._function
+
+
+def _Patterns(directory, num_directories):
+    patterns = []
+    for index in range(num_directories):
+        subdir = os.path.join(directory, "shot_{:03d}".format(index))
+        os.makedirs(subdir)
+        for sequence in sequence_generators.ManySequences(subdir, 40):
+            patterns.append(sequence.format(
+                            "{dirname}{basename}{padding}{extension}"))
+    return patterns
+
+
+def _Sequential(patterns):
+    return [iosequencedisk.FindSequenceOnDisk(pattern)
+            for pattern in patterns]
+
+
+def _Threads(function, patterns, callers):
+    with concurrent.futures.ThreadPoolExecutor(callers) as executor:
+        return list(executor.map(function, patterns))
+
+
+async def _Coroutines(patterns):
+    return await iosequencediscovery.FindManyAsync(patterns)
+
+
+def _Run(name, function, *args):
+    iosequencedircache.Invalidate()
+    with _SearchCounter() as counter:
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+    print("{:<34}  {:>10.4f}  {:>9}".format(name, elapsed, counter.calls))
+    return [str(sequence) for sequence in result]
+
+
+def main(num_directories=50, callers=32):
+    with sequence_generators.ScratchDirectory() as directory:
+        patterns = _Patterns(directory, num_directories)
+        print("{} patterns in {} directories, {} callers".format(
+                            len(patterns), num_directories, callers))
+        print("{:<34}  {:>10}  {:>9}".format("method", "seconds",
+                                             "searches"))
+
+        expected = _Run("sequential", _Sequential, patterns)
+        results = _Run("service FindMany",
+                       iosequencediscovery.FindMany, patterns)
+        assert results == expected, "Results do not match"
+
+        # Many callers asking for the same few patterns at once.
+        repeated = patterns[:4] * (callers * 4)
+        expected = _Run("threads, direct (repeated)", _Threads,
+                        iosequencedisk.FindSequenceOnDisk, repeated, callers)
+        results = _Run("threads, service (repeated)", _Threads,
+                       iosequencediscovery.Find, repeated, callers)
+        assert results == expected, "Results do not match"
+        results = _Run("asyncio, service (repeated)", asyncio.run,
+                       _Coroutines(repeated))
+        assert results == expected, "Results do not match"
+
+        print("service stats: {}".format(iosequencediscovery.service.Stats()))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,79 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Benchmark FileSequence.FromString, which reads the display strings shown in
+the iograft UI and logs, against the previous implementation parsing every
+pattern with fileseq. FromString is tested against fileseq's parse in
+tests/test_display_strings.py.
+
+Usage:
+    python benchmarks/bench_display_strings.py [num_sequences]
+"""
+
+import random
+import sys
+import time
+
+import iograft_standin
+iograft_standin.Install()
+
+import fileseq
+
+import iosequencetypes
+
+
+def _LegacyFromString(string_value):
+    range_start = string_value.rfind("(")
+    if string_value.endswith(")") and range_start > 0:
+        range_str = string_value[range_start:].strip("( )")
+        filename = string_value[:range_start].strip()
+        sequence = fileseq.FileSequence(filename,
+                                        pad_style=fileseq.PAD_STYLE_HASH1)
+        sequence.setFrameSet(iosequencetypes.FrameSet.Parse(range_str))
+        return sequence
+    return fileseq.FileSequence(string_value,
+                                pad_style=fileseq.PAD_STYLE_HASH1)
+
+
+def _Strings(num_sequences):
+    rng = random.Random(0)
+    strings = []
+    for index in range(num_sequences):
+        sequence = fileseq.FileSequence(
+                    "/projects/show/seq/shot_{:04d}/render/{}{}{}".format(
+                        index // 50,
+                        rng.choice(["beauty.", "beauty_v2.", "diffuse_",
+                                    "crypto.", ""]),
+                        rng.choice(["#", "####", "@@@", "#####"]),
+                        rng.choice([".exr", ".tar.gz", "", ".tif"])),
+                    pad_style=fileseq.PAD_STYLE_HASH1)
+        start = rng.randint(-10, 1001)
+        sequence.setFrameSet(fileseq.FrameSet(rng.choice([
+                    "{}-{}".format(start, start + 239),
+                    "{}-{}x4".format(start, start + 239),
+                    "{},{}-{}".format(start, start + 5, start + 20)])))
+        strings.append(iosequencetypes.FileSequence.ToString(sequence))
+    return strings
+
+
+def _Time(function, values):
+    start = time.perf_counter()
+    for value in values:
+        function(value)
+    return time.perf_counter() - start
+
+
+def main(num_sequences=2000):
+    strings = _Strings(num_sequences)
+    print("{} display strings".format(num_sequences))
+    print("{:<12}  {:>14}  {:>14}  {:>10}".format(
+                    "function", "previous (s)", "current (s)", "speed-up"))
+    legacy_time = _Time(_LegacyFromString, strings)
+    iosequencetypes.FileSequence.pattern_templates.Clear()
+    current_time = _Time(iosequencetypes.FileSequence.FromString, strings)
+    print("{:<12}  {:>14.4f}  {:>14.4f}  {:>9.1f}x".format(
+                    "FromString", legacy_time, current_time,
+                    legacy_time / max(current_time, 1e-9)))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,55 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Measure the time and peak memory of enumerating the paths of a
+FileSequence: expanding every path up front as EnumerateFileSequence does by
+default, against formatting a single batch through SequencePaths.
+
+Usage:
+    python benchmarks/bench_enumerate_file_sequence.py [batch_size]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+import fileseq
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "types"))
+import iosequenceranges
+
+
+def _Measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main(batch_size=1000):
+    print("{:>8}  {:<10}  {:>10}  {:>12}".format("frames", "method",
+                                                 "seconds", "peak MB"))
+    for num_frames in (1000, 100000, 1000000):
+        sequence = fileseq.FileSequence(
+                            "/projects/shot/render/deep.####.exr",
+                            pad_style=fileseq.PAD_STYLE_HASH1)
+        sequence.setFrameSet(fileseq.FrameSet("1-{}".format(num_frames)))
+
+        def expand_all():
+            return list(sequence)
+
+        def expand_batch():
+            paths = iosequenceranges.SequencePaths(sequence)
+            return paths.Batch(paths.BatchCount(batch_size) // 2, batch_size)
+
+        for name, func in (("full", expand_all), ("batch", expand_batch)):
+            _, elapsed, peak = _Measure(func)
+            print("{:>8}  {:<10}  {:>10.4f}  {:>12.2f}".format(
+                            num_frames, name, elapsed, peak / 1e6))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,67 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Benchmark finding sequences for many file patterns: one
+fileseq.findSequencesOnDisk call per pattern (as with many
+FindSequencesOnDisk nodes) against a single FindSequencesOnDiskBatch call.
+
+Usage:
+    python benchmarks/bench_find_sequences_batch.py [dirs] [seqs_per_dir]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import fileseq
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "types"))
+import iosequencedisk
+
+
+def _MakeTree(root, num_dirs, num_sequences, num_frames=10):
+    """
+    Write num_dirs directories each containing num_sequences sequences and
+    return a pattern for every sequence.
+    """
+    patterns = []
+    for dir_index in range(num_dirs):
+        directory = os.path.join(root, "shot{:03d}".format(dir_index))
+        os.mkdir(directory)
+        for seq_index in range(num_sequences):
+            basename = "layer{:02d}.".format(seq_index)
+            for frame in range(1, num_frames + 1):
+                path = os.path.join(directory,
+                                    "{}{:04d}.exr".format(basename, frame))
+                open(path, "w").close()
+            patterns.append(os.path.join(directory, basename + "#.exr"))
+    return patterns
+
+
+def main(num_dirs=200, num_sequences=20):
+    with tempfile.TemporaryDirectory() as root:
+        patterns = _MakeTree(root, num_dirs, num_sequences)
+        print("{} directories x {} sequences, {} patterns".format(
+                            num_dirs, num_sequences, len(patterns)))
+
+        start = time.perf_counter()
+        single = [fileseq.findSequencesOnDisk(
+                                    pattern,
+                                    pad_style=fileseq.PAD_STYLE_HASH1)
+                  for pattern in patterns]
+        single_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch = iosequencedisk.FindSequencesOnDiskBatch(patterns)
+        batch_elapsed = time.perf_counter() - start
+
+        assert ([[str(s) for s in result] for result in single] ==
+                [[str(s) for s in result] for result in batch]), \
+            "Results do not match"
+        print("single pattern calls: {:.4f}s".format(single_elapsed))
+        print("batch call:           {:.4f}s".format(batch_elapsed))
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,80 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Benchmark grouping large lists of paths into sequences with
+fileseq.findSequencesInList against iosequencelist.FindSequencesInList, for
+increasing numbers of paths. The results of both are checked to be
+identical.
+
+Usage:
+    python benchmarks/bench_find_sequences_in_list.py [max_paths]
+"""
+
+import os
+import random
+import sys
+import time
+
+import fileseq
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "types"))
+import iosequencelist
+
+
+def _MakePaths(num_paths, frames_per_sequence=1000, seed=0):
+    """
+    Return a shuffled list of num_paths paths resembling a delivery
+    manifest: mostly padded frame sequences with gaps, a few unpadded
+    sequences and some files without frame numbers.
+    """
+    rng = random.Random(seed)
+    paths = []
+    sequence_index = 0
+    while len(paths) < num_paths:
+        directory = "/show/seq{:03d}/shot{:04d}/render".format(
+                            sequence_index // 100, sequence_index)
+        layer = "layer{:02d}".format(sequence_index % 7)
+        if sequence_index % 10 == 9:
+            paths.append("{}/{}.json".format(directory, layer))
+        template = ("{}/{}.{:d}.exr" if sequence_index % 5 == 4
+                    else "{}/{}.{:04d}.exr")
+        for frame in range(1001, 1001 + frames_per_sequence):
+            if rng.random() < 0.01:
+                continue
+            paths.append(template.format(directory, layer, frame))
+        sequence_index += 1
+    del paths[num_paths:]
+    rng.shuffle(paths)
+    return paths
+
+
+def _Describe(sequences):
+    return [(str(s), s.zfill()) for s in sequences]
+
+
+def main(max_paths=1000000):
+    print("numpy: {}".format("yes" if iosequencelist.numpy else "no"))
+    num_paths = 10000
+    while num_paths <= max_paths:
+        paths = _MakePaths(num_paths)
+
+        start = time.perf_counter()
+        expected = fileseq.findSequencesInList(
+                                paths, pad_style=fileseq.PAD_STYLE_HASH1)
+        fileseq_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = iosequencelist.FindSequencesInList(paths)
+        grouped_elapsed = time.perf_counter() - start
+
+        assert _Describe(expected) == _Describe(result), \
+            "Results do not match"
+        print("{:>8} paths, {:>5} sequences: fileseq {:.3f}s, "
+              "FindSequencesInList {:.3f}s".format(
+                    num_paths, len(result), fileseq_elapsed,
+                    grouped_elapsed))
+        num_paths *= 10
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,100 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Benchmark the frame existence check used by the FilterExistingFrames and
+FilterMissingFrames nodes against the original per-frame os.path.exists
+loop.
+
+Usage:
+    python benchmarks/bench_frame_existence.py [num_frames ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import fileseq
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "types"))
+import iosequencedisk
+
+
+class _StatCounter(object):
+    """
+    Wrap os.stat and os.scandir to count the number of filesystem calls.
+    """
+    def __init__(self):
+        self.stat_calls = 0
+        self.scandir_calls = 0
+
+    def __enter__(self):
+        self._stat = os.stat
+        self._scandir = os.scandir
+
+        def counting_stat(*args, **kwargs):
+            self.stat_calls += 1
+            return self._stat(*args, **kwargs)
+
+        def counting_scandir(*args, **kwargs):
+            self.scandir_calls += 1
+            return self._scandir(*args, **kwargs)
+
+        os.stat = counting_stat
+        os.scandir = counting_scandir
+        return self
+
+    def __exit__(self, *args):
+        os.stat = self._stat
+        os.scandir = self._scandir
+
+
+def _LegacyExistingFrames(sequence):
+    frame_set = sequence.frameSet()
+    existing_frames = set()
+    for index, path in enumerate(sequence):
+        if os.path.exists(path):
+            existing_frames.add(frame_set[index])
+    return fileseq.FrameSet(existing_frames)
+
+
+def _ScanExistingFrames(sequence):
+    existing_frame_set, _ = iosequencedisk.SplitExistingFrames(sequence)
+    return existing_frame_set
+
+
+def _MakeSequence(directory, num_frames):
+    """
+    Write a sequence to disk with every 10th frame missing.
+    """
+    sequence = fileseq.FileSequence(
+                            os.path.join(directory, "render.####.exr"),
+                            pad_style=fileseq.PAD_STYLE_HASH1)
+    sequence.setFrameSet(fileseq.FrameSet("1-{}".format(num_frames)))
+    for frame in range(1, num_frames + 1):
+        if frame % 10:
+            open(sequence.frame(frame), "w").close()
+    return sequence
+
+
+def main(sizes):
+    print("{:>8}  {:<8}  {:>8}  {:>8}  {:>10}".format(
+                        "frames", "method", "stat", "scandir", "seconds"))
+    for num_frames in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            sequence = _MakeSequence(directory, num_frames)
+            results = []
+            for name, func in (("legacy", _LegacyExistingFrames),
+                               ("scandir", _ScanExistingFrames)):
+                with _StatCounter() as counter:
+                    start = time.perf_counter()
+                    result = func(sequence)
+                    elapsed = time.perf_counter() - start
+                results.append(str(result))
+                print("{:>8}  {:<8}  {:>8}  {:>8}  {:>10.4f}".format(
+                            num_frames, name, counter.stat_calls,
+                            counter.scandir_calls, elapsed))
+            assert results[0] == results[1], "Results do not match"
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10, 1000, 10000])
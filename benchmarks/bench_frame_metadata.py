@@ -0,0 +1,87 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Benchmark gathering the size and modification time of every frame of a
+sequence: stat-ing each enumerated path against a single
+iosequencedisk.CollectFrameMetadata scan.
+
+Usage:
+    python benchmarks/bench_frame_metadata.py [num_frames ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import fileseq
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "types"))
+import iosequencedisk
+
+
+def _StatEachFrame(sequence):
+    frames = []
+    sizes = []
+    mtimes = []
+    for frame in sequence.frameSet():
+        try:
+            stat_result = os.stat(sequence.frame(frame))
+        except FileNotFoundError:
+            continue
+        frames.append(frame)
+        sizes.append(stat_result.st_size)
+        mtimes.append(stat_result.st_mtime)
+    return frames, sizes, mtimes
+
+
+def _MakeSequence(directory, num_frames):
+    """
+    Write a sequence to disk with every 10th frame missing and every 100th
+    frame empty, alongside an unrelated file for every frame.
+    """
+    sequence = fileseq.FileSequence(
+                            os.path.join(directory, "render.####.exr"),
+                            pad_style=fileseq.PAD_STYLE_HASH1)
+    sequence.setFrameSet(fileseq.FrameSet("1-{}".format(num_frames)))
+    for frame in range(1, num_frames + 1):
+        open(os.path.join(directory, "other.{:04d}.exr".format(frame)),
+             "w").close()
+        if frame % 10:
+            with open(sequence.frame(frame), "w") as frame_file:
+                if frame % 100:
+                    frame_file.write("x" * 1024)
+    return sequence
+
+
+def main(sizes):
+    print("{:>8}  {:>10}  {:>10}".format("frames", "stat each", "scan"))
+    for num_frames in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            sequence = _MakeSequence(directory, num_frames)
+
+            start = time.perf_counter()
+            frames, sizes, mtimes = _StatEachFrame(sequence)
+            stat_elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            metadata = iosequencedisk.CollectFrameMetadata(sequence)
+            scan_elapsed = time.perf_counter() - start
+
+            assert metadata.frames.tolist() == frames
+            assert metadata.sizes.tolist() == sizes
+            assert metadata.mtimes.tolist() == mtimes
+
+            # The derived outputs are computed from the arrays alone.
+            start = time.perf_counter()
+            metadata.ZeroByteFrames()
+            metadata.OutlierFrames(0.5)
+            metadata.FramesOlderThan(time.time())
+            derived_elapsed = time.perf_counter() - start
+
+            print("{:>8}  {:>9.4f}s  {:>9.4f}s  (derived outputs "
+                  "{:.4f}s)".format(num_frames, stat_elapsed, scan_elapsed,
+                                    derived_elapsed))
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000, 50000])
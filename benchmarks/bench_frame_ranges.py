@@ -0,0 +1,131 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Benchmark parsing, copying and membership tests of large and sparse frame
+sets as fileseq.FrameSets against iosequenceranges.FrameRanges, and parsing
+of frame range strings through iosequenceranges.ParseFrameSet against
+fileseq.FrameSet.
+
+ParseFrameSet is checked against fileseq.FrameSet on random frame range
+strings before anything is timed.
+
+Usage:
+    python benchmarks/bench_frame_ranges.py [num_frames] [sparse_frames]
+
+The sparse case is kept smaller than the dense one as fileseq takes time
+quadratic in the number of runs to parse it.
+"""
+
+import copy
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import fileseq
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "types"))
+import iosequenceranges
+
+
+def _RandomFrameRange(rng):
+    parts = []
+    for _ in range(rng.randint(0, 60)):
+        start = rng.randint(-50, 5000)
+        kind = rng.random()
+        if kind < 0.3:
+            parts.append(str(start))
+        elif kind < 0.6:
+            parts.append("{}-{}".format(start, start + rng.randint(1, 40)))
+        elif kind < 0.8:
+            parts.append("{}-{}x{}".format(start, start + rng.randint(1, 90),
+                                           rng.randint(1, 7)))
+        else:
+            parts.append("{}-{}".format(start + rng.randint(1, 40), start))
+    return ",".join(parts)
+
+
+def _Check(iterations=500):
+    rng = random.Random(0)
+    for _ in range(iterations):
+        frame_range = _RandomFrameRange(rng)
+        expected = fileseq.FrameSet(frame_range)
+        result = iosequenceranges.ParseFrameSet(frame_range)
+        assert list(result) == list(expected), frame_range
+        assert result.frange == expected.frange, frame_range
+        frame_ranges = iosequenceranges.FrameRanges.FromFrameRange(
+                                                                frame_range)
+        assert list(frame_ranges) == list(expected), frame_range
+        for frame in range(-60, 5100, 37):
+            assert (frame in frame_ranges) == (frame in expected), frame_range
+
+
+def _Measure(function, *args):
+    """
+    Return the result, the elapsed time and the peak memory allocated by a
+    call. The memory is measured in a second call as tracing slows it down.
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def _Contains(container, frames):
+    return sum(frame in container for frame in frames)
+
+
+def _Copies(value, count=100):
+    return [copy.copy(value) for _ in range(count)]
+
+
+def main(num_frames=1000000, sparse_frames=10000):
+    _Check()
+    print("ParseFrameSet matches fileseq.FrameSet on random frame ranges\n")
+
+    rng = random.Random(1)
+    sparse = iosequenceranges.FrameRangeBuilder()
+    for frame in range(1, sparse_frames + 1, 3):
+        if rng.random() < 0.3:
+            sparse.Add(frame)
+    probes = [rng.randint(1, num_frames) for _ in range(1000)]
+    sparse_probes = [rng.randint(1, sparse_frames) for _ in range(1000)]
+    cases = (("dense", "1-{}".format(num_frames), probes),
+             ("sparse", sparse.FrameRange(), sparse_probes))
+
+    print("{:<8}  {:<22}  {:>12}  {:>12}  {:>12}".format(
+                    "frames", "operation", "fileseq (s)", "ranges (s)",
+                    "speed-up"))
+    for name, frame_range, probes in cases:
+        frame_set, fileseq_parse, fileseq_memory = _Measure(
+                                            fileseq.FrameSet, frame_range)
+        frame_ranges, ranges_parse, ranges_memory = _Measure(
+                    iosequenceranges.FrameRanges.FromFrameRange, frame_range)
+        _, fast_parse, fast_memory = _Measure(
+                    iosequenceranges.ParseFrameSet, frame_range)
+        _, fileseq_contains, _ = _Measure(_Contains, frame_set, probes)
+        _, ranges_contains, _ = _Measure(_Contains, frame_ranges, probes)
+        _, fileseq_copy, _ = _Measure(_Copies, frame_set)
+        _, ranges_copy, _ = _Measure(_Copies, frame_ranges)
+
+        for operation, fileseq_time, ranges_time in (
+                    ("parse to FrameRanges", fileseq_parse, ranges_parse),
+                    ("parse to FrameSet", fileseq_parse, fast_parse),
+                    ("1000 membership tests", fileseq_contains,
+                     ranges_contains),
+                    ("100 copies", fileseq_copy, ranges_copy)):
+            print("{:<8}  {:<22}  {:>12.4f}  {:>12.4f}  {:>11.1f}x".format(
+                        name, operation, fileseq_time, ranges_time,
+                        fileseq_time / max(ranges_time, 1e-9)))
+        print("{:<8}  {:<22}  {:>12}  {:>12}  (FrameSet via ParseFrameSet: "
+              "{})".format(name, "peak bytes", fileseq_memory,
+                           ranges_memory, fast_memory))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,123 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Validate the iosequencealgebra frame set operations against the results of
+fileseq.FrameSet on random frame sets, then benchmark them against the
+fileseq methods and against expanding the frames into Python sets (as with
+EnumerateFrameSet and generic list nodes).
+
+Usage:
+    python benchmarks/bench_frame_set_algebra.py [num_frames] [cases]
+"""
+
+import os
+import random
+import sys
+import time
+
+import fileseq
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "types"))
+import iosequencealgebra
+
+
+def _RandomFrameSet(rng):
+    parts = []
+    for _ in range(rng.randint(0, 5)):
+        start = rng.randint(-20, 200)
+        end = start + rng.randint(0, 150)
+        kind = rng.randrange(4)
+        if kind == 0:
+            parts.append("{}-{}".format(start, end))
+        elif kind == 1:
+            parts.append(str(start))
+        elif kind == 2:
+            parts.append("{}-{}x{}".format(start, end, rng.randint(2, 7)))
+        else:
+            parts.append("{}-{}".format(end, start))
+    return fileseq.FrameSet(",".join(parts))
+
+
+def Validate(cases):
+    rng = random.Random(0)
+    for _ in range(cases):
+        frame_set_a = _RandomFrameSet(rng)
+        frame_set_b = _RandomFrameSet(rng)
+        frames_a = list(frame_set_a)
+        for operation in iosequencealgebra.OPERATIONS:
+            result = iosequencealgebra.Combine(frame_set_a, frame_set_b,
+                                               operation)
+            reference = getattr(frame_set_a, operation)(frame_set_b)
+            assert list(result) == sorted(reference), \
+                (frame_set_a, frame_set_b, operation, result)
+
+        offset = rng.randint(-50, 50)
+        assert (list(iosequencealgebra.Offset(frame_set_a, offset)) ==
+                [frame + offset for frame in frames_a])
+        low = rng.randint(-30, 200)
+        high = low + rng.randint(-5, 200)
+        assert (list(iosequencealgebra.Clamp(frame_set_a, low, high)) ==
+                [frame for frame in frames_a if low <= frame <= high])
+        step = rng.randint(1, 9)
+        assert (list(iosequencealgebra.Decimate(frame_set_a, step)) ==
+                frames_a[::step])
+        chunks = iosequencealgebra.Split(frame_set_a, rng.randint(1, 9))
+        assert [frame for chunk in chunks for frame in chunk] == frames_a
+    print("{} random cases match fileseq".format(cases))
+
+
+def _Time(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def _ExpandedSets(frame_set_a, frame_set_b):
+    # Sorted like the results of iosequencealgebra.
+    frames_b = set(frame_set_b)
+    return fileseq.FrameSet(sorted(frame for frame in frame_set_a
+                                   if frame not in frames_b))
+
+
+def main(num_frames=1000000, cases=500):
+    Validate(cases)
+
+    # Frames to re-render: the whole shot minus the blocks already done.
+    rng = random.Random(1)
+    block = max(num_frames // 2000, 1)
+    renders = fileseq.FrameSet("1-{}".format(num_frames))
+    done = fileseq.FrameSet(",".join(
+                "{}-{}".format(start, start + rng.randint(0, block - 1))
+                for start in range(1, num_frames, block * 2)))
+    print("\ndifference of {} frames and {} ranges".format(
+                len(renders), len(done.frange.split(","))))
+    print("{:<22}  {:>9}".format("method", "seconds"))
+    expected = None
+    for name, function in (("iosequencealgebra",
+                            iosequencealgebra.Difference),
+                           ("fileseq", fileseq.FrameSet.difference),
+                           ("expanded frames", _ExpandedSets)):
+        result, elapsed = _Time(function, renders, done)
+        if expected is None:
+            expected = list(result)
+        else:
+            assert sorted(result) == expected
+        print("{:<22}  {:>9.4f}".format(name, elapsed))
+
+    print("\n{:<22}  {:>9}".format("operation", "seconds"))
+    for name, function, args in (
+            ("union", iosequencealgebra.Union, (renders, done)),
+            ("intersection", iosequencealgebra.Intersection,
+             (renders, done)),
+            ("symmetric_difference", iosequencealgebra.SymmetricDifference,
+             (renders, done)),
+            ("offset", iosequencealgebra.Offset, (done, 1000)),
+            ("clamp", iosequencealgebra.Clamp, (done, 100, num_frames // 2)),
+            ("decimate", iosequencealgebra.Decimate, (renders, 7)),
+            ("split", iosequencealgebra.Split, (done, 100))):
+        _, elapsed = _Time(function, *args)
+        print("{:<22}  {:>9.4f}".format(name, elapsed))
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args)
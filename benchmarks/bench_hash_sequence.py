@@ -0,0 +1,77 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Benchmark hashing the frames of a sequence: a serial hashlib loop against
+iosequencehash.HashSequence with a pool of threads, and with a warm
+persistent cache.
+
+Usage:
+    python benchmarks/bench_hash_sequence.py [num_frames] [frame_mib]
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+import fileseq
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "types"))
+import iosequencehash
+
+
+def _SerialHash(sequence):
+    digests = []
+    for frame in sequence.frameSet():
+        with open(sequence.frame(frame), "rb") as frame_file:
+            digests.append(hashlib.sha256(frame_file.read()).hexdigest())
+    return digests
+
+
+def main(num_frames=200, frame_mib=8):
+    with tempfile.TemporaryDirectory() as root:
+        sequence = fileseq.FileSequence(
+                            os.path.join(root, "render.####.exr"),
+                            pad_style=fileseq.PAD_STYLE_HASH1)
+        sequence.setFrameSet(fileseq.FrameSet("1-{}".format(num_frames)))
+        for frame in sequence.frameSet():
+            with open(sequence.frame(frame), "wb") as frame_file:
+                frame_file.write(os.urandom(frame_mib * 1024 * 1024))
+        total_mib = num_frames * frame_mib
+        print("{} frames of {} MiB ({} MiB) in {}".format(
+                        num_frames, frame_mib, total_mib, root))
+        print("{:<20}  {:>9}  {:>10}".format("method", "seconds", "MiB/s"))
+
+        def report(name, elapsed):
+            print("{:<20}  {:>9.3f}  {:>10.1f}".format(
+                        name, elapsed, total_mib / elapsed))
+
+        start = time.perf_counter()
+        expected = _SerialHash(sequence)
+        report("serial read+hash", time.perf_counter() - start)
+
+        for max_workers in (1, 4, 8):
+            start = time.perf_counter()
+            result = iosequencehash.HashSequence(sequence,
+                                                 max_workers=max_workers)
+            report("threads x{}".format(max_workers),
+                   time.perf_counter() - start)
+            assert result.digests == expected
+
+        # Digests of frames written within the last couple of seconds are
+        # not cached, so date the frames back before warming the cache.
+        written_ns = time.time_ns() - 10 * 10 ** 9
+        for frame in sequence.frameSet():
+            os.utime(sequence.frame(frame), ns=(written_ns, written_ns))
+        cache = iosequencehash.GetCache(os.path.join(root, "digests.db"))
+        iosequencehash.HashSequence(sequence, cache=cache)
+        start = time.perf_counter()
+        result = iosequencehash.HashSequence(sequence, cache=cache)
+        report("warm cache", time.perf_counter() - start)
+        assert result.cached_count == num_frames
+        assert result.digests == expected
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,76 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Benchmark the cost of the Process instrumentation: a cheap node called with
+instrumentation disabled, with the in-memory sink and with the JSON-lines
+sink, against the same Process method undecorated. Then print the records
+aggregated for a node that lists a sequence's directory.
+
+Usage:
+    python benchmarks/bench_instrumentation.py [calls]
+"""
+
+import os
+import sys
+import time
+
+import iograft_standin
+iograft_standin.Install(force=True)
+
+import iosequencedircache
+import iosequenceinstrument
+import sequence_generators
+from run_suite import LoadNodes
+
+
+def _Time(process, node, inputs, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        process(node, iograft_standin.NodeData(inputs))
+    return (time.perf_counter() - start) / calls
+
+
+def main(calls=100000):
+    nodes = LoadNodes()
+    with sequence_generators.ScratchDirectory() as directory:
+        sequence, = sequence_generators.Sparse(directory, 1000)
+        node = nodes["get_frame_set"]()
+        instrumented = type(node).Process
+        inputs = {"sequence": sequence}
+
+        print("{:<14}  {:>12}".format("mode", "us/call"))
+        modes = [("undecorated", None, instrumented.__wrapped__),
+                 ("disabled", None, instrumented),
+                 ("memory", iosequenceinstrument.AggregateSink(),
+                  instrumented),
+                 ("jsonl", iosequenceinstrument.JsonLinesSink(
+                            os.path.join(directory, "records.jsonl")),
+                  instrumented)]
+        for name, sink, process in modes:
+            if sink is not None:
+                iosequenceinstrument.Enable(sink)
+            try:
+                elapsed = _Time(process, node, inputs, calls)
+            finally:
+                iosequenceinstrument.Disable()
+                if sink is not None:
+                    sink.Close()
+            print("{:<14}  {:>12.3f}".format(name, elapsed * 1e6))
+
+        sink = iosequenceinstrument.Enable(
+                                    iosequenceinstrument.AggregateSink(),
+                                    measure_output_bytes=True)
+        try:
+            node = nodes["split_existing_frames"]()
+            for _ in range(3):
+                iosequencedircache.Invalidate()
+                node.Process(iograft_standin.NodeData(inputs))
+        finally:
+            iosequenceinstrument.Disable()
+        for node_name, totals in sink.Summary().items():
+            print("\n{}:".format(node_name))
+            for key, value in sorted(totals.items()):
+                print("  {:<14} {}".format(key, value))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
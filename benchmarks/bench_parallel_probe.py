@@ -0,0 +1,74 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Benchmark the threaded frame existence probes used by the frame filter nodes
+when max_workers is set. A fixed latency is injected into every stat call
+to stand in for high-latency storage.
+
+Usage:
+    python benchmarks/bench_parallel_probe.py [latency_ms] [num_frames]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import fileseq
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "types"))
+import iosequencedisk
+
+
+class _SlowStat(object):
+    """
+    Inject a fixed latency into os.stat for the duration of the context.
+    """
+    def __init__(self, latency):
+        self.latency = latency
+
+    def __enter__(self):
+        self._stat = os.stat
+
+        def slow_stat(*args, **kwargs):
+            time.sleep(self.latency)
+            return self._stat(*args, **kwargs)
+
+        os.stat = slow_stat
+        return self
+
+    def __exit__(self, *args):
+        os.stat = self._stat
+
+
+def main(latency_ms=2.0, num_frames=1000):
+    with tempfile.TemporaryDirectory() as directory:
+        sequence = fileseq.FileSequence(
+                            os.path.join(directory, "render.####.exr"),
+                            pad_style=fileseq.PAD_STYLE_HASH1)
+        sequence.setFrameSet(fileseq.FrameSet("1-{}".format(num_frames)))
+        for frame in range(1, num_frames + 1, 3):
+            open(sequence.frame(frame), "w").close()
+
+        print("{} frames, {}ms per stat".format(num_frames, latency_ms))
+        print("{:>8}  {:>10}  {:>12}".format("workers", "seconds",
+                                             "frames/sec"))
+        expected = None
+        with _SlowStat(latency_ms / 1000.0):
+            for max_workers in (1, 2, 4, 8, 16, 32, 64):
+                start = time.perf_counter()
+                result = iosequencedisk.SplitExistingFrames(
+                                    sequence, max_workers=max_workers)
+                elapsed = time.perf_counter() - start
+                print("{:>8}  {:>10.4f}  {:>12.0f}".format(
+                            max_workers, elapsed, num_frames / elapsed))
+
+                result = tuple(str(frame_set) for frame_set in result)
+                if expected is None:
+                    expected = result
+                assert result == expected, "Results do not match"
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(float(args[0]) if args else 2.0,
+         int(args[1]) if len(args) > 1 else 1000)
@@ -0,0 +1,71 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Benchmark partitioning a frame set into chunks for farm tasks: enumerating
+every frame into a list and slicing it (as with GetFrameSet and
+EnumerateFrameSet) against iosequencealgebra.Partition, which slices the
+frame set's ranges.
+
+Usage:
+    python benchmarks/bench_partition_frame_set.py [num_frames]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+import fileseq
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "types"))
+import iosequencealgebra
+
+
+def _EnumerateAndSlice(frame_set, chunk_size):
+    frames = list(frame_set)
+    return [fileseq.FrameSet(frames[start:start + chunk_size])
+            for start in range(0, len(frames), chunk_size)]
+
+
+def _Measure(function, *args):
+    """
+    Return the result, the elapsed time and the peak memory allocated by a
+    call. The memory is measured in a second call as tracing slows it down.
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main(num_frames=1000000):
+    frame_set = fileseq.FrameSet("1-{}".format(num_frames))
+    print("{} frames".format(num_frames))
+    print("{:>10}  {:>8}  {:>22}  {:>22}".format(
+                    "chunk size", "chunks", "enumerate and slice",
+                    "Partition"))
+    for chunk_size in (10000, 1000, 100):
+        expected, slice_elapsed, slice_peak = _Measure(
+                        _EnumerateAndSlice, frame_set, chunk_size)
+        chunks, partition_elapsed, partition_peak = _Measure(
+                        iosequencealgebra.Partition, frame_set, chunk_size)
+        assert [chunk.frange for chunk in chunks] == \
+            [chunk.frange for chunk in expected]
+        print("{:>10}  {:>8}  {:>8.3f}s {:>9.1f} MiB  {:>8.3f}s {:>9.1f} "
+              "MiB".format(chunk_size, len(chunks),
+                           slice_elapsed, slice_peak / 2 ** 20,
+                           partition_elapsed, partition_peak / 2 ** 20))
+
+    chunks = iosequencealgebra.Partition(
+                    frame_set, chunk_size=1000,
+                    order=iosequencealgebra.FIRST_LAST_MIDDLE)
+    print("first_last_middle, chunk size 1000: {}".format(
+                    ", ".join(str(chunk) for chunk in chunks[:5])))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
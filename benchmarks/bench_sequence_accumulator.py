@@ -0,0 +1,91 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Benchmark grouping the paths of a gzip compressed manifest into sequences:
+reading every path into a list for FindSequencesInList against streaming
+the manifest into a SequenceAccumulator. Reports the time and the peak
+memory traced while grouping.
+
+Usage:
+    python benchmarks/bench_sequence_accumulator.py [num_paths]
+"""
+
+import gzip
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "types"))
+import iosequencelist
+
+
+def _WriteManifest(manifest_path, num_paths, frames_per_sequence=1000,
+                   seed=0):
+    """
+    Write a shuffled manifest of num_paths frame paths with occasional
+    missing frames.
+    """
+    rng = random.Random(seed)
+    paths = []
+    sequence_index = 0
+    while len(paths) < num_paths:
+        directory = "/show/shot{:04d}/render".format(sequence_index)
+        for frame in range(1001, 1001 + frames_per_sequence):
+            if rng.random() < 0.01:
+                continue
+            paths.append("{}/beauty.{:04d}.exr".format(directory, frame))
+        sequence_index += 1
+    del paths[num_paths:]
+    rng.shuffle(paths)
+    with gzip.open(manifest_path, "wt", encoding="utf-8") as manifest_file:
+        for path in paths:
+            manifest_file.write(path + "\n")
+
+
+def _Measure(function):
+    """
+    Return the result, time and peak traced memory of the function. Tracing
+    slows everything down so the time is taken from a separate run.
+    """
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main(num_paths=1000000):
+    with tempfile.TemporaryDirectory() as root:
+        manifest_path = os.path.join(root, "manifest.txt.gz")
+        _WriteManifest(manifest_path, num_paths)
+
+        def in_memory():
+            paths = list(iosequencelist.ReadManifest(manifest_path))
+            return iosequencelist.FindSequencesInList(paths)
+
+        def streamed():
+            accumulator = iosequencelist.SequenceAccumulator()
+            accumulator.AddPaths(iosequencelist.ReadManifest(manifest_path))
+            return accumulator.Finalize()
+
+        expected, list_elapsed, list_peak = _Measure(in_memory)
+        result, stream_elapsed, stream_peak = _Measure(streamed)
+        assert ([str(s) for s in expected] == [str(s) for s in result]), \
+            "Results do not match"
+
+        print("{} paths, {} sequences".format(num_paths, len(result)))
+        print("list + FindSequencesInList: {:.3f}s, peak {:.1f} MiB".format(
+                            list_elapsed, list_peak / 2.0 ** 20))
+        print("SequenceAccumulator:        {:.3f}s, peak {:.1f} MiB".format(
+                            stream_elapsed, stream_peak / 2.0 ** 20))
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,99 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Benchmark the latency of sequence discovery queries from a new process:
+listing every directory (cold) against answering from a pre-warmed
+iosequenceindex.SequenceIndex (warm). The in-memory directory cache is
+cleared before every query so that only the index is reused.
+
+Usage:
+    python benchmarks/bench_sequence_index.py [dirs] [seqs_per_dir] [frames]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "types"))
+import iosequencedircache
+import iosequencedisk
+import iosequenceindex
+
+
+def _MakeTree(root, num_dirs, num_sequences, num_frames):
+    directories = []
+    for dir_index in range(num_dirs):
+        directory = os.path.join(root, "shot{:03d}".format(dir_index))
+        os.mkdir(directory)
+        for seq_index in range(num_sequences):
+            for frame in range(1, num_frames + 1):
+                open(os.path.join(directory, "layer{:02d}.{:04d}.exr".format(
+                                        seq_index, frame)), "w").close()
+        directories.append(directory)
+    return directories
+
+
+def _Queries(directories):
+    """
+    Run a directory query, a file pattern query and a single sequence query
+    against every directory. Returns the results and the elapsed time.
+    """
+    results = []
+    start = time.perf_counter()
+    for directory in directories:
+        iosequencedircache.Invalidate()
+        results.append([str(s) for s in
+                        iosequencedisk.FindSequencesOnDiskBatch(
+                                [directory,
+                                 os.path.join(directory, "layer00.#.exr")])[0]])
+        results.append(str(iosequencedisk.FindSequenceOnDisk(
+                                os.path.join(directory, "layer01.#.exr"))))
+    return results, time.perf_counter() - start
+
+
+def main(num_dirs=50, num_sequences=20, num_frames=200):
+    with tempfile.TemporaryDirectory() as root:
+        tree = os.path.join(root, "tree")
+        os.mkdir(tree)
+        directories = _MakeTree(tree, num_dirs, num_sequences, num_frames)
+        print("{} directories x {} sequences x {} frames".format(
+                            num_dirs, num_sequences, num_frames))
+
+        # The index does not record directories modified in the last couple
+        # of seconds, as files could still be added without changing their
+        # modification time.
+        past = time.time() - 60
+        for directory in directories:
+            os.utime(directory, (past, past))
+
+        cold, cold_elapsed = _Queries(directories)
+
+        index = iosequenceindex.OpenIndex(os.path.join(root, "index.db"))
+        start = time.perf_counter()
+        stats = iosequenceindex.WarmIndex(tree, index)
+        warm_index_elapsed = time.perf_counter() - start
+
+        iosequencedircache.SetIndex(index)
+        try:
+            warm, warm_elapsed = _Queries(directories)
+            # A second run also reuses the single sequence query results.
+            warm2, warm2_elapsed = _Queries(directories)
+        finally:
+            iosequencedircache.SetIndex(None)
+            index.Close()
+
+        assert cold == warm == warm2, "Results do not match"
+        per_query = 3.0 * len(directories)
+        print("warm index ({} directories, {} listed): {:.4f}s".format(
+                            stats["directories"], stats["listed"],
+                            warm_index_elapsed))
+        for name, elapsed in (("cold", cold_elapsed),
+                              ("warm", warm_elapsed),
+                              ("warm, repeated", warm2_elapsed)):
+            print("{:<16} {:.4f}s  ({:.3f}ms per query)".format(
+                            name, elapsed, elapsed / per_query * 1000))
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,69 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Benchmark the round-trip cost of serializing and deserializing FileSequence
+values through the iograft type functions, against the previous to_dict /
+from_dict implementation.
+
+Usage:
+    python benchmarks/bench_serialization.py [iterations]
+"""
+
+import sys
+import time
+
+import iograft_standin
+iograft_standin.Install()
+
+import fileseq
+import iograft
+import iosequencetypes
+
+
+def _LegacySerialize(value):
+    return iograft.SerializeValue(value.to_dict())
+
+
+def _LegacyDeserialize(serialized_value):
+    return fileseq.FileSequence.from_dict(
+                                iograft.DeserializeValue(serialized_value))
+
+
+def _RoundTrip(serialize, deserialize, sequences, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for sequence in sequences:
+            result = deserialize(serialize(sequence))
+    elapsed = time.perf_counter() - start
+    return elapsed, len(serialize(sequences[0])), result
+
+
+def main(iterations=2000):
+    sequences = []
+    for frame_range in ("1001-1240", "1001-1240x4", "1-100,200-300,450"):
+        sequence = fileseq.FileSequence(
+                    "/projects/show/seq/shot/render/beauty.####.exr",
+                    pad_style=fileseq.PAD_STYLE_HASH1)
+        sequence.setFrameSet(fileseq.FrameSet(frame_range))
+        sequences.append(sequence)
+
+    file_sequence = iosequencetypes.FileSequence
+    print("{:<10}  {:>10}  {:>12}  {:>14}".format(
+                    "method", "seconds", "bytes/value", "round trips/s"))
+    for name, serialize, deserialize in (
+                ("legacy", _LegacySerialize, _LegacyDeserialize),
+                ("compact", file_sequence.SerializeValue,
+                 file_sequence.DeserializeValue)):
+        elapsed, size, result = _RoundTrip(serialize, deserialize,
+                                           sequences, iterations)
+        assert str(result) == str(sequences[-1]), "Round trip mismatch"
+        print("{:<10}  {:>10.4f}  {:>12}  {:>14.0f}".format(
+                    name, elapsed, size,
+                    iterations * len(sequences) / elapsed))
+
+    cache = file_sequence.deserialize_cache
+    print("deserialize cache: {} hits, {} misses".format(cache.hits,
+                                                         cache.misses))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,92 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Benchmark the throughput of TransferSequence on local tmpfs (/dev/shm
+where available) against a per-file shutil.copy2 loop.
+
+Usage:
+    python benchmarks/bench_transfer_sequence.py [num_frames] [frame_kib]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import fileseq
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "types"))
+import iosequencefileops
+
+
+def _TemporaryRoot():
+    if os.path.isdir("/dev/shm"):
+        return tempfile.TemporaryDirectory(dir="/dev/shm")
+    return tempfile.TemporaryDirectory()
+
+
+def _Sequence(directory, frame_range=""):
+    sequence = fileseq.FileSequence(
+                        os.path.join(directory, "render.####.exr"),
+                        pad_style=fileseq.PAD_STYLE_HASH1)
+    sequence.setFrameSet(fileseq.FrameSet(frame_range))
+    return sequence
+
+
+def _CopyLoop(source, destination):
+    os.makedirs(destination.dirname(), exist_ok=True)
+    for frame in source.frameSet():
+        shutil.copy2(source.frame(frame), destination.frame(frame))
+
+
+def main(num_frames=5000, frame_kib=256):
+    with _TemporaryRoot() as root:
+        source = _Sequence(os.path.join(root, "source"),
+                           "1-{}".format(num_frames))
+        os.mkdir(source.dirname())
+        data = os.urandom(frame_kib * 1024)
+        for frame in source.frameSet():
+            with open(source.frame(frame), "wb") as frame_file:
+                frame_file.write(data)
+        total_mib = num_frames * frame_kib / 1024.0
+        print("{} frames of {} KiB ({:.0f} MiB) in {}".format(
+                        num_frames, frame_kib, total_mib, root))
+        print("{:<28}  {:>9}  {:>10}  {:>10}".format(
+                        "method", "seconds", "MiB/s", "frames/s"))
+
+        def report(name, elapsed):
+            print("{:<28}  {:>9.3f}  {:>10.1f}  {:>10.0f}".format(
+                        name, elapsed, total_mib / elapsed,
+                        num_frames / elapsed))
+
+        start = time.perf_counter()
+        _CopyLoop(source, _Sequence(os.path.join(root, "loop")))
+        report("shutil.copy2 loop", time.perf_counter() - start)
+
+        runs = [(iosequencefileops.COPY, 1, False),
+                (iosequencefileops.COPY, 8, False),
+                (iosequencefileops.COPY, 8, True),
+                (iosequencefileops.HARDLINK, 8, False),
+                (iosequencefileops.SYMLINK, 8, False)]
+        for index, (operation, max_workers, skip_identical) in \
+                enumerate(runs):
+            # Skipping identical frames runs against the previous copy.
+            if not skip_identical:
+                destination_dir = os.path.join(root, "out{}".format(index))
+            destination = _Sequence(destination_dir)
+
+            start = time.perf_counter()
+            result = iosequencefileops.TransferSequence(
+                                    source, destination, operation,
+                                    max_workers=max_workers,
+                                    skip_identical=skip_identical)
+            elapsed = time.perf_counter() - start
+            assert not result.errors, result.errors[:5]
+            name = "{} x{}{}".format(operation, max_workers,
+                                     " (identical)" if skip_identical else "")
+            report(name, elapsed)
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args)
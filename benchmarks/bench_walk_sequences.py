@@ -0,0 +1,60 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Benchmark the recursive sequence discovery used by the
+FindSequencesRecursive node, reporting directories per second and the time
+until the first sequences are available for increasing worker counts.
+
+Usage:
+    python benchmarks/bench_walk_sequences.py [branching] [depth]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "types"))
+import iosequencedisk
+
+
+def _MakeTree(directory, branching, depth, num_frames=5):
+    """
+    Write a tree of directories, each holding a short sequence. Returns the
+    number of directories written.
+    """
+    for frame in range(1, num_frames + 1):
+        open(os.path.join(directory, "beauty.{:04d}.exr".format(frame)),
+             "w").close()
+    count = 1
+    if depth > 0:
+        for index in range(branching):
+            subdir = os.path.join(directory, "d{}".format(index))
+            os.mkdir(subdir)
+            count += _MakeTree(subdir, branching, depth - 1, num_frames)
+    return count
+
+
+def main(branching=6, depth=4):
+    with tempfile.TemporaryDirectory() as root:
+        num_dirs = _MakeTree(root, branching, depth)
+        print("{} directories".format(num_dirs))
+        print("{:>8}  {:>10}  {:>12}  {:>10}".format(
+                            "workers", "seconds", "first (ms)", "dirs/sec"))
+        for max_workers in (1, 2, 4, 8, 16):
+            start = time.perf_counter()
+            first = None
+            found = 0
+            for _, sequences in iosequencedisk.WalkSequences(
+                                        root, max_workers=max_workers):
+                if first is None:
+                    first = time.perf_counter() - start
+                found += len(sequences)
+            elapsed = time.perf_counter() - start
+            assert found == num_dirs, "Missing sequences"
+            print("{:>8}  {:>10.4f}  {:>12.2f}  {:>10.0f}".format(
+                    max_workers, elapsed, first * 1000, num_dirs / elapsed))
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,93 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Benchmark polling a sequence while it is being written. A fixed number of
+frames is written between polls and the cost of each poll is reported as
+the sequence grows, for a full re-scan with SplitExistingFrames and for a
+SequenceTracker using inotify (where available) and polling the
+directory's modification time.
+
+With inotify the cost of a poll stays flat as the sequence grows. Polling
+the modification time keeps idle polls flat, but has to list the directory
+whenever it has changed, so the cost of those polls grows with the
+directory; only the new entries are processed.
+
+Usage:
+    python benchmarks/bench_watch_sequence.py [num_frames] [frames_per_poll]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import fileseq
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "types"))
+import iosequencedircache
+import iosequencedisk
+import iosequencewatch
+
+
+def _Rescan(sequence):
+    # Bypass the directory cache so that every poll sees the new frames.
+    iosequencedircache.Invalidate()
+    existing_frame_set, _ = iosequencedisk.SplitExistingFrames(sequence)
+    return existing_frame_set
+
+
+def main(num_frames=20000, frames_per_poll=100):
+    methods = [("rescan", None)]
+    if iosequencewatch.InotifyAvailable():
+        methods.append(("inotify", True))
+    methods.append(("mtime poll", False))
+
+    report_every = max(num_frames // frames_per_poll // 10, 1)
+    for name, use_inotify in methods:
+        print(name)
+        print("{:>10}  {:>12}  {:>14}".format("frames", "poll (ms)",
+                                              "idle poll (ms)"))
+        with tempfile.TemporaryDirectory() as directory:
+            sequence = fileseq.FileSequence(
+                        os.path.join(directory, "render.####.exr"),
+                        pad_style=fileseq.PAD_STYLE_HASH1)
+            sequence.setFrameSet(fileseq.FrameSet("1-{}".format(num_frames)))
+
+            tracker = None
+            if use_inotify is not None:
+                tracker = iosequencewatch.SequenceTracker(
+                                        sequence, use_inotify=use_inotify)
+
+            seen = 0
+            for poll_index, first in enumerate(
+                            range(1, num_frames + 1, frames_per_poll)):
+                last = min(first + frames_per_poll, num_frames + 1)
+                for frame in range(first, last):
+                    open(sequence.frame(frame), "w").close()
+
+                start = time.perf_counter()
+                if tracker is None:
+                    seen = len(_Rescan(sequence))
+                else:
+                    seen += len(tracker.Poll())
+                elapsed = time.perf_counter() - start
+
+                # Poll again without any changes to the directory.
+                start = time.perf_counter()
+                if tracker is None:
+                    _Rescan(sequence)
+                else:
+                    tracker.Poll()
+                idle_elapsed = time.perf_counter() - start
+
+                if (poll_index + 1) % report_every == 0:
+                    print("{:>10}  {:>12.3f}  {:>14.3f}".format(
+                                    seen, elapsed * 1000.0,
+                                    idle_elapsed * 1000.0))
+            assert seen == num_frames, "Frames were missed"
+            if tracker is not None:
+                tracker.Close()
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,172 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Minimal local stand-in for the iograft and iobasictypes modules so that the
+types and nodes in this repository can be benchmarked outside of an iograft
+install. The real modules are used when they can be imported, unless the
+stand-in is forced so that node Process methods can be called directly with
+a NodeData object.
+"""
+
+import importlib
+import json
+import os
+import sys
+import types
+
+
+_TYPES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "..", "types")
+
+_NO_DEFAULT = object()
+
+
+def _CreateIograft():
+    iograft = types.ModuleType("iograft")
+    iograft.IS_STANDIN = True
+
+    class TypeId(object):
+        def __init__(self, name, namespace):
+            self.name = name
+            self.namespace = namespace
+
+    class PythonType(object):
+        def __init__(self, type_id, value_type=None):
+            self._type_id = type_id
+            self.value_type = value_type
+
+        def GetTypeId(self):
+            return self._type_id
+
+    class PythonListType(PythonType):
+        def __init__(self, type_id, base_value_type=None):
+            super(PythonListType, self).__init__(type_id,
+                                                 value_type=list)
+            self.base_value_type = base_value_type
+
+    class Node(object):
+        pass
+
+    class InputDefinition(object):
+        def __init__(self, name, value_type, default_value=_NO_DEFAULT):
+            self.name = name
+            self.value_type = value_type
+            self.default_value = default_value
+
+    class OutputDefinition(object):
+        def __init__(self, name, value_type):
+            self.name = name
+            self.value_type = value_type
+
+    class NodeDefinition(object):
+        def __init__(self, name, namespace):
+            self.name = name
+            self.namespace = namespace
+            self.menu_path = ""
+            self.inputs = []
+            self.outputs = []
+
+        def SetMenuPath(self, menu_path):
+            self.menu_path = menu_path
+
+        def AddInput(self, definition):
+            self.inputs.append(definition)
+
+        def AddOutput(self, definition):
+            self.outputs.append(definition)
+
+    def GetInput(definition, data):
+        return data.GetInput(definition)
+
+    def SetOutput(definition, data, value):
+        data.SetOutput(definition, value)
+
+    def SerializeValue(value):
+        return json.dumps(value).encode("utf-8")
+
+    def DeserializeValue(serialized_value):
+        return json.loads(serialized_value)
+
+    iograft.Node = Node
+    iograft.InputDefinition = InputDefinition
+    iograft.OutputDefinition = OutputDefinition
+    iograft.NodeDefinition = NodeDefinition
+    iograft.GetInput = GetInput
+    iograft.SetOutput = SetOutput
+    iograft.TypeId = TypeId
+    iograft.PythonType = PythonType
+    iograft.PythonListType = PythonListType
+    iograft.SerializeValue = SerializeValue
+    iograft.DeserializeValue = DeserializeValue
+    iograft.castfunction = lambda func: func
+    return iograft
+
+
+def _CreateIobasictypes(iograft):
+    iobasictypes = types.ModuleType("iobasictypes")
+
+    class BasicType(iograft.PythonType):
+        def __init__(self):
+            super(BasicType, self).__init__(self.type_id,
+                                            value_type=self.value_type)
+
+    for name, value_type in (("String", str), ("Path", str), ("Int", int),
+                             ("Float", float), ("Bool", bool),
+                             ("StringList", list), ("PathList", list),
+                             ("IntList", list), ("FloatList", list)):
+        setattr(iobasictypes, name, type(name, (BasicType,), {
+                        "type_id": iograft.TypeId(name, "iobasictypes"),
+                        "value_type": value_type}))
+    return iobasictypes
+
+
+class NodeData(object):
+    """
+    The inputs given to and outputs set by a node when its Process method
+    is called with the stand-in. Inputs that are not given take the default
+    value of their definition.
+    """
+    def __init__(self, inputs=None):
+        self.inputs = dict(inputs or {})
+        self.outputs = {}
+
+    def GetInput(self, definition):
+        if definition.name in self.inputs:
+            return self.inputs[definition.name]
+        if definition.default_value is _NO_DEFAULT:
+            raise KeyError("No value for input: {}".format(definition.name))
+        return definition.default_value
+
+    def SetOutput(self, definition, value):
+        self.outputs[definition.name] = value
+
+
+def Install(force=False):
+    """
+    Make the iograft and iobasictypes modules (or the stand-ins for them)
+    and the types directory of this repository importable. If force is
+    True the stand-ins replace the real modules, which must not have been
+    imported yet. Installing the stand-ins again has no effect.
+    """
+    if _TYPES_DIR not in sys.path:
+        sys.path.insert(0, _TYPES_DIR)
+
+    if _IsStandIn("iograft"):
+        return
+
+    if force or not _CanImport("iograft"):
+        sys.modules["iograft"] = _CreateIograft()
+    if force or not _CanImport("iobasictypes"):
+        sys.modules["iobasictypes"] = _CreateIobasictypes(
+                                                    sys.modules["iograft"])
+
+
+def _IsStandIn(name):
+    return getattr(sys.modules.get(name), "IS_STANDIN", False)
+
+
+def _CanImport(name):
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        return False
+    return True
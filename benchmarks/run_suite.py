@@ -0,0 +1,571 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Benchmark suite covering every node in nodes/ and the serialization functions
+of the FileSequence and FrameSet types.
+
+Each node's Process method is called through the iograft stand-in with
+synthetic sequences (see sequence_generators) written to tmpfs, for each of
+the given numbers of frames. For every case the fastest of several runs and
+the peak memory allocated by a separate traced run are recorded; the shared
+caches are cleared before every run so each one is a cold evaluation. Each
+case is first run once untimed, so that one-off costs such as lazy imports
+are not recorded. The fastest run is only comparable between runs of the
+suite with as many timed runs, so comparing against a baseline recorded
+with a larger --repeat is refused.
+
+The results can be written as JSON and compared against a stored baseline,
+in which case the suite exits with a non-zero status if any case is slower
+or uses more memory than the baseline by more than the tolerance. The suite
+also fails if a node in nodes/ has no benchmark case.
+
+Usage:
+    python benchmarks/run_suite.py [--sizes N ...] [--repeat N]
+                                   [--filter TEXT] [--output PATH]
+                                   [--baseline PATH] [--save-baseline]
+                                   [--profile]
+
+    # Check for regressions against the stored baseline.
+    python benchmarks/run_suite.py --baseline benchmarks/baseline.json
+
+    # Profile the cases of a single node.
+    python benchmarks/run_suite.py --filter hash_sequence --profile
+"""
+
+import argparse
+import cProfile
+import gc
+import glob
+import importlib.metadata
+import importlib.util
+import json
+import os
+import platform
+import pstats
+import statistics
+import sys
+import time
+import tracemalloc
+
+import iograft_standin
+iograft_standin.Install(force=True)
+
+import fileseq
+
+import iosequencedircache
+import iosequencedisk
+import iosequencetypes
+import iosequencewatch
+import sequence_generators
+
+
+_NODES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "..", "nodes")
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "baseline.json")
+
+# Version of the layout of the results; results are only compared against
+# a baseline with the same version.
+RESULTS_VERSION = 1
+
+DEFAULT_SIZES = (100, 10000)
+DEFAULT_REPEAT = 5
+
+# A case regresses if it is slower than the baseline by more than this
+# fraction and by more than the noise floor in seconds.
+TIME_TOLERANCE = 1.0
+TIME_FLOOR = 0.005
+
+# A case regresses if its peak memory is larger than the baseline by more
+# than this fraction and by more than the noise floor in bytes.
+MEMORY_TOLERANCE = 0.25
+MEMORY_FLOOR = 64 * 1024
+
+
+class Case(object):
+    """
+    A benchmark of one node or function on the sequences made by one of the
+    generators.
+
+    Attributes:
+        target: Name of the node (or type function) being benchmarked.
+        name: Name of the case, unique for the target.
+        generator: Name of the generator in sequence_generators.GENERATORS.
+        make_inputs: Called with the generated sequences and a function
+            returning a new empty scratch directory; returns the dictionary
+            of inputs. It is called before every run and is not timed.
+        function: For type functions, called with the inputs. Node cases
+            call the node's Process method instead.
+    """
+    __slots__ = ("target", "name", "generator", "make_inputs", "function")
+
+    def __init__(self, target, name, generator, make_inputs, function=None):
+        self.target = target
+        self.name = name
+        self.generator = generator
+        self.make_inputs = make_inputs
+        self.function = function
+
+    def Key(self, size):
+        return "{}/{}/{}".format(self.target, self.name, size)
+
+
+def _Existing(sequences):
+    """
+    Return the frames of the first sequence that exist on disk.
+    """
+    existing_frame_set, _ = iosequencedisk.SplitExistingFrames(sequences[0])
+    return existing_frame_set
+
+
+def _Pattern(sequence):
+    return sequence.format("{dirname}{basename}{padding}{extension}")
+
+
+def _Paths(sequences):
+    return [path for sequence in sequences for path in sequence]
+
+
+def _Destination(sequence, scratch):
+    destination = fileseq.FileSequence(
+                    os.path.join(scratch(), "copy.#.exr"),
+                    pad_style=fileseq.PAD_STYLE_HASH1)
+    destination.setFrameSet(sequence.frameSet())
+    return destination
+
+
+def _SerializedSequences(sequences):
+    return [iosequencetypes.FileSequence.SerializeValue(sequence)
+            for sequence in sequences]
+
+
+def _SequenceStrings(sequences):
+    return [iosequencetypes.FileSequence.ToString(sequence)
+            for sequence in sequences]
+
+
+def _MapValues(function):
+    return lambda inputs: [function(value) for value in inputs["values"]]
+
+
+CASES = [
+    Case("clamp_frame_set", "sparse", "sparse",
+         lambda sequences, scratch: {
+             "frame_set": _Existing(sequences),
+             "start_frame": sequences[0].start() + len(sequences[0]) // 4,
+             "end_frame": sequences[0].end() - len(sequences[0]) // 4}),
+    Case("collect_frame_metadata", "dense", "dense",
+         lambda sequences, scratch: {"sequence": sequences[0]}),
+    Case("collect_frame_metadata", "sparse", "sparse",
+         lambda sequences, scratch: {"sequence": sequences[0]}),
+    Case("combine_frame_sets", "union", "sparse",
+         lambda sequences, scratch: {
+             "frame_set_a": _Existing(sequences),
+             "frame_set_b": fileseq.FrameSet("{}-{}x3".format(
+                            sequences[0].start(), sequences[0].end())),
+             "operation": "union"}),
+    Case("combine_frame_sets", "difference", "sparse",
+         lambda sequences, scratch: {
+             "frame_set_a": sequences[0].frameSet(),
+             "frame_set_b": _Existing(sequences),
+             "operation": "difference"}),
+    Case("decimate_frame_set", "sparse", "sparse",
+         lambda sequences, scratch: {"frame_set": _Existing(sequences),
+                                     "step": 3}),
+    Case("define_file_sequence", "stepped", "stepped",
+         lambda sequences, scratch: {
+             "file_pattern": _Pattern(sequences[0]),
+             "frame_set": sequences[0].frameSet()}),
+    Case("enumerate_file_sequence", "dense", "dense",
+         lambda sequences, scratch: {"sequence": sequences[0]}),
+    Case("enumerate_file_sequence", "huge_padding", "huge_padding",
+         lambda sequences, scratch: {"sequence": sequences[0],
+                                     "batch_size": 100,
+                                     "batch_index": 1}),
+    Case("enumerate_frame_set", "sparse", "sparse",
+         lambda sequences, scratch: {"frame_set": _Existing(sequences)}),
+    Case("enumerate_frame_set", "stepped", "stepped",
+         lambda sequences, scratch: {
+             "frame_set": sequences[0].frameSet()}),
+    Case("filter_existing_frames", "dense", "dense",
+         lambda sequences, scratch: {"sequence": sequences[0]}),
+    Case("filter_existing_frames", "sparse", "sparse",
+         lambda sequences, scratch: {"sequence": sequences[0]}),
+    Case("filter_missing_frames", "sparse", "sparse",
+         lambda sequences, scratch: {"sequence": sequences[0]}),
+    Case("find_sequence_on_disk", "many_sequences", "many_sequences",
+         lambda sequences, scratch: {
+             "file_pattern": _Pattern(sequences[-1])}),
+    Case("find_sequence_on_disk", "huge_padding", "huge_padding",
+         lambda sequences, scratch: {
+             "file_pattern": _Pattern(sequences[0])}),
+    Case("find_sequences_in_list", "many_sequences", "many_sequences",
+         lambda sequences, scratch: {"files": _Paths(sequences)}),
+    Case("find_sequences_in_list", "sparse", "sparse",
+         lambda sequences, scratch: {
+             "files": [sequences[0].frame(frame)
+                       for frame in _Existing(sequences)]}),
+    Case("find_sequences_on_disk", "many_sequences", "many_sequences",
+         lambda sequences, scratch: {
+             "file_pattern": os.path.join(sequences[0].dirname(), "*")}),
+    Case("find_sequences_on_disk_batch", "many_sequences", "many_sequences",
+         lambda sequences, scratch: {
+             "file_patterns": [_Pattern(sequence)
+                               for sequence in sequences[:100]]}),
+    Case("find_sequences_recursive", "many_sequences", "many_sequences",
+         lambda sequences, scratch: {
+             "root": sequences[0].dirname()}),
+    Case("get_file_pattern", "huge_padding", "huge_padding",
+         lambda sequences, scratch: {"sequence": sequences[0]}),
+    Case("get_frame_set", "stepped", "stepped",
+         lambda sequences, scratch: {"sequence": sequences[0]}),
+    Case("hash_sequence", "dense", "dense",
+         lambda sequences, scratch: {"sequence": sequences[0],
+                                     "use_cache": False}),
+    Case("offset_frame_set", "sparse", "sparse",
+         lambda sequences, scratch: {"frame_set": _Existing(sequences),
+                                     "offset": 100}),
+    Case("partition_file_sequence", "dense", "dense",
+         lambda sequences, scratch: {"sequence": sequences[0],
+                                     "chunk_size": 10}),
+    Case("partition_frame_set", "sparse", "sparse",
+         lambda sequences, scratch: {"frame_set": _Existing(sequences),
+                                     "chunk_size": 10,
+                                     "order": "first_last_middle"}),
+    Case("set_frame_set", "sparse", "sparse",
+         lambda sequences, scratch: {"sequence": sequences[0],
+                                     "frame_set": _Existing(sequences)}),
+    Case("split_existing_frames", "sparse", "sparse",
+         lambda sequences, scratch: {"sequence": sequences[0]}),
+    Case("split_frame_set", "sparse", "sparse",
+         lambda sequences, scratch: {"frame_set": _Existing(sequences),
+                                     "chunk_count": 8}),
+    Case("transfer_sequence", "copy", "dense",
+         lambda sequences, scratch: {
+             "source": sequences[0],
+             "destination": _Destination(sequences[0], scratch)}),
+    Case("transfer_sequence", "hardlink", "dense",
+         lambda sequences, scratch: {
+             "source": sequences[0],
+             "destination": _Destination(sequences[0], scratch),
+             "operation": "hardlink"}),
+    Case("watch_sequence", "sparse", "sparse",
+         lambda sequences, scratch: {"sequence": sequences[0],
+                                     "reset": True}),
+
+    Case("FileSequence.SerializeValue", "many_sequences", "many_sequences",
+         lambda sequences, scratch: {"values": sequences},
+         _MapValues(iosequencetypes.FileSequence.SerializeValue)),
+    Case("FileSequence.DeserializeValue", "many_sequences", "many_sequences",
+         lambda sequences, scratch: {
+             "values": _SerializedSequences(sequences)},
+         _MapValues(iosequencetypes.FileSequence.DeserializeValue)),
+    Case("FileSequence.ToString", "many_sequences", "many_sequences",
+         lambda sequences, scratch: {"values": sequences},
+         _MapValues(iosequencetypes.FileSequence.ToString)),
+    Case("FileSequence.FromString", "many_sequences", "many_sequences",
+         lambda sequences, scratch: {"values": _SequenceStrings(sequences)},
+         _MapValues(iosequencetypes.FileSequence.FromString)),
+    Case("FileSequenceList.SerializeValues", "many_sequences",
+         "many_sequences",
+         lambda sequences, scratch: {"values": sequences},
+         lambda inputs: iosequencetypes.FileSequenceList.SerializeValues(
+                                                        inputs["values"])),
+    Case("FileSequenceList.DeserializeValues", "many_sequences",
+         "many_sequences",
+         lambda sequences, scratch: {
+             "values": iosequencetypes.FileSequenceList.SerializeValues(
+                                                                sequences)},
+         lambda inputs: iosequencetypes.FileSequenceList.DeserializeValues(
+                                                        inputs["values"])),
+    Case("FrameSet.SerializeValue", "sparse", "sparse",
+         lambda sequences, scratch: {"values": [_Existing(sequences)]},
+         _MapValues(iosequencetypes.FrameSet.SerializeValue)),
+    Case("FrameSet.DeserializeValue", "sparse", "sparse",
+         lambda sequences, scratch: {"values": [
+             iosequencetypes.FrameSet.SerializeValue(_Existing(sequences))]},
+         _MapValues(iosequencetypes.FrameSet.DeserializeValue)),
+]
+
+
+class _Plugin(object):
+    """
+    Record the nodes registered by a node module's LoadPlugin function.
+    """
+    def __init__(self):
+        self.nodes = {}
+
+    def RegisterNode(self, node, create):
+        self.nodes[node.name] = create
+
+
+def LoadNodes(nodes_dir=_NODES_DIR):
+    """
+    Load every node module in the given directory. Returns a dictionary
+    mapping node names to their Create functions.
+    """
+    plugin = _Plugin()
+    for path in sorted(glob.glob(os.path.join(nodes_dir, "*.py"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        spec = importlib.util.spec_from_file_location(
+                                        "iosequence_node_" + name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.LoadPlugin(plugin)
+    return plugin.nodes
+
+
+def _ResetCaches():
+    """
+    Clear the caches shared by the nodes so that each run is a cold
+    evaluation.
+    """
+    iosequencedircache.Invalidate()
+    iosequencewatch.registry.Clear()
+    iosequencetypes.FrameSet.parse_cache.Clear()
+    iosequencetypes.FrameRanges.parse_cache.Clear()
+    iosequencetypes.FileSequence.deserialize_cache.Clear()
+    iosequencetypes.FileSequence.pattern_templates.Clear()
+
+
+class _Fixtures(object):
+    """
+    Generate the sequences for each generator and size once, on demand.
+    """
+    def __init__(self, directory):
+        self._directory = directory
+        self._sequences = {}
+        self._scratch_count = 0
+
+    def Sequences(self, generator, size):
+        key = (generator, size)
+        if key not in self._sequences:
+            directory = os.path.join(self._directory, "{}_{}".format(*key))
+            os.makedirs(directory)
+            self._sequences[key] = sequence_generators.GENERATORS[generator](
+                                                            directory, size)
+        return self._sequences[key]
+
+    def Scratch(self):
+        self._scratch_count += 1
+        directory = os.path.join(self._directory,
+                                 "scratch_{}".format(self._scratch_count))
+        os.makedirs(directory)
+        return directory
+
+
+def _Runner(case, nodes):
+    """
+    Return a function calling the case's node or function with a
+    dictionary of inputs.
+    """
+    if case.function is not None:
+        return case.function
+
+    def run(inputs):
+        data = iograft_standin.NodeData(inputs)
+        nodes[case.target]().Process(data)
+        return data.outputs
+    return run
+
+
+def Measure(case, size, fixtures, nodes, repeat):
+    """
+    Run a case once untimed, then repeat times and once more with memory
+    tracing. Returns a dictionary of the results.
+    """
+    sequences = fixtures.Sequences(case.generator, size)
+    run = _Runner(case, nodes)
+
+    # Keep one-off costs (lazy imports, compiled regular expressions and
+    # the like) out of the measured runs.
+    inputs = case.make_inputs(sequences, fixtures.Scratch)
+    _ResetCaches()
+    run(inputs)
+
+    times = []
+    for _ in range(repeat):
+        inputs = case.make_inputs(sequences, fixtures.Scratch)
+        _ResetCaches()
+        # Like timeit, keep garbage collection out of the timed runs.
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            run(inputs)
+            times.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+
+    # Tracing slows the run down, so memory is measured separately.
+    inputs = case.make_inputs(sequences, fixtures.Scratch)
+    _ResetCaches()
+    tracemalloc.start()
+    try:
+        run(inputs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": min(times),
+            "median_seconds": statistics.median(times),
+            "peak_bytes": peak}
+
+
+def Profile(case, size, fixtures, nodes, limit=20):
+    """
+    Run a case under cProfile and print its most expensive functions.
+    """
+    sequences = fixtures.Sequences(case.generator, size)
+    run = _Runner(case, nodes)
+    inputs = case.make_inputs(sequences, fixtures.Scratch)
+    _ResetCaches()
+    profiler = cProfile.Profile()
+    profiler.runcall(run, inputs)
+    print("== {}".format(case.Key(size)))
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(limit)
+
+
+def Compare(results, baseline, time_tolerance=TIME_TOLERANCE,
+            memory_tolerance=MEMORY_TOLERANCE):
+    """
+    Compare results against a baseline. Returns a dictionary mapping the
+    keys of the results to a list of the regressions found for them, which
+    is empty if there were none.
+    """
+    comparison = {}
+    for key, result in results.items():
+        base = baseline.get(key)
+        regressions = []
+        if base is not None:
+            slowdown = result["seconds"] - base["seconds"]
+            if (slowdown > TIME_FLOOR and
+                    slowdown > base["seconds"] * time_tolerance):
+                regressions.append("time x{:.2f}".format(
+                            result["seconds"] / max(base["seconds"], 1e-9)))
+            growth = result["peak_bytes"] - base["peak_bytes"]
+            if (growth > MEMORY_FLOOR and
+                    growth > base["peak_bytes"] * memory_tolerance):
+                regressions.append("memory x{:.2f}".format(
+                            result["peak_bytes"] /
+                            max(base["peak_bytes"], 1)))
+        comparison[key] = regressions
+    return comparison
+
+
+def _Version(distribution):
+    try:
+        return importlib.metadata.version(distribution)
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def _Environment():
+    return {"python": platform.python_version(),
+            "fileseq": _Version("fileseq"),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+                description="Benchmark every node against synthetic "
+                            "sequences.")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=list(DEFAULT_SIZES),
+                        help="Numbers of frames to generate for each case.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="Number of timed runs of each case.")
+    parser.add_argument("--filter", default="",
+                        help="Only run the cases whose key contains this "
+                             "text.")
+    parser.add_argument("--output", default=None,
+                        help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", default=None,
+                        help="Compare the results against this JSON file "
+                             "and fail on regressions.")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Write the results to the baseline file "
+                             "(default: {}).".format(BASELINE_PATH))
+    parser.add_argument("--time-tolerance", type=float,
+                        default=TIME_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float,
+                        default=MEMORY_TOLERANCE)
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the cases instead of measuring them.")
+    args = parser.parse_args(argv)
+
+    nodes = LoadNodes()
+    uncovered = sorted(set(nodes).difference(case.target for case in CASES))
+    if uncovered and not args.filter:
+        print("Nodes without a benchmark case: {}".format(
+                                                    ", ".join(uncovered)))
+        return 2
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            stored = json.load(baseline_file)
+        if stored.get("version") != RESULTS_VERSION:
+            print("Baseline version {} does not match {}".format(
+                                stored.get("version"), RESULTS_VERSION))
+            return 2
+        # Baselines recorded before the number of runs was stored used the
+        # default.
+        baseline_repeat = stored.get("repeat", DEFAULT_REPEAT)
+        if args.repeat < baseline_repeat:
+            print("--repeat {} is lower than the {} runs the baseline was "
+                  "recorded with".format(args.repeat, baseline_repeat))
+            return 2
+        baseline = stored["results"]
+
+    results = {}
+    with sequence_generators.ScratchDirectory() as directory:
+        fixtures = _Fixtures(directory)
+        if args.profile:
+            for size in args.sizes:
+                for case in CASES:
+                    if args.filter in case.Key(size):
+                        Profile(case, size, fixtures, nodes)
+            return 0
+
+        print("{:<58}  {:>10}  {:>10}  {}".format(
+                            "case", "ms", "peak KiB", "vs baseline"))
+        for size in args.sizes:
+            for case in CASES:
+                key = case.Key(size)
+                if args.filter not in key:
+                    continue
+                result = results[key] = Measure(case, size, fixtures, nodes,
+                                                args.repeat)
+                status = ""
+                base = baseline.get(key)
+                if base is not None:
+                    status = "x{:.2f}".format(
+                            result["seconds"] / max(base["seconds"], 1e-9))
+                print("{:<58}  {:>10.2f}  {:>10.0f}  {}".format(
+                            key, result["seconds"] * 1000,
+                            result["peak_bytes"] / 1024, status))
+
+    output = {"version": RESULTS_VERSION, "environment": _Environment(),
+              "repeat": args.repeat, "results": results}
+    for path in (args.output, BASELINE_PATH if args.save_baseline else None):
+        if path:
+            with open(path, "w") as output_file:
+                json.dump(output, output_file, indent=2, sort_keys=True)
+                output_file.write("\n")
+
+    comparison = Compare(results, baseline, args.time_tolerance,
+                         args.memory_tolerance)
+    regressions = {key: found for key, found in comparison.items() if found}
+    if regressions:
+        print("\n{} regression(s) against {}:".format(len(regressions),
+                                                      args.baseline))
+        for key in sorted(regressions):
+            print("  {}: {}".format(key, ", ".join(regressions[key])))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
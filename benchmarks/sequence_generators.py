@@ -0,0 +1,129 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Synthetic sequences written to disk for the benchmarks.
+
+Each generator writes the frames of one or more sequences into a directory
+and returns the fileseq.FileSequence objects describing them. The frame sets
+of the returned sequences cover every frame they were generated for, even
+the frames left off disk, so that the existence checks have work to do.
+"""
+
+import os
+import random
+import tempfile
+
+import fileseq
+
+
+# Scratch directories are created here when it is available so that the
+# timings measure the nodes rather than the disk.
+TMPFS_DIR = "/dev/shm"
+
+# Number of bytes written to each frame.
+FRAME_SIZE = 256
+
+# First frame of the generated sequences.
+FIRST_FRAME = 1001
+
+
+def ScratchDirectory(prefix="iosequence-bench-"):
+    """
+    Return a tempfile.TemporaryDirectory on tmpfs if it is available, or in
+    the default temporary directory otherwise.
+    """
+    directory = None
+    if os.path.isdir(TMPFS_DIR) and os.access(TMPFS_DIR, os.W_OK):
+        directory = TMPFS_DIR
+    return tempfile.TemporaryDirectory(prefix=prefix, dir=directory)
+
+
+def _MakeSequence(directory, name, padding, frame_set):
+    sequence = fileseq.FileSequence(
+                os.path.join(directory, "{}.{}.exr".format(
+                                name, fileseq.getPaddingChars(padding))))
+    sequence.setFrameSet(frame_set)
+    return sequence
+
+
+def _WriteFrames(sequence, frames, frame_size=FRAME_SIZE):
+    data = b"\xab" * frame_size
+    for frame in frames:
+        with open(sequence.frame(frame), "wb") as frame_file:
+            frame_file.write(data)
+
+
+def Dense(directory, num_frames, name="dense"):
+    """
+    A sequence of num_frames consecutive frames, all on disk.
+    """
+    frame_set = fileseq.FrameSet("{}-{}".format(
+                                FIRST_FRAME, FIRST_FRAME + num_frames - 1))
+    sequence = _MakeSequence(directory, name, 4, frame_set)
+    _WriteFrames(sequence, frame_set)
+    return [sequence]
+
+
+def Sparse(directory, num_frames, name="sparse", density=0.3, seed=0):
+    """
+    A sequence of num_frames consecutive frames of which a random subset of
+    roughly the given density is on disk.
+    """
+    frame_set = fileseq.FrameSet("{}-{}".format(
+                                FIRST_FRAME, FIRST_FRAME + num_frames - 1))
+    sequence = _MakeSequence(directory, name, 4, frame_set)
+    rng = random.Random(seed)
+    _WriteFrames(sequence, [frame for frame in frame_set
+                            if rng.random() < density])
+    return [sequence]
+
+
+def Stepped(directory, num_frames, name="stepped", step=4):
+    """
+    A sequence of num_frames frames on every step'th frame, all on disk.
+    """
+    frame_set = fileseq.FrameSet("{}-{}x{}".format(
+                FIRST_FRAME, FIRST_FRAME + (num_frames - 1) * step, step))
+    sequence = _MakeSequence(directory, name, 4, frame_set)
+    _WriteFrames(sequence, frame_set)
+    return [sequence]
+
+
+def HugePadding(directory, num_frames, name="padded", padding=16):
+    """
+    A sequence of num_frames consecutive frames padded to the given width,
+    all on disk.
+    """
+    frame_set = fileseq.FrameSet("{}-{}".format(
+                                FIRST_FRAME, FIRST_FRAME + num_frames - 1))
+    sequence = _MakeSequence(directory, name, padding, frame_set)
+    _WriteFrames(sequence, frame_set)
+    return [sequence]
+
+
+def ManySequences(directory, num_frames, name="shot", frames_per_sequence=10):
+    """
+    num_frames frames split between sequences of frames_per_sequence
+    consecutive frames, all in the same directory.
+    """
+    frame_set = fileseq.FrameSet("{}-{}".format(
+                    FIRST_FRAME, FIRST_FRAME + frames_per_sequence - 1))
+    num_sequences = max(num_frames // frames_per_sequence, 1)
+    sequences = []
+    for index in range(num_sequences):
+        sequence = _MakeSequence(directory,
+                                 "{}_{:05d}".format(name, index), 4,
+                                 frame_set)
+        _WriteFrames(sequence, frame_set)
+        sequences.append(sequence)
+    return sequences
+
+
+# The generators by name. Each is called with a directory and a number of
+# frames and returns a list of sequences.
+GENERATORS = {
+    "dense": Dense,
+    "sparse": Sparse,
+    "stepped": Stepped,
+    "huge_padding": HugePadding,
+    "many_sequences": ManySequences,
+}
@@ -0,0 +1,50 @@
+# Copyright 2023 Fabrica Software, LLC
+
+import iograft
+import iobasictypes
+import iosequencealgebra
+import iosequenceinstrument
+import iosequencetypes
+
+
+class ClampFrameSet(iograft.Node):
+    """
+    Keep only the frames of a fileseq.FrameSet between start_frame and
+    end_frame (inclusive).
+    """
+    frame_set = iograft.InputDefinition("frame_set",
+                                        iosequencetypes.FrameSet())
+    start_frame = iograft.InputDefinition("start_frame", iobasictypes.Int())
+    end_frame = iograft.InputDefinition("end_frame", iobasictypes.Int())
+
+    out_frame_set = iograft.OutputDefinition("frame_set",
+                                             iosequencetypes.FrameSet())
+
+    @classmethod
+    def GetDefinition(cls):
+        node = iograft.NodeDefinition("clamp_frame_set", "fileseq")
+        node.SetMenuPath("File Sequence")
+        node.AddInput(cls.frame_set)
+        node.AddInput(cls.start_frame)
+        node.AddInput(cls.end_frame)
+        node.AddOutput(cls.out_frame_set)
+        return node
+
+    @staticmethod
+    def Create():
+        return ClampFrameSet()
+
+    @iosequenceinstrument.Instrumented("clamp_frame_set")
+    def Process(self, data):
+        frame_set = iograft.GetInput(self.frame_set, data)
+        start_frame = iograft.GetInput(self.start_frame, data)
+        end_frame = iograft.GetInput(self.end_frame, data)
+
+        out_frame_set = iosequencealgebra.Clamp(frame_set, start_frame,
+                                                end_frame)
+        iograft.SetOutput(self.out_frame_set, data, out_frame_set)
+
+
+def LoadPlugin(plugin):
+    node = ClampFrameSet.GetDefinition()
+    plugin.RegisterNode(node, ClampFrameSet.Create)
@@ -0,0 +1,86 @@
+# Copyright 2023 Fabrica Software, LLC
+
+import iograft
+import iobasictypes
+import iosequencedisk
+import iosequenceinstrument
+import iosequencetypes
+
+import fileseq
+
+
+class CollectFrameMetadata(iograft.Node):
+    """
+    Given a fileseq.FileSequence, gather the file size and modification time
+    of every frame that exists on disk in a single scan of the sequence's
+    directory. The metadata is output as parallel lists ordered by frame.
+
+    Also outputs the frames whose files are empty, the frames whose size
+    differs from the median size by more than outlier_threshold (as a
+    fraction of the median) and, if a reference_time (in seconds since the
+    epoch) is given, the frames last modified before that time.
+    """
+    sequence = iograft.InputDefinition("sequence",
+                                       iosequencetypes.FileSequence())
+    outlier_threshold = iograft.InputDefinition("outlier_threshold",
+                                                iobasictypes.Float(),
+                                                default_value=0.5)
+    reference_time = iograft.InputDefinition("reference_time",
+                                             iobasictypes.Float(),
+                                             default_value=0.0)
+
+    frames = iograft.OutputDefinition("frames", iobasictypes.IntList())
+    sizes = iograft.OutputDefinition("sizes", iobasictypes.IntList())
+    mtimes = iograft.OutputDefinition("mtimes", iobasictypes.FloatList())
+    zero_byte_frames = iograft.OutputDefinition("zero_byte_frames",
+                                                iosequencetypes.FrameSet())
+    outlier_frames = iograft.OutputDefinition("outlier_frames",
+                                              iosequencetypes.FrameSet())
+    stale_frames = iograft.OutputDefinition("stale_frames",
+                                            iosequencetypes.FrameSet())
+
+    @classmethod
+    def GetDefinition(cls):
+        node = iograft.NodeDefinition("collect_frame_metadata", "fileseq")
+        node.SetMenuPath("File Sequence")
+        node.AddInput(cls.sequence)
+        node.AddInput(cls.outlier_threshold)
+        node.AddInput(cls.reference_time)
+        node.AddOutput(cls.frames)
+        node.AddOutput(cls.sizes)
+        node.AddOutput(cls.mtimes)
+        node.AddOutput(cls.zero_byte_frames)
+        node.AddOutput(cls.outlier_frames)
+        node.AddOutput(cls.stale_frames)
+        return node
+
+    @staticmethod
+    def Create():
+        return CollectFrameMetadata()
+
+    @iosequenceinstrument.Instrumented("collect_frame_metadata")
+    def Process(self, data):
+        sequence = iograft.GetInput(self.sequence, data)
+        outlier_threshold = iograft.GetInput(self.outlier_threshold, data)
+        reference_time = iograft.GetInput(self.reference_time, data)
+
+        metadata = iosequencedisk.CollectFrameMetadata(sequence)
+
+        # Frames can only be stale relative to a given reference time.
+        stale_frames = fileseq.FrameSet("")
+        if reference_time > 0:
+            stale_frames = metadata.FramesOlderThan(reference_time)
+
+        iograft.SetOutput(self.frames, data, metadata.frames.tolist())
+        iograft.SetOutput(self.sizes, data, metadata.sizes.tolist())
+        iograft.SetOutput(self.mtimes, data, metadata.mtimes.tolist())
+        iograft.SetOutput(self.zero_byte_frames, data,
+                          metadata.ZeroByteFrames())
+        iograft.SetOutput(self.outlier_frames, data,
+                          metadata.OutlierFrames(outlier_threshold))
+        iograft.SetOutput(self.stale_frames, data, stale_frames)
+
+
+def LoadPlugin(plugin):
+    node = CollectFrameMetadata.GetDefinition()
+    plugin.RegisterNode(node, CollectFrameMetadata.Create)
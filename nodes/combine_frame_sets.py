@@ -0,0 +1,55 @@
+# Copyright 2023 Fabrica Software, LLC
+
+import iograft
+import iobasictypes
+import iosequencealgebra
+import iosequenceinstrument
+import iosequencetypes
+
+
+class CombineFrameSets(iograft.Node):
+    """
+    Combine two fileseq.FrameSet objects with a set operation: "union",
+    "intersection", "difference" (the frames of frame_set_a that are not in
+    frame_set_b) or "symmetric_difference". The operation is computed on the
+    ranges of the frame sets without expanding their frames, and the output
+    frames are in ascending order.
+    """
+    frame_set_a = iograft.InputDefinition("frame_set_a",
+                                          iosequencetypes.FrameSet())
+    frame_set_b = iograft.InputDefinition("frame_set_b",
+                                          iosequencetypes.FrameSet())
+    operation = iograft.InputDefinition("operation", iobasictypes.String(),
+                                        default_value=iosequencealgebra.UNION)
+
+    frame_set = iograft.OutputDefinition("frame_set",
+                                         iosequencetypes.FrameSet())
+
+    @classmethod
+    def GetDefinition(cls):
+        node = iograft.NodeDefinition("combine_frame_sets", "fileseq")
+        node.SetMenuPath("File Sequence")
+        node.AddInput(cls.frame_set_a)
+        node.AddInput(cls.frame_set_b)
+        node.AddInput(cls.operation)
+        node.AddOutput(cls.frame_set)
+        return node
+
+    @staticmethod
+    def Create():
+        return CombineFrameSets()
+
+    @iosequenceinstrument.Instrumented("combine_frame_sets")
+    def Process(self, data):
+        frame_set_a = iograft.GetInput(self.frame_set_a, data)
+        frame_set_b = iograft.GetInput(self.frame_set_b, data)
+        operation = iograft.GetInput(self.operation, data)
+
+        frame_set = iosequencealgebra.Combine(frame_set_a, frame_set_b,
+                                              operation)
+        iograft.SetOutput(self.frame_set, data, frame_set)
+
+
+def LoadPlugin(plugin):
+    node = CombineFrameSets.GetDefinition()
+    plugin.RegisterNode(node, CombineFrameSets.Create)
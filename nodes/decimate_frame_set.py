@@ -0,0 +1,47 @@
+# Copyright 2023 Fabrica Software, LLC
+
+import iograft
+import iobasictypes
+import iosequencealgebra
+import iosequenceinstrument
+import iosequencetypes
+
+
+class DecimateFrameSet(iograft.Node):
+    """
+    Keep every step'th frame of a fileseq.FrameSet, starting with its first
+    frame (i.e. a step of 2 keeps every other frame).
+    """
+    frame_set = iograft.InputDefinition("frame_set",
+                                        iosequencetypes.FrameSet())
+    step = iograft.InputDefinition("step", iobasictypes.Int(),
+                                   default_value=2)
+
+    out_frame_set = iograft.OutputDefinition("frame_set",
+                                             iosequencetypes.FrameSet())
+
+    @classmethod
+    def GetDefinition(cls):
+        node = iograft.NodeDefinition("decimate_frame_set", "fileseq")
+        node.SetMenuPath("File Sequence")
+        node.AddInput(cls.frame_set)
+        node.AddInput(cls.step)
+        node.AddOutput(cls.out_frame_set)
+        return node
+
+    @staticmethod
+    def Create():
+        return DecimateFrameSet()
+
+    @iosequenceinstrument.Instrumented("decimate_frame_set")
+    def Process(self, data):
+        frame_set = iograft.GetInput(self.frame_set, data)
+        step = iograft.GetInput(self.step, data)
+
+        out_frame_set = iosequencealgebra.Decimate(frame_set, step)
+        iograft.SetOutput(self.out_frame_set, data, out_frame_set)
+
+
+def LoadPlugin(plugin):
+    node = DecimateFrameSet.GetDefinition()
+    plugin.RegisterNode(node, DecimateFrameSet.Create)
@@ -4,6 +4,7 @@ import iograft
 import fileseq
 
 import iobasictypes
+import iosequenceinstrument
 import iosequencetypes
 
 
@@ -32,6 +33,7 @@ class DefineFileSequence(iograft.Node):
     def Create():
         return DefineFileSequence()
 
+    @iosequenceinstrument.Instrumented("define_file_sequence")
     def Process(self, data):
         file_pattern = iograft.GetInput(self.file_pattern, data)
         frame_set = iograft.GetInput(self.frame_set, data)
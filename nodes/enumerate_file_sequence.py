@@ -2,40 +2,67 @@
 
 import iograft
 import iobasictypes
+import iosequenceinstrument
+import iosequenceranges
 import iosequencetypes
 
 
 class EnumerateFileSequence(iograft.Node):
     """
     Convert a FileSequence object into a list of paths.
+
+    If a batch size is given, only the paths in the batch at the given index
+    are output so that very long sequences can be processed a batch at a
+    time.
     """
     sequence = iograft.InputDefinition("sequence",
                                        iosequencetypes.FileSequence())
+    batch_size = iograft.InputDefinition("batch_size", iobasictypes.Int(),
+                                         default_value=0)
+    batch_index = iograft.InputDefinition("batch_index", iobasictypes.Int(),
+                                          default_value=0)
     files = iograft.OutputDefinition("files", iobasictypes.PathList())
+    batch_count = iograft.OutputDefinition("batch_count", iobasictypes.Int())
 
     @classmethod
     def GetDefinition(cls):
         node = iograft.NodeDefinition("enumerate_file_sequence", "fileseq")
         node.SetMenuPath("File Sequence")
         node.AddInput(cls.sequence)
+        node.AddInput(cls.batch_size)
+        node.AddInput(cls.batch_index)
         node.AddOutput(cls.files)
+        node.AddOutput(cls.batch_count)
         return node
 
     @staticmethod
     def Create():
         return EnumerateFileSequence()
 
+    @iosequenceinstrument.Instrumented("enumerate_file_sequence")
     def Process(self, data):
         sequence = iograft.GetInput(self.sequence, data)
+        batch_size = iograft.GetInput(self.batch_size, data)
+        batch_index = iograft.GetInput(self.batch_index, data)
+        frame_set = sequence.frameSet()
 
         # Use the fileseq.FileSequence type's default path expansion unless
         # the sequence has an empty frame set in which case we return an empty
         # list.
         files = []
-        if not sequence.frameSet().is_null:
-            files = list(sequence)
+        batch_count = 0
+        if frame_set is not None and not frame_set.is_null:
+            if batch_size > 0:
+                # Only format the paths in the requested batch.
+                paths = iosequenceranges.SequencePaths(sequence)
+                files = paths.Batch(batch_index, batch_size)
+                batch_count = paths.BatchCount(batch_size)
+            else:
+                files = list(sequence)
+                batch_count = 1
 
         iograft.SetOutput(self.files, data, files)
+        iograft.SetOutput(self.batch_count, data, batch_count)
 
 
 def LoadPlugin(plugin):
@@ -2,16 +2,21 @@
 
 import iograft
 import iobasictypes
+import iosequenceinstrument
+import iosequenceranges
 import iosequencetypes
 
 
 class EnumerateFrameSet(iograft.Node):
     """
     Given a fileseq.FrameSet object, enumerate a list of the frames in the
-    set.
+    set. The frames are also output as range-compressed FrameRanges which
+    can be counted and sliced without expanding the frames.
     """
     frame_set = iograft.InputDefinition("frame_set", iosequencetypes.FrameSet())
     frames = iograft.OutputDefinition("frames", iobasictypes.IntList())
+    frame_ranges = iograft.OutputDefinition("frame_ranges",
+                                            iosequencetypes.FrameRanges())
 
     @classmethod
     def GetDefinition(cls):
@@ -19,12 +24,14 @@ class EnumerateFrameSet(iograft.Node):
         node.SetMenuPath("File Sequence")
         node.AddInput(cls.frame_set)
         node.AddOutput(cls.frames)
+        node.AddOutput(cls.frame_ranges)
         return node
 
     @staticmethod
     def Create():
         return EnumerateFrameSet()
 
+    @iosequenceinstrument.Instrumented("enumerate_frame_set")
     def Process(self, data):
         frame_set = iograft.GetInput(self.frame_set, data)
 
@@ -32,6 +39,10 @@ class EnumerateFrameSet(iograft.Node):
         frames = list(frame_set)
         iograft.SetOutput(self.frames, data, frames)
 
+        # Generate the compact ranges directly from the frame set.
+        frame_ranges = iosequenceranges.FrameRanges.FromFrameSet(frame_set)
+        iograft.SetOutput(self.frame_ranges, data, frame_ranges)
+
 
 def LoadPlugin(plugin):
     node = EnumerateFrameSet.GetDefinition()
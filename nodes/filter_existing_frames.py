@@ -1,9 +1,9 @@
 # Copyright 2023 Fabrica Software, LLC
 
-import fileseq
-import os
-
 import iograft
+import iobasictypes
+import iosequencedisk
+import iosequenceinstrument
 import iosequencetypes
 
 
@@ -14,6 +14,8 @@ class FilterExistingFrames(iograft.Node):
     """
     sequence = iograft.InputDefinition("sequence",
                                        iosequencetypes.FileSequence())
+    max_workers = iograft.InputDefinition("max_workers", iobasictypes.Int(),
+                                          default_value=0)
     existing_sequence = iograft.OutputDefinition("existing_sequence",
                                                 iosequencetypes.FileSequence())
 
@@ -22,6 +24,7 @@ class FilterExistingFrames(iograft.Node):
         node = iograft.NodeDefinition("filter_existing_frames", "fileseq")
         node.SetMenuPath("File Sequence")
         node.AddInput(cls.sequence)
+        node.AddInput(cls.max_workers)
         node.AddOutput(cls.existing_sequence)
         return node
 
@@ -29,19 +32,17 @@ class FilterExistingFrames(iograft.Node):
     def Create():
         return FilterExistingFrames()
 
+    @iosequenceinstrument.Instrumented("filter_existing_frames")
     def Process(self, data):
         sequence = iograft.GetInput(self.sequence, data)
-        frame_set = sequence.frameSet()
+        max_workers = iograft.GetInput(self.max_workers, data)
 
         # Filter the frames of the sequence to ONLY the frames that actually
         # exist on disk.
-        existing_frames = set()
-        for index, path in enumerate(sequence):
-            if os.path.exists(path):
-                existing_frames.add(frame_set[index])
+        existing_frame_set, _ = iosequencedisk.SplitExistingFrames(
+                                    sequence, max_workers=max_workers)
 
-        # Create a new FrameSet and a new FileSequence
-        existing_frame_set = fileseq.FrameSet(existing_frames)
+        # Create a new FileSequence with the filtered frames.
         existing_sequence = sequence.copy()
         existing_sequence.setFrameSet(existing_frame_set)
         iograft.SetOutput(self.existing_sequence, data, existing_sequence)
@@ -1,9 +1,9 @@
 # Copyright 2023 Fabrica Software, LLC
 
-import fileseq
-import os
-
 import iograft
+import iobasictypes
+import iosequencedisk
+import iosequenceinstrument
 import iosequencetypes
 
 
@@ -14,6 +14,8 @@ class FilterMissingFrames(iograft.Node):
     """
     sequence = iograft.InputDefinition("sequence",
                                        iosequencetypes.FileSequence())
+    max_workers = iograft.InputDefinition("max_workers", iobasictypes.Int(),
+                                          default_value=0)
     missing_sequence = iograft.OutputDefinition("missing_sequence",
                                                 iosequencetypes.FileSequence())
 
@@ -22,6 +24,7 @@ class FilterMissingFrames(iograft.Node):
         node = iograft.NodeDefinition("filter_missing_frames", "fileseq")
         node.SetMenuPath("File Sequence")
         node.AddInput(cls.sequence)
+        node.AddInput(cls.max_workers)
         node.AddOutput(cls.missing_sequence)
         return node
 
@@ -29,19 +32,17 @@ class FilterMissingFrames(iograft.Node):
     def Create():
         return FilterMissingFrames()
 
+    @iosequenceinstrument.Instrumented("filter_missing_frames")
     def Process(self, data):
         sequence = iograft.GetInput(self.sequence, data)
-        frame_set = sequence.frameSet()
+        max_workers = iograft.GetInput(self.max_workers, data)
 
         # Filter the frames of the sequence to ONLY the frames that are
         # missing and not currently on disk.
-        missing_frames = set()
-        for index, path in enumerate(sequence):
-            if not os.path.exists(path):
-                missing_frames.add(frame_set[index])
+        _, missing_frame_set = iosequencedisk.SplitExistingFrames(
+                                    sequence, max_workers=max_workers)
 
-        # Create a new FrameSet and a new FileSequence
-        missing_frame_set = fileseq.FrameSet(missing_frames)
+        # Create a new FileSequence with the filtered frames.
         missing_sequence = sequence.copy()
         missing_sequence.setFrameSet(missing_frame_set)
         iograft.SetOutput(self.missing_sequence, data, missing_sequence)
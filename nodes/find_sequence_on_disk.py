@@ -2,6 +2,9 @@
 
 import iograft
 import iobasictypes
+import iosequencediscovery
+import iosequenceindex
+import iosequenceinstrument
 import iosequencetypes
 
 import fileseq
@@ -32,17 +35,17 @@ class FindSequenceOnDisk(iograft.Node):
     def Create():
         return FindSequenceOnDisk()
 
+    @iosequenceinstrument.Instrumented("find_sequence_on_disk")
     def Process(self, data):
         file_pattern = iograft.GetInput(self.file_pattern, data)
         allow_no_match = iograft.GetInput(self.allow_no_match, data)
 
         # Search the disk for files that match the given pattern and return
-        # the foudn sequence.
+        # the found sequence. Lookups run on the shared discovery service so
+        # that nodes evaluated at the same time for the same pattern share a
+        # single search.
         try:
-            sequence = fileseq.findSequenceOnDisk(
-                                            file_pattern,
-                                            preserve_padding=True,
-                                            pad_style=fileseq.PAD_STYLE_HASH1)
+            sequence = iosequencediscovery.Find(file_pattern)
         except fileseq.FileSeqException as e:
             if not allow_no_match:
                 raise e
@@ -54,5 +57,8 @@ class FindSequenceOnDisk(iograft.Node):
 
 
 def LoadPlugin(plugin):
+    # Answer queries from the persistent index if one is configured.
+    iosequenceindex.EnableFromEnvironment()
+
     node = FindSequenceOnDisk.GetDefinition()
     plugin.RegisterNode(node, FindSequenceOnDisk.Create)
@@ -2,17 +2,24 @@
 
 import iograft
 import iobasictypes
+import iosequenceinstrument
+import iosequencelist
 import iosequencetypes
 
-import fileseq
-
 
 class FindSequencesInList(iograft.Node):
     """
     Given a list of paths, convert to a list of fileseq.FileSequence objects
     representing those same paths.
+
+    Paths may also be read from a manifest file listing one path per line
+    (optionally gzip compressed). The manifest is streamed so only the
+    sequences found, rather than every path, are held in memory.
     """
-    files = iograft.InputDefinition("files", iobasictypes.PathList())
+    files = iograft.InputDefinition("files", iobasictypes.PathList(),
+                                    default_value=[])
+    manifest = iograft.InputDefinition("manifest", iobasictypes.Path(),
+                                       default_value="")
     include_empty = iograft.InputDefinition("include_empty",
                                             iobasictypes.Bool(),
                                             default_value=False)
@@ -26,6 +33,7 @@ class FindSequencesInList(iograft.Node):
         node = iograft.NodeDefinition("find_sequences_in_list", "fileseq")
         node.SetMenuPath("File Sequence")
         node.AddInput(cls.files)
+        node.AddInput(cls.manifest)
         node.AddInput(cls.include_empty)
         node.AddOutput(cls.sequences)
         return node
@@ -34,13 +42,21 @@ class FindSequencesInList(iograft.Node):
     def Create():
         return FindSequencesInList()
 
+    @iosequenceinstrument.Instrumented("find_sequences_in_list")
     def Process(self, data):
         files = iograft.GetInput(self.files, data)
+        manifest = iograft.GetInput(self.manifest, data)
         include_empty = iograft.GetInput(self.include_empty, data)
 
-        # Extract the sequences from the list of paths.
-        sequences = fileseq.findSequencesInList(files,
-                                                pad_style=fileseq.PAD_STYLE_HASH1)
+        # Extract the sequences from the list of paths, streaming in the
+        # paths of the manifest if one is given.
+        if manifest:
+            accumulator = iosequencelist.SequenceAccumulator()
+            accumulator.AddPaths(files)
+            accumulator.AddPaths(iosequencelist.ReadManifest(manifest))
+            sequences = accumulator.Finalize()
+        else:
+            sequences = iosequencelist.FindSequencesInList(files)
 
         if not include_empty:
             sequences = [s for s in sequences if s.frameSet() is not None]
@@ -2,10 +2,11 @@
 
 import iograft
 import iobasictypes
+import iosequencedisk
+import iosequenceindex
+import iosequenceinstrument
 import iosequencetypes
 
-import fileseq
-
 
 class FindSequencesOnDisk(iograft.Node):
     """
@@ -29,15 +30,20 @@ class FindSequencesOnDisk(iograft.Node):
     def Create():
         return FindSequencesOnDisk()
 
+    @iosequenceinstrument.Instrumented("find_sequences_on_disk")
     def Process(self, data):
         file_pattern = iograft.GetInput(self.file_pattern, data)
 
         # Search for sequences on disk that match the file pattern.
-        sequences = fileseq.findSequencesOnDisk(file_pattern,
-                                                pad_style=fileseq.PAD_STYLE_HASH1)
+        # The directory listing is shared with other nodes through the
+        # directory cache.
+        sequences = iosequencedisk.FindSequencesOnDiskBatch([file_pattern])[0]
         iograft.SetOutput(self.sequences, data, sequences)
 
 
 def LoadPlugin(plugin):
+    # Answer queries from the persistent index if one is configured.
+    iosequenceindex.EnableFromEnvironment()
+
     node = FindSequencesOnDisk.GetDefinition()
     plugin.RegisterNode(node, FindSequencesOnDisk.Create)
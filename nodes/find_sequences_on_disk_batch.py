@@ -0,0 +1,64 @@
+# Copyright 2023 Fabrica Software, LLC
+
+import iograft
+import iobasictypes
+import iosequencedisk
+import iosequenceindex
+import iosequenceinstrument
+import iosequencetypes
+
+
+class FindSequencesOnDiskBatch(iograft.Node):
+    """
+    Given a list of file patterns representing sequences to search for on
+    disk, return the FileSequences found on disk for every pattern. Each
+    directory is only listed once no matter how many patterns refer to it.
+
+    The sequences for all patterns are output in a single list in the order
+    of the patterns, along with the number of sequences found for each
+    pattern.
+    """
+    file_patterns = iograft.InputDefinition("file_patterns",
+                                            iobasictypes.PathList())
+
+    sequences = iograft.OutputDefinition("sequences",
+                                         iosequencetypes.FileSequenceList())
+    counts = iograft.OutputDefinition("counts", iobasictypes.IntList())
+
+    @classmethod
+    def GetDefinition(cls):
+        node = iograft.NodeDefinition("find_sequences_on_disk_batch",
+                                      "fileseq")
+        node.SetMenuPath("File Sequence")
+        node.AddInput(cls.file_patterns)
+        node.AddOutput(cls.sequences)
+        node.AddOutput(cls.counts)
+        return node
+
+    @staticmethod
+    def Create():
+        return FindSequencesOnDiskBatch()
+
+    @iosequenceinstrument.Instrumented("find_sequences_on_disk_batch")
+    def Process(self, data):
+        file_patterns = iograft.GetInput(self.file_patterns, data)
+
+        # Search for sequences on disk that match each of the file patterns.
+        results = iosequencedisk.FindSequencesOnDiskBatch(file_patterns)
+
+        sequences = []
+        counts = []
+        for pattern_sequences in results:
+            sequences.extend(pattern_sequences)
+            counts.append(len(pattern_sequences))
+
+        iograft.SetOutput(self.sequences, data, sequences)
+        iograft.SetOutput(self.counts, data, counts)
+
+
+def LoadPlugin(plugin):
+    # Answer queries from the persistent index if one is configured.
+    iosequenceindex.EnableFromEnvironment()
+
+    node = FindSequencesOnDiskBatch.GetDefinition()
+    plugin.RegisterNode(node, FindSequencesOnDiskBatch.Create)
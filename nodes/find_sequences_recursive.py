@@ -0,0 +1,71 @@
+# Copyright 2023 Fabrica Software, LLC
+
+import iograft
+import iobasictypes
+import iosequencedisk
+import iosequenceinstrument
+import iosequencetypes
+
+
+class FindSequencesRecursive(iograft.Node):
+    """
+    Given a root directory, return a list of the FileSequences found in that
+    directory and in all of the directories beneath it.
+    """
+    root = iograft.InputDefinition("root", iobasictypes.Path())
+    max_depth = iograft.InputDefinition("max_depth", iobasictypes.Int(),
+                                        default_value=-1)
+    include = iograft.InputDefinition("include", iobasictypes.StringList(),
+                                      default_value=[])
+    exclude = iograft.InputDefinition("exclude", iobasictypes.StringList(),
+                                      default_value=[])
+    max_workers = iograft.InputDefinition(
+                                    "max_workers", iobasictypes.Int(),
+                                    default_value=iosequencedisk.WALK_WORKERS)
+
+    sequences = iograft.OutputDefinition("sequences",
+                                         iosequencetypes.FileSequenceList())
+
+    @classmethod
+    def GetDefinition(cls):
+        node = iograft.NodeDefinition("find_sequences_recursive", "fileseq")
+        node.SetMenuPath("File Sequence")
+        node.AddInput(cls.root)
+        node.AddInput(cls.max_depth)
+        node.AddInput(cls.include)
+        node.AddInput(cls.exclude)
+        node.AddInput(cls.max_workers)
+        node.AddOutput(cls.sequences)
+        return node
+
+    @staticmethod
+    def Create():
+        return FindSequencesRecursive()
+
+    @iosequenceinstrument.Instrumented("find_sequences_recursive")
+    def Process(self, data):
+        root = iograft.GetInput(self.root, data)
+        max_depth = iograft.GetInput(self.max_depth, data)
+        include = iograft.GetInput(self.include, data)
+        exclude = iograft.GetInput(self.exclude, data)
+        max_workers = iograft.GetInput(self.max_workers, data)
+
+        # Walk the tree collecting the sequences for each directory. The
+        # directories complete in any order so sort them by path to keep the
+        # output stable.
+        results = sorted(iosequencedisk.WalkSequences(root,
+                                                      max_depth=max_depth,
+                                                      include=include,
+                                                      exclude=exclude,
+                                                      max_workers=max_workers),
+                         key=lambda result: result[0])
+
+        sequences = []
+        for _, dir_sequences in results:
+            sequences.extend(dir_sequences)
+        iograft.SetOutput(self.sequences, data, sequences)
+
+
+def LoadPlugin(plugin):
+    node = FindSequencesRecursive.GetDefinition()
+    plugin.RegisterNode(node, FindSequencesRecursive.Create)
@@ -2,6 +2,7 @@
 
 import iograft
 import iobasictypes
+import iosequenceinstrument
 import iosequencetypes
 
 
@@ -29,6 +30,7 @@ class GetFilePattern(iograft.Node):
     def Create():
         return GetFilePattern()
 
+    @iosequenceinstrument.Instrumented("get_file_pattern")
     def Process(self, data):
         sequence = iograft.GetInput(self.sequence, data)
         format_str = iograft.GetInput(self.format_str, data)
@@ -1,6 +1,7 @@
 # Copyright 2023 Fabrica Software, LLC
 
 import iograft
+import iosequenceinstrument
 import iosequencetypes
 
 
@@ -26,6 +27,7 @@ class GetFrameSet(iograft.Node):
     def Create():
         return GetFrameSet()
 
+    @iosequenceinstrument.Instrumented("get_frame_set")
     def Process(self, data):
         sequence = iograft.GetInput(self.sequence, data)
         frame_set = sequence.frameSet()
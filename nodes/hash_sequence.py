@@ -0,0 +1,99 @@
+# Copyright 2023 Fabrica Software, LLC
+
+import iograft
+import iobasictypes
+import iosequencehash
+import iosequenceinstrument
+import iosequencetypes
+
+
+class HashSequence(iograft.Node):
+    """
+    Compute a content digest of every frame of a fileseq.FileSequence and a
+    digest of the whole sequence that does not depend on the order of the
+    frames. Frames are hashed across a pool of max_workers threads.
+
+    If use_cache is set, digests are kept in a persistent cache (at
+    cache_path, or the default location if it is empty) keyed on each
+    frame's path, size and modification time, and unchanged frames are
+    not read again. Frames modified within the last couple of seconds are
+    always read.
+
+    Frames that do not exist are output as missing_frames; frames that
+    could not be read are reported in failed_frames and errors rather than
+    failing the node.
+    """
+    sequence = iograft.InputDefinition("sequence",
+                                       iosequencetypes.FileSequence())
+    algorithm = iograft.InputDefinition(
+                            "algorithm", iobasictypes.String(),
+                            default_value=iosequencehash.DEFAULT_ALGORITHM)
+    max_workers = iograft.InputDefinition(
+                            "max_workers", iobasictypes.Int(),
+                            default_value=iosequencehash.HASH_WORKERS)
+    use_cache = iograft.InputDefinition("use_cache", iobasictypes.Bool(),
+                                        default_value=True)
+    cache_path = iograft.InputDefinition("cache_path", iobasictypes.String(),
+                                         default_value="")
+
+    frames = iograft.OutputDefinition("frames", iobasictypes.IntList())
+    digests = iograft.OutputDefinition("digests", iobasictypes.StringList())
+    sequence_digest = iograft.OutputDefinition("sequence_digest",
+                                               iobasictypes.String())
+    missing_frames = iograft.OutputDefinition("missing_frames",
+                                              iosequencetypes.FrameSet())
+    failed_frames = iograft.OutputDefinition("failed_frames",
+                                             iosequencetypes.FrameSet())
+    errors = iograft.OutputDefinition("errors", iobasictypes.StringList())
+
+    @classmethod
+    def GetDefinition(cls):
+        node = iograft.NodeDefinition("hash_sequence", "fileseq")
+        node.SetMenuPath("File Sequence")
+        node.AddInput(cls.sequence)
+        node.AddInput(cls.algorithm)
+        node.AddInput(cls.max_workers)
+        node.AddInput(cls.use_cache)
+        node.AddInput(cls.cache_path)
+        node.AddOutput(cls.frames)
+        node.AddOutput(cls.digests)
+        node.AddOutput(cls.sequence_digest)
+        node.AddOutput(cls.missing_frames)
+        node.AddOutput(cls.failed_frames)
+        node.AddOutput(cls.errors)
+        return node
+
+    @staticmethod
+    def Create():
+        return HashSequence()
+
+    @iosequenceinstrument.Instrumented("hash_sequence")
+    def Process(self, data):
+        sequence = iograft.GetInput(self.sequence, data)
+        algorithm = iograft.GetInput(self.algorithm, data)
+        max_workers = iograft.GetInput(self.max_workers, data)
+        use_cache = iograft.GetInput(self.use_cache, data)
+        cache_path = iograft.GetInput(self.cache_path, data)
+
+        cache = None
+        if use_cache:
+            cache = iosequencehash.GetCache(cache_path or None)
+
+        result = iosequencehash.HashSequence(sequence,
+                                             algorithm=algorithm,
+                                             max_workers=max_workers,
+                                             cache=cache)
+
+        iograft.SetOutput(self.frames, data, result.frames)
+        iograft.SetOutput(self.digests, data, result.digests)
+        iograft.SetOutput(self.sequence_digest, data, result.sequence_digest)
+        iograft.SetOutput(self.missing_frames, data, result.missing)
+        iograft.SetOutput(self.failed_frames, data, result.failed)
+        iograft.SetOutput(self.errors, data,
+                          ["{}: {}".format(frame, message)
+                           for frame, message in result.errors])
+
+
+def LoadPlugin(plugin):
+    node = HashSequence.GetDefinition()
+    plugin.RegisterNode(node, HashSequence.Create)
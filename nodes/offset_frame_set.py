@@ -0,0 +1,46 @@
+# Copyright 2023 Fabrica Software, LLC
+
+import iograft
+import iobasictypes
+import iosequencealgebra
+import iosequenceinstrument
+import iosequencetypes
+
+
+class OffsetFrameSet(iograft.Node):
+    """
+    Add an offset to every frame of a fileseq.FrameSet.
+    """
+    frame_set = iograft.InputDefinition("frame_set",
+                                        iosequencetypes.FrameSet())
+    offset = iograft.InputDefinition("offset", iobasictypes.Int(),
+                                     default_value=0)
+
+    out_frame_set = iograft.OutputDefinition("frame_set",
+                                             iosequencetypes.FrameSet())
+
+    @classmethod
+    def GetDefinition(cls):
+        node = iograft.NodeDefinition("offset_frame_set", "fileseq")
+        node.SetMenuPath("File Sequence")
+        node.AddInput(cls.frame_set)
+        node.AddInput(cls.offset)
+        node.AddOutput(cls.out_frame_set)
+        return node
+
+    @staticmethod
+    def Create():
+        return OffsetFrameSet()
+
+    @iosequenceinstrument.Instrumented("offset_frame_set")
+    def Process(self, data):
+        frame_set = iograft.GetInput(self.frame_set, data)
+        offset = iograft.GetInput(self.offset, data)
+
+        out_frame_set = iosequencealgebra.Offset(frame_set, offset)
+        iograft.SetOutput(self.out_frame_set, data, out_frame_set)
+
+
+def LoadPlugin(plugin):
+    node = OffsetFrameSet.GetDefinition()
+    plugin.RegisterNode(node, OffsetFrameSet.Create)
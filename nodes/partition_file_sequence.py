@@ -0,0 +1,73 @@
+# Copyright 2023 Fabrica Software, LLC
+
+import iograft
+import iobasictypes
+import iosequencealgebra
+import iosequenceinstrument
+import iosequencetypes
+
+
+class PartitionFileSequence(iograft.Node):
+    """
+    Partition the frames of a fileseq.FileSequence into chunks of chunk_size
+    consecutive frames (or, if chunk_size is zero, into chunk_count chunks
+    of near equal size) and output a copy of the sequence for each chunk.
+    The chunks are computed from the ranges of the sequence's frame set
+    without expanding its frames.
+
+    The order of the chunks is one of "sequential", "reverse" or
+    "first_last_middle", which outputs the first, last and middle frames
+    as chunks of their own ahead of the remaining frames for early
+    feedback.
+    """
+    sequence = iograft.InputDefinition("sequence",
+                                       iosequencetypes.FileSequence())
+    chunk_size = iograft.InputDefinition("chunk_size", iobasictypes.Int(),
+                                         default_value=10)
+    chunk_count = iograft.InputDefinition("chunk_count", iobasictypes.Int(),
+                                          default_value=0)
+    order = iograft.InputDefinition("order", iobasictypes.String(),
+                                    default_value=iosequencealgebra.SEQUENTIAL)
+
+    sequences = iograft.OutputDefinition("sequences",
+                                         iosequencetypes.FileSequenceList())
+
+    @classmethod
+    def GetDefinition(cls):
+        node = iograft.NodeDefinition("partition_file_sequence", "fileseq")
+        node.SetMenuPath("File Sequence")
+        node.AddInput(cls.sequence)
+        node.AddInput(cls.chunk_size)
+        node.AddInput(cls.chunk_count)
+        node.AddInput(cls.order)
+        node.AddOutput(cls.sequences)
+        return node
+
+    @staticmethod
+    def Create():
+        return PartitionFileSequence()
+
+    @iosequenceinstrument.Instrumented("partition_file_sequence")
+    def Process(self, data):
+        sequence = iograft.GetInput(self.sequence, data)
+        chunk_size = iograft.GetInput(self.chunk_size, data)
+        chunk_count = iograft.GetInput(self.chunk_count, data)
+        order = iograft.GetInput(self.order, data)
+
+        frame_sets = iosequencealgebra.Partition(sequence.frameSet(),
+                                                 chunk_size=chunk_size,
+                                                 chunk_count=chunk_count,
+                                                 order=order)
+
+        # Output a copy of the sequence for each chunk of frames.
+        sequences = []
+        for frame_set in frame_sets:
+            chunk_sequence = sequence.copy()
+            chunk_sequence.setFrameSet(frame_set)
+            sequences.append(chunk_sequence)
+        iograft.SetOutput(self.sequences, data, sequences)
+
+
+def LoadPlugin(plugin):
+    node = PartitionFileSequence.GetDefinition()
+    plugin.RegisterNode(node, PartitionFileSequence.Create)
@@ -0,0 +1,66 @@
+# Copyright 2023 Fabrica Software, LLC
+
+import iograft
+import iobasictypes
+import iosequencealgebra
+import iosequenceinstrument
+import iosequencetypes
+
+
+class PartitionFrameSet(iograft.Node):
+    """
+    Partition a fileseq.FrameSet into chunks of chunk_size consecutive
+    frames (or, if chunk_size is zero, into chunk_count chunks of near equal
+    size), for example to distribute the frames between farm tasks. The
+    chunks are computed from the ranges of the frame set without expanding
+    its frames.
+
+    The order of the chunks is one of "sequential", "reverse" or
+    "first_last_middle", which outputs the first, last and middle frames
+    as chunks of their own ahead of the remaining frames for early
+    feedback.
+    """
+    frame_set = iograft.InputDefinition("frame_set",
+                                        iosequencetypes.FrameSet())
+    chunk_size = iograft.InputDefinition("chunk_size", iobasictypes.Int(),
+                                         default_value=10)
+    chunk_count = iograft.InputDefinition("chunk_count", iobasictypes.Int(),
+                                          default_value=0)
+    order = iograft.InputDefinition("order", iobasictypes.String(),
+                                    default_value=iosequencealgebra.SEQUENTIAL)
+
+    frame_sets = iograft.OutputDefinition("frame_sets",
+                                          iosequencetypes.FrameSetList())
+
+    @classmethod
+    def GetDefinition(cls):
+        node = iograft.NodeDefinition("partition_frame_set", "fileseq")
+        node.SetMenuPath("File Sequence")
+        node.AddInput(cls.frame_set)
+        node.AddInput(cls.chunk_size)
+        node.AddInput(cls.chunk_count)
+        node.AddInput(cls.order)
+        node.AddOutput(cls.frame_sets)
+        return node
+
+    @staticmethod
+    def Create():
+        return PartitionFrameSet()
+
+    @iosequenceinstrument.Instrumented("partition_frame_set")
+    def Process(self, data):
+        frame_set = iograft.GetInput(self.frame_set, data)
+        chunk_size = iograft.GetInput(self.chunk_size, data)
+        chunk_count = iograft.GetInput(self.chunk_count, data)
+        order = iograft.GetInput(self.order, data)
+
+        frame_sets = iosequencealgebra.Partition(frame_set,
+                                                 chunk_size=chunk_size,
+                                                 chunk_count=chunk_count,
+                                                 order=order)
+        iograft.SetOutput(self.frame_sets, data, frame_sets)
+
+
+def LoadPlugin(plugin):
+    node = PartitionFrameSet.GetDefinition()
+    plugin.RegisterNode(node, PartitionFrameSet.Create)
@@ -1,6 +1,7 @@
 # Copyright 2023 Fabrica Software, LLC
 
 import iograft
+import iosequenceinstrument
 import iosequencetypes
 
 
@@ -31,6 +32,7 @@ class SetFrameSet(iograft.Node):
     def Create():
         return SetFrameSet()
 
+    @iosequenceinstrument.Instrumented("set_frame_set")
     def Process(self, data):
         sequence = iograft.GetInput(self.sequence, data)
         frame_set = iograft.GetInput(self.frame_set, data)
@@ -0,0 +1,69 @@
+# Copyright 2023 Fabrica Software, LLC
+
+import iograft
+import iobasictypes
+import iosequencedisk
+import iosequenceinstrument
+import iosequencetypes
+
+
+class SplitExistingFrames(iograft.Node):
+    """
+    Given a fileseq.FileSequence, generate two new FileSequences representing
+    the frames that exist on disk and the frames that are missing. The disk
+    is only checked once for both outputs.
+    """
+    sequence = iograft.InputDefinition("sequence",
+                                       iosequencetypes.FileSequence())
+    max_workers = iograft.InputDefinition("max_workers", iobasictypes.Int(),
+                                          default_value=0)
+    existing_sequence = iograft.OutputDefinition("existing_sequence",
+                                                iosequencetypes.FileSequence())
+    missing_sequence = iograft.OutputDefinition("missing_sequence",
+                                                iosequencetypes.FileSequence())
+    existing_count = iograft.OutputDefinition("existing_count",
+                                              iobasictypes.Int())
+    missing_count = iograft.OutputDefinition("missing_count",
+                                             iobasictypes.Int())
+
+    @classmethod
+    def GetDefinition(cls):
+        node = iograft.NodeDefinition("split_existing_frames", "fileseq")
+        node.SetMenuPath("File Sequence")
+        node.AddInput(cls.sequence)
+        node.AddInput(cls.max_workers)
+        node.AddOutput(cls.existing_sequence)
+        node.AddOutput(cls.missing_sequence)
+        node.AddOutput(cls.existing_count)
+        node.AddOutput(cls.missing_count)
+        return node
+
+    @staticmethod
+    def Create():
+        return SplitExistingFrames()
+
+    @iosequenceinstrument.Instrumented("split_existing_frames")
+    def Process(self, data):
+        sequence = iograft.GetInput(self.sequence, data)
+        max_workers = iograft.GetInput(self.max_workers, data)
+
+        # Split the frames of the sequence in a single pass over the disk.
+        existing_frame_set, missing_frame_set = \
+                iosequencedisk.SplitExistingFrames(sequence,
+                                                   max_workers=max_workers)
+
+        # Create a new FileSequence for each of the filtered frame sets.
+        existing_sequence = sequence.copy()
+        existing_sequence.setFrameSet(existing_frame_set)
+        missing_sequence = sequence.copy()
+        missing_sequence.setFrameSet(missing_frame_set)
+
+        iograft.SetOutput(self.existing_sequence, data, existing_sequence)
+        iograft.SetOutput(self.missing_sequence, data, missing_sequence)
+        iograft.SetOutput(self.existing_count, data, len(existing_frame_set))
+        iograft.SetOutput(self.missing_count, data, len(missing_frame_set))
+
+
+def LoadPlugin(plugin):
+    node = SplitExistingFrames.GetDefinition()
+    plugin.RegisterNode(node, SplitExistingFrames.Create)
@@ -0,0 +1,48 @@
+# Copyright 2023 Fabrica Software, LLC
+
+import iograft
+import iobasictypes
+import iosequencealgebra
+import iosequenceinstrument
+import iosequencetypes
+
+
+class SplitFrameSet(iograft.Node):
+    """
+    Split a fileseq.FrameSet into chunk_count frame sets of consecutive
+    frames whose sizes differ by at most one frame. Fewer frame sets are
+    output if the frame set has fewer frames than chunk_count.
+    """
+    frame_set = iograft.InputDefinition("frame_set",
+                                        iosequencetypes.FrameSet())
+    chunk_count = iograft.InputDefinition("chunk_count", iobasictypes.Int(),
+                                          default_value=2)
+
+    frame_sets = iograft.OutputDefinition("frame_sets",
+                                          iosequencetypes.FrameSetList())
+
+    @classmethod
+    def GetDefinition(cls):
+        node = iograft.NodeDefinition("split_frame_set", "fileseq")
+        node.SetMenuPath("File Sequence")
+        node.AddInput(cls.frame_set)
+        node.AddInput(cls.chunk_count)
+        node.AddOutput(cls.frame_sets)
+        return node
+
+    @staticmethod
+    def Create():
+        return SplitFrameSet()
+
+    @iosequenceinstrument.Instrumented("split_frame_set")
+    def Process(self, data):
+        frame_set = iograft.GetInput(self.frame_set, data)
+        chunk_count = iograft.GetInput(self.chunk_count, data)
+
+        frame_sets = iosequencealgebra.Split(frame_set, chunk_count)
+        iograft.SetOutput(self.frame_sets, data, frame_sets)
+
+
+def LoadPlugin(plugin):
+    node = SplitFrameSet.GetDefinition()
+    plugin.RegisterNode(node, SplitFrameSet.Create)
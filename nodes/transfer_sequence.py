@@ -0,0 +1,112 @@
+# Copyright 2023 Fabrica Software, LLC
+
+import iograft
+import iobasictypes
+import iosequencefileops
+import iosequenceinstrument
+import iosequencetypes
+
+
+class TransferSequence(iograft.Node):
+    """
+    Copy, move, symlink or hardlink the frames of a source
+    fileseq.FileSequence to the path pattern of a destination FileSequence,
+    renumbering the frames by frame_offset. Frames are transferred across a
+    pool of max_workers threads.
+
+    With dry_run set nothing is written and the frames that would be
+    transferred are reported. With skip_identical set, frames whose
+    destination is already identical (by size and modification time, or
+    for links by their target) are skipped; a move still removes the source
+    of a skipped frame. The destination must have frame padding.
+
+    Frames that fail are reported in failed_frames (as source frames) and
+    errors rather than failing the node.
+    """
+    source = iograft.InputDefinition("source",
+                                     iosequencetypes.FileSequence())
+    destination = iograft.InputDefinition("destination",
+                                          iosequencetypes.FileSequence())
+    operation = iograft.InputDefinition("operation", iobasictypes.String(),
+                                        default_value=iosequencefileops.COPY)
+    frame_offset = iograft.InputDefinition("frame_offset",
+                                           iobasictypes.Int(),
+                                           default_value=0)
+    max_workers = iograft.InputDefinition(
+                            "max_workers", iobasictypes.Int(),
+                            default_value=iosequencefileops.TRANSFER_WORKERS)
+    dry_run = iograft.InputDefinition("dry_run", iobasictypes.Bool(),
+                                      default_value=False)
+    skip_identical = iograft.InputDefinition("skip_identical",
+                                             iobasictypes.Bool(),
+                                             default_value=False)
+
+    transferred_sequence = iograft.OutputDefinition(
+                                        "transferred_sequence",
+                                        iosequencetypes.FileSequence())
+    transferred_count = iograft.OutputDefinition("transferred_count",
+                                                 iobasictypes.Int())
+    skipped_count = iograft.OutputDefinition("skipped_count",
+                                             iobasictypes.Int())
+    failed_frames = iograft.OutputDefinition("failed_frames",
+                                             iosequencetypes.FrameSet())
+    errors = iograft.OutputDefinition("errors", iobasictypes.StringList())
+
+    @classmethod
+    def GetDefinition(cls):
+        node = iograft.NodeDefinition("transfer_sequence", "fileseq")
+        node.SetMenuPath("File Sequence")
+        node.AddInput(cls.source)
+        node.AddInput(cls.destination)
+        node.AddInput(cls.operation)
+        node.AddInput(cls.frame_offset)
+        node.AddInput(cls.max_workers)
+        node.AddInput(cls.dry_run)
+        node.AddInput(cls.skip_identical)
+        node.AddOutput(cls.transferred_sequence)
+        node.AddOutput(cls.transferred_count)
+        node.AddOutput(cls.skipped_count)
+        node.AddOutput(cls.failed_frames)
+        node.AddOutput(cls.errors)
+        return node
+
+    @staticmethod
+    def Create():
+        return TransferSequence()
+
+    @iosequenceinstrument.Instrumented("transfer_sequence")
+    def Process(self, data):
+        source = iograft.GetInput(self.source, data)
+        destination = iograft.GetInput(self.destination, data)
+        operation = iograft.GetInput(self.operation, data)
+        frame_offset = iograft.GetInput(self.frame_offset, data)
+        max_workers = iograft.GetInput(self.max_workers, data)
+        dry_run = iograft.GetInput(self.dry_run, data)
+        skip_identical = iograft.GetInput(self.skip_identical, data)
+
+        result = iosequencefileops.TransferSequence(
+                                        source, destination,
+                                        operation=operation,
+                                        frame_offset=frame_offset,
+                                        max_workers=max_workers,
+                                        dry_run=dry_run,
+                                        skip_identical=skip_identical)
+
+        # The destination sequence holds every frame that is now in place.
+        transferred_sequence = destination.copy()
+        transferred_sequence.setFrameSet(result.destination_frames)
+
+        iograft.SetOutput(self.transferred_sequence, data,
+                          transferred_sequence)
+        iograft.SetOutput(self.transferred_count, data,
+                          len(result.transferred))
+        iograft.SetOutput(self.skipped_count, data, len(result.skipped))
+        iograft.SetOutput(self.failed_frames, data, result.failed)
+        iograft.SetOutput(self.errors, data,
+                          ["{}: {}".format(frame, message)
+                           for frame, message in result.errors])
+
+
+def LoadPlugin(plugin):
+    node = TransferSequence.GetDefinition()
+    plugin.RegisterNode(node, TransferSequence.Create)
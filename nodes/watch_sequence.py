@@ -0,0 +1,72 @@
+# Copyright 2023 Fabrica Software, LLC
+
+import iograft
+import iobasictypes
+import iosequenceinstrument
+import iosequencetypes
+import iosequencewatch
+
+
+class WatchSequence(iograft.Node):
+    """
+    Given a fileseq.FileSequence that is being written, output the frames
+    that have arrived on disk since the previous time the node was
+    processed for the same sequence. The first time a sequence is watched
+    all of its existing frames are output.
+
+    Only the directory entries that changed since the previous poll are
+    processed, using inotify where it is available. Set reset to start
+    watching the sequence from scratch.
+    """
+    sequence = iograft.InputDefinition("sequence",
+                                       iosequencetypes.FileSequence())
+    reset = iograft.InputDefinition("reset", iobasictypes.Bool(),
+                                    default_value=False)
+
+    new_frames = iograft.OutputDefinition("new_frames",
+                                          iosequencetypes.FrameSet())
+    new_sequence = iograft.OutputDefinition("new_sequence",
+                                            iosequencetypes.FileSequence())
+    frame_count = iograft.OutputDefinition("frame_count", iobasictypes.Int())
+    complete = iograft.OutputDefinition("complete", iobasictypes.Bool())
+
+    @classmethod
+    def GetDefinition(cls):
+        node = iograft.NodeDefinition("watch_sequence", "fileseq")
+        node.SetMenuPath("File Sequence")
+        node.AddInput(cls.sequence)
+        node.AddInput(cls.reset)
+        node.AddOutput(cls.new_frames)
+        node.AddOutput(cls.new_sequence)
+        node.AddOutput(cls.frame_count)
+        node.AddOutput(cls.complete)
+        return node
+
+    @staticmethod
+    def Create():
+        return WatchSequence()
+
+    @iosequenceinstrument.Instrumented("watch_sequence")
+    def Process(self, data):
+        sequence = iograft.GetInput(self.sequence, data)
+        reset = iograft.GetInput(self.reset, data)
+
+        # Trackers are shared across evaluations of the graph so that each
+        # evaluation continues from the frames seen by the last.
+        if reset:
+            iosequencewatch.RemoveTracker(sequence)
+        tracker = iosequencewatch.GetTracker(sequence)
+        new_frames = tracker.Poll()
+
+        new_sequence = sequence.copy()
+        new_sequence.setFrameSet(new_frames)
+
+        iograft.SetOutput(self.new_frames, data, new_frames)
+        iograft.SetOutput(self.new_sequence, data, new_sequence)
+        iograft.SetOutput(self.frame_count, data, len(tracker))
+        iograft.SetOutput(self.complete, data, tracker.IsComplete())
+
+
+def LoadPlugin(plugin):
+    node = WatchSequence.GetDefinition()
+    plugin.RegisterNode(node, WatchSequence.Create)
@@ -0,0 +1,158 @@
+# Copyright 2023 Fabrica Software, LLC
+"""
+Tests for FileSequence.ToString and FromString, the display strings shown
+in the iograft UI and logs (i.e. "/path/name.####.exr (1-100)").
+
+FromString splits display strings with "#" or "@" padding without parsing
+their pattern; the sequences it returns must be the same as those returned
+by parsing the pattern with fileseq.
+
+Usage:
+    python -m unittest discover tests
+"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "benchmarks"))
+import iograft_standin
+iograft_standin.Install()
+
+import fileseq
+
+import iosequencetypes
+
+
+def _ParsePattern(string_value):
+    """
+    Build the sequence for a display string by parsing its pattern with
+    fileseq, as FromString did before splitting display strings itself.
+    """
+    range_start = string_value.rfind("(")
+    if string_value.endswith(")") and range_start > 0:
+        range_str = string_value[range_start:].strip("( )")
+        filename = string_value[:range_start].strip()
+        sequence = fileseq.FileSequence(filename,
+                                        pad_style=fileseq.PAD_STYLE_HASH1)
+        sequence.setFrameSet(fileseq.FrameSet(range_str))
+        return sequence
+    return fileseq.FileSequence(string_value,
+                                pad_style=fileseq.PAD_STYLE_HASH1)
+
+
+def _Result(function, string_value):
+    """
+    Return the state of the sequence returned by function, or the type of
+    the exception it raised.
+    """
+    try:
+        return vars(function(string_value))
+    except Exception as e:
+        return type(e).__name__
+
+
+def _RandomString(rng):
+    dirname = rng.choice(["", "/p/", "/a b/c.d/", "C:\\x\\", "rel/"])
+    basename = "".join(rng.choice("ab.-_x,12 v0")
+                       for _ in range(rng.randint(0, 6)))
+    padding = rng.choice(["#", "##", "####", "@", "@@@@", "#@", "%04d", "$F4",
+                          "<UDIM>", "#.#", ""])
+    extension = "".join(rng.choice(".exrtif_-1 ")
+                        for _ in range(rng.randint(0, 5)))
+    frame_range = rng.choice(["1-10", "1001-1240x2", "1,3,5", " 1-5 ", "",
+                              "-3-3", "1-5,3-7", "x"])
+    return "{}{}{}{}{}({}){}".format(
+                    rng.choice(["", " "]), dirname, basename, padding,
+                    extension, rng.choice(["", " ", "  "]), frame_range,
+                    rng.choice(["", "", ")", " "]))
+
+
+class DisplayStringTest(unittest.TestCase):
+
+    def setUp(self):
+        iosequencetypes.FileSequence.pattern_templates.Clear()
+        iosequencetypes.FrameSet.parse_cache.Clear()
+
+    def assertSameAsParsed(self, string_value):
+        self.assertEqual(
+                    _Result(iosequencetypes.FileSequence.FromString,
+                            string_value),
+                    _Result(_ParsePattern, string_value), string_value)
+
+    def testToString(self):
+        sequence = fileseq.FileSequence(
+                            "/projects/iograft/render/octopus.1-100####.exr",
+                            pad_style=fileseq.PAD_STYLE_HASH1)
+        self.assertEqual(
+                    iosequencetypes.FileSequence.ToString(sequence),
+                    "/projects/iograft/render/octopus.####.exr (1-100)")
+
+    def testRoundTrip(self):
+        rng = random.Random(0)
+        for index in range(500):
+            pattern = "/projects/show/shot_{:04d}/{}{}{}".format(
+                        index,
+                        rng.choice(["beauty.", "beauty_v2.", "diffuse_",
+                                    "crypto.", ""]),
+                        rng.choice(["#", "####", "@@@", "#####"]),
+                        rng.choice([".exr", ".tar.gz", "", ".tif"]))
+            sequence = fileseq.FileSequence(pattern,
+                                            pad_style=fileseq.PAD_STYLE_HASH1)
+            start = rng.randint(-10, 1001)
+            sequence.setFrameSet(fileseq.FrameSet(rng.choice([
+                        "{}-{}".format(start, start + 239),
+                        "{}-{}x4".format(start, start + 239),
+                        "{},{}-{}".format(start, start + 5, start + 20)])))
+
+            string_value = iosequencetypes.FileSequence.ToString(sequence)
+            result = iosequencetypes.FileSequence.FromString(string_value)
+            self.assertEqual(vars(result), vars(sequence), string_value)
+            self.assertEqual(result.frameSet().frange,
+                             sequence.frameSet().frange, string_value)
+            self.assertEqual(
+                    iosequencetypes.FileSequence.ToString(result),
+                    string_value)
+
+    def testPatternsParsedByFileseq(self):
+        # Patterns that fileseq splits in ways that depend on the whole
+        # pattern, or that do not use "#" or "@" padding.
+        for string_value in ("/a/shot1-.#.exr (1-3)",
+                             "/a/b1,-#.exr (1-3)",
+                             "/a/sh#ot.#.exr (1-3)",
+                             ".#.exr (1-3)",
+                             "/a/b.#_x.exr (1-3)",
+                             "/a/b.#.\u00e9xr (1-3)",
+                             "/a/b.%04d.exr (1-3)",
+                             "/a/b.$F4.exr (1-3)",
+                             "/a/b.<UDIM>.exr",
+                             "/a/b.#.exr"):
+            self.assertSameAsParsed(string_value)
+
+    def testRandomStrings(self):
+        rng = random.Random(1)
+        strings = [_RandomString(rng) for _ in range(1000)]
+        for string_value in strings:
+            self.assertSameAsParsed(string_value)
+
+        # Again with a parsed pattern cached for each padding, so that the
+        # sequences are built from copies of the cached patterns.
+        for padding in ("#", "##", "####", "@", "@@@@", "#@"):
+            iosequencetypes.FileSequence.FromString(
+                                    "/warm/up.{}.exr (1)".format(padding))
+        for string_value in strings:
+            self.assertSameAsParsed(string_value)
+
+    def testResultsAreIndependent(self):
+        first = iosequencetypes.FileSequence.FromString("/a/b.####.exr (1-5)")
+        first.setBasename("changed.")
+        first.setFrameSet(fileseq.FrameSet("7"))
+        second = iosequencetypes.FileSequence.FromString("/c/d.####.exr (1-5)")
+        self.assertEqual(iosequencetypes.FileSequence.ToString(second),
+                         "/c/d.####.exr (1-5)")
+
+
+if __name__ == "__main__":
+    unittest.main()
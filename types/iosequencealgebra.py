@@ -0,0 +1,345 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Set operations on fileseq.FrameSets computed on their (start, end, step)
+runs rather than on their frames, so that the cost grows with the number of
+ranges in the frame sets rather than with the number of frames.
+
+The set operations (Union, Intersection, Difference and SymmetricDifference)
+return their frames in ascending order. The other operations keep the order
+of the frames of their input.
+"""
+
+import math
+
+import iosequenceranges
+
+
+UNION = "union"
+INTERSECTION = "intersection"
+DIFFERENCE = "difference"
+SYMMETRIC_DIFFERENCE = "symmetric_difference"
+OPERATIONS = (UNION, INTERSECTION, DIFFERENCE, SYMMETRIC_DIFFERENCE)
+
+SEQUENTIAL = "sequential"
+REVERSE = "reverse"
+FIRST_LAST_MIDDLE = "first_last_middle"
+CHUNK_ORDERS = (SEQUENTIAL, REVERSE, FIRST_LAST_MIDDLE)
+
+# Segments where the pattern of frames repeats with a longer period than
+# this are computed frame by frame.
+_MAX_PERIOD = 1024
+
+_KEEP = {UNION: lambda in_a, in_b: in_a or in_b,
+         INTERSECTION: lambda in_a, in_b: in_a and in_b,
+         DIFFERENCE: lambda in_a, in_b: in_a and not in_b,
+         SYMMETRIC_DIFFERENCE: lambda in_a, in_b: in_a != in_b}
+
+
+def Combine(frame_set_a, frame_set_b, operation):
+    """
+    Combine two fileseq.FrameSets with one of the set operations UNION,
+    INTERSECTION, DIFFERENCE or SYMMETRIC_DIFFERENCE. Returns a
+    fileseq.FrameSet with its frames in ascending order.
+    """
+    keep = _KEEP.get(operation)
+    if keep is None:
+        raise ValueError("Unknown operation {!r}; expected one of: "
+                         "{}".format(operation, ", ".join(OPERATIONS)))
+    runs = _CombineRuns(_AscendingRuns(frame_set_a),
+                        _AscendingRuns(frame_set_b), keep)
+    return _ToFrameSet(runs)
+
+
+def Union(frame_set_a, frame_set_b):
+    """
+    Return the frames in either frame set.
+    """
+    return Combine(frame_set_a, frame_set_b, UNION)
+
+
+def Intersection(frame_set_a, frame_set_b):
+    """
+    Return the frames in both frame sets.
+    """
+    return Combine(frame_set_a, frame_set_b, INTERSECTION)
+
+
+def Difference(frame_set_a, frame_set_b):
+    """
+    Return the frames of frame_set_a that are not in frame_set_b.
+    """
+    return Combine(frame_set_a, frame_set_b, DIFFERENCE)
+
+
+def SymmetricDifference(frame_set_a, frame_set_b):
+    """
+    Return the frames in exactly one of the frame sets.
+    """
+    return Combine(frame_set_a, frame_set_b, SYMMETRIC_DIFFERENCE)
+
+
+def Offset(frame_set, offset):
+    """
+    Return the frame set with offset added to every frame.
+    """
+    return _ToFrameSet([(start + offset, end + offset, step)
+                        for start, end, step in _Runs(frame_set)])
+
+
+def Clamp(frame_set, start_frame, end_frame):
+    """
+    Return the frames of the frame set between start_frame and end_frame
+    (inclusive).
+    """
+    builder = iosequenceranges.FrameRangeBuilder()
+    for start, end, step in _Runs(frame_set):
+        # Clip the run in ascending order and restore its direction after.
+        descending = step < 0
+        if descending:
+            start, end, step = end, start, -step
+        first = start
+        if first < start_frame:
+            first = start + -(-(start_frame - start) // step) * step
+        last = end
+        if last > end_frame:
+            last = start + (end_frame - start) // step * step
+        if first > last:
+            continue
+        if descending:
+            builder.AddRun(last, first, -step)
+        else:
+            builder.AddRun(first, last, step)
+    return _ToFrameSet(builder.Runs())
+
+
+def Decimate(frame_set, step):
+    """
+    Return every step'th frame of the frame set, starting with its first
+    frame.
+    """
+    if step < 1:
+        raise ValueError("Decimation step must be at least 1: "
+                         "{}".format(step))
+
+    builder = iosequenceranges.FrameRangeBuilder()
+    index = 0
+    for start, end, run_step in _Runs(frame_set):
+        count = (end - start) // run_step + 1
+        # The first frame of the run at a multiple of step in the frame set.
+        first = -index % step
+        if first < count:
+            last = first + (count - 1 - first) // step * step
+            builder.AddRun(start + first * run_step, start + last * run_step,
+                           run_step * step)
+        index += count
+    return _ToFrameSet(builder.Runs())
+
+
+def Split(frame_set, count):
+    """
+    Split the frame set into count frame sets of consecutive frames whose
+    sizes differ by at most one frame. Fewer frame sets are returned if
+    the frame set has fewer than count frames.
+    """
+    return Partition(frame_set, chunk_count=count)
+
+
+def Partition(frame_set, chunk_size=0, chunk_count=0, order=SEQUENTIAL):
+    """
+    Partition the frame set into chunks of consecutive frames, for example
+    to distribute the frames between farm tasks.
+
+    Args:
+        frame_set: fileseq.FrameSet to partition.
+        chunk_size: Number of frames in each chunk; the last chunk may be
+            smaller.
+        chunk_count: If chunk_size is zero, the number of chunks, whose
+            sizes differ by at most one frame. Fewer chunks are returned if
+            the frame set has fewer frames.
+        order: The order of the chunks:
+            SEQUENTIAL: in the order of the frames.
+            REVERSE: in the reverse order of the frames.
+            FIRST_LAST_MIDDLE: the first, last and middle frames each in a
+                chunk of their own, followed by the remaining frames in
+                order, so that problems show up early.
+
+    Returns a list of fileseq.FrameSets.
+    """
+    if order not in CHUNK_ORDERS:
+        raise ValueError("Unknown chunk order {!r}; expected one of: "
+                         "{}".format(order, ", ".join(CHUNK_ORDERS)))
+    if chunk_size < 1 and chunk_count < 1:
+        raise ValueError("Either a chunk size or a number of chunks of at "
+                         "least 1 is required")
+
+    frame_ranges = iosequenceranges.FrameRanges(_Runs(frame_set))
+    chunks = []
+    if order == FIRST_LAST_MIDDLE and frame_ranges:
+        # Take the first, last and middle frames out of the frames to be
+        # chunked.
+        total = len(frame_ranges)
+        indices = sorted({0, total // 2, total - 1})
+        chunks = [frame_ranges[index:index + 1] for index in indices]
+        runs = []
+        for start, stop in zip(indices, indices[1:] + [total]):
+            runs.extend(frame_ranges[start + 1:stop].Runs())
+        frame_ranges = iosequenceranges.FrameRanges(runs)
+
+    total = len(frame_ranges)
+    if chunk_size > 0:
+        bounds = list(range(0, total, chunk_size)) + [total]
+    else:
+        count = min(chunk_count, total)
+        bounds = [index * total // count if count else 0
+                  for index in range(count + 1)]
+    chunks.extend(frame_ranges[start:stop]
+                  for start, stop in zip(bounds, bounds[1:]))
+
+    if order == REVERSE:
+        chunks.reverse()
+    return [_ToFrameSet(chunk.Runs()) for chunk in chunks]
+
+
+def _Runs(frame_set):
+    """
+    Return the (start, end, step) runs of the frames of a fileseq.FrameSet
+    in its order.
+    """
+    if frame_set is None or frame_set.is_null:
+        return []
+    if frame_set.hasSubFrames():
+        raise ValueError("Frame set operations are not supported for "
+                         "frame sets with subframes: {}".format(frame_set))
+    return iosequenceranges.FrameRanges.FromFrameSet(frame_set).Runs()
+
+
+def _AscendingRuns(frame_set):
+    """
+    Return the runs of the frames of a fileseq.FrameSet as ascending runs
+    sorted by their first frame.
+    """
+    runs = []
+    for start, end, step in _Runs(frame_set):
+        if step < 0:
+            start, end, step = end, start, -step
+        runs.append((start, end, step))
+    runs.sort()
+    return runs
+
+
+def _CombineRuns(runs_a, runs_b, keep):
+    """
+    Combine two lists of ascending runs sorted by their first frame. keep
+    is called with whether a frame is in each list of runs and returns
+    whether the frame is in the result. Returns a list of ascending runs.
+
+    The frames are split into segments at the first frame and one past the
+    last frame of every run, so the runs covering a segment do not change
+    within it. Within a segment, the frames in the result repeat with a
+    period of the least common multiple of the steps of the runs covering
+    it; the result for a single period is computed and then repeated.
+    """
+    bounds = set()
+    for start, end, _ in runs_a:
+        bounds.add(start)
+        bounds.add(end + 1)
+    for start, end, _ in runs_b:
+        bounds.add(start)
+        bounds.add(end + 1)
+    bounds = sorted(bounds)
+
+    builder = iosequenceranges.FrameRangeBuilder()
+    active_a = []
+    active_b = []
+    next_a = 0
+    next_b = 0
+    for low, high in zip(bounds, bounds[1:]):
+        # Update the runs covering the frames from low to high - 1.
+        while next_a < len(runs_a) and runs_a[next_a][0] == low:
+            active_a.append(runs_a[next_a])
+            next_a += 1
+        while next_b < len(runs_b) and runs_b[next_b][0] == low:
+            active_b.append(runs_b[next_b])
+            next_b += 1
+        active_a = [run for run in active_a if run[1] >= low]
+        active_b = [run for run in active_b if run[1] >= low]
+        if not active_a and not active_b:
+            continue
+        _CombineSegment(builder, low, high, active_a, active_b, keep)
+    return builder.Runs()
+
+
+def _CombineSegment(builder, low, high, active_a, active_b, keep):
+    """
+    Add the frames of the result from low to high - 1 to the builder, given
+    the runs covering that segment.
+    """
+    def contains(runs, frame):
+        return any((frame - start) % step == 0 for start, _, step in runs)
+
+    period = 1
+    for _, _, step in active_a + active_b:
+        period = period * step // math.gcd(period, step)
+
+    length = high - low
+    if period > _MAX_PERIOD or period >= length:
+        # Test each frame of the runs in the segment; the result of every
+        # operation is a subset of the frames of the two frame sets.
+        frames = set()
+        for start, _, step in active_a + active_b:
+            first = start + -(-(low - start) // step) * step
+            frames.update(range(first, high, step))
+        for frame in sorted(frames):
+            if keep(contains(active_a, frame), contains(active_b, frame)):
+                builder.Add(frame)
+        return
+
+    # The offsets from the start of each period that are in the result.
+    offsets = [offset for offset in range(period)
+               if keep(contains(active_a, low + offset),
+                       contains(active_b, low + offset))]
+    if not offsets:
+        return
+    if len(offsets) == period:
+        builder.AddRun(low, high - 1, 1)
+        return
+    if len(offsets) == 1:
+        first = low + offsets[0]
+        builder.AddRun(first, first + (high - 1 - first) // period * period,
+                       period)
+        return
+
+    # Several frames in each period; the frames are added period by period
+    # so that they stay in ascending order.
+    groups = []
+    for offset in offsets:
+        if groups and groups[-1][1] == offset - 1:
+            groups[-1][1] = offset
+        else:
+            groups.append([offset, offset])
+    for period_start in range(low, high, period):
+        for first, last in groups:
+            first += period_start
+            if first >= high:
+                break
+            builder.AddRun(first, min(period_start + last, high - 1), 1)
+
+
+def _ToFrameSet(runs):
+    """
+    Build a fileseq.FrameSet from a list of (start, end, step) runs.
+    """
+    return iosequenceranges.FrameRanges(runs).FrameSet()
@@ -0,0 +1,414 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Bulk serialization of lists of sequences.
+
+Rather than serializing each sequence on its own (see
+iosequencetypes.FileSequence.SerializeValue), a list is encoded in columns:
+
+- the dirnames, basenames, paddings and extensions are stored once each in
+  a table of strings, and every sequence refers to its components by their
+  index in the table;
+- identical frame ranges are stored once, packed as arrays of
+  (start, end, step) runs where the frame range string can be formatted
+  back from its runs, and as a string in the table otherwise.
+
+Sequences that cannot be rebuilt from their components (see
+FileSequence._ToCompact) are stored as the JSON of their to_dict form.
+
+The encoding is read in place through a SequenceListView, which decodes the
+sequences as they are accessed. A SharedSequenceList places the encoding in
+a block of shared memory, so worker processes on the same machine can
+attach to the list by name and read it without copying or unpickling it.
+
+The arrays are in the byte order of the machine that encoded them; the
+encoding is meant for handing lists between local processes rather than
+for storage.
+"""
+
+import array
+import json
+import os
+import struct
+import sys
+from collections.abc import Sequence
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+
+import iosequencedisk
+import iosequenceranges
+import iosequencetypes
+
+
+# Version of the encoding written by EncodeSequences.
+FORMAT_VERSION = 1
+
+_MAGIC = b"IOSQ"
+
+# Magic, version, byte order, then the number of sequences, strings, bytes
+# of string data, frame ranges and runs.
+_HEADER = struct.Struct("<4sBB2xIIIII4x")
+
+_BYTE_ORDERS = {"little": 0, "big": 1}
+
+# Column value for a sequence without a frame set, and frame range value for
+# a frame range packed as runs.
+_NONE = -1
+
+# Dirname column value for a sequence stored as the JSON of its to_dict
+# form; its basename column holds the index of the JSON string.
+_DICT = -2
+
+# Names of the blocks of shared memory created by this process (or by the
+# process it was forked from, which shares its resource tracker).
+_created = set()
+
+
+class _Encoder(object):
+    """
+    Accumulate the columns, string table and packed frame ranges of a list
+    of sequences.
+    """
+    def __init__(self):
+        self.strings = {}
+        self.frame_ranges = {}
+        self.columns = tuple(array.array("i") for _ in range(5))
+        self.run_offsets = array.array("I", [0])
+        self.range_strings = array.array("i")
+        self.starts = array.array("q")
+        self.ends = array.array("q")
+        self.steps = array.array("q")
+
+    def Add(self, sequence):
+        compact_value = iosequencetypes.FileSequence._ToCompact(sequence)
+        if compact_value is None:
+            for column, value in zip(self.columns, (
+                    _DICT, self._String(json.dumps(sequence.to_dict())),
+                    _NONE, _NONE, _NONE)):
+                column.append(value)
+            return
+
+        dirname, basename, padding, extension, frame_range = compact_value
+        for column, string in zip(self.columns, (dirname, basename, padding,
+                                                 extension)):
+            column.append(self._String(string))
+        self.columns[4].append(_NONE if frame_range is None
+                               else self._FrameRange(frame_range))
+
+    def Parts(self):
+        """
+        Return the list of bytes-like parts of the encoding, in order.
+        """
+        string_offsets = array.array("I", [0])
+        string_data = []
+        for string in self.strings:
+            data = string.encode("utf-8", "surrogateescape")
+            string_data.append(data)
+            string_offsets.append(string_offsets[-1] + len(data))
+
+        header = _HEADER.pack(_MAGIC, FORMAT_VERSION,
+                              _BYTE_ORDERS[sys.byteorder],
+                              len(self.columns[0]), len(self.strings),
+                              string_offsets[-1], len(self.range_strings),
+                              len(self.starts))
+        # The header is a multiple of 8 bytes and the 8 byte arrays come
+        # first, so every array is aligned to its item size.
+        return ([header, self.starts, self.ends, self.steps,
+                 self.run_offsets, self.range_strings, string_offsets] +
+                list(self.columns) + string_data)
+
+    def _String(self, string):
+        index = self.strings.get(string)
+        if index is None:
+            index = self.strings[string] = len(self.strings)
+        return index
+
+    def _FrameRange(self, frame_range):
+        index = self.frame_ranges.get(frame_range)
+        if index is not None:
+            return index
+
+        index = self.frame_ranges[frame_range] = len(self.range_strings)
+        runs = iosequenceranges.FrameRangeToRuns(frame_range)
+        if runs is None:
+            self.range_strings.append(self._String(frame_range))
+        else:
+            self.range_strings.append(_NONE)
+            for start, end, step in runs:
+                self.starts.append(start)
+                self.ends.append(end)
+                self.steps.append(step)
+        self.run_offsets.append(len(self.starts))
+        return index
+
+
+def _Encode(sequences):
+    encoder = _Encoder()
+    for sequence in sequences:
+        encoder.Add(sequence)
+    parts = encoder.Parts()
+    return parts, sum(memoryview(part).nbytes for part in parts)
+
+
+def EncodeSequences(sequences):
+    """
+    Return the bulk encoding of a list of fileseq.FileSequence objects as
+    bytes.
+    """
+    parts, _ = _Encode(sequences)
+    return b"".join(parts)
+
+
+def DecodeSequences(data):
+    """
+    Return the list of fileseq.FileSequence objects encoded in a bytes-like
+    object by EncodeSequences.
+    """
+    view = SequenceListView(data)
+    try:
+        return list(view)
+    finally:
+        view.Release()
+
+
+class SequenceListView(Sequence):
+    """
+    Read-only list of the sequences encoded in a bytes-like object by
+    EncodeSequences. The encoding is read in place and each sequence is
+    decoded when it is accessed; every access returns a new sequence.
+
+    Sequences are built from their components without parsing every
+    pattern (see FileSequence._FromComponents), and identical frame ranges
+    are only converted to a frame set once.
+
+    Release must be called before the underlying buffer can be resized or
+    closed (for example a block of shared memory).
+    """
+    __slots__ = ("_views", "_count", "_string_offsets", "_string_data",
+                 "_columns", "_run_offsets", "_range_strings", "_starts",
+                 "_ends", "_steps", "_strings", "_frame_sets")
+
+    def __init__(self, data):
+        buffer = memoryview(data).cast("B")
+        (magic, version, byte_order, count, string_count, string_bytes,
+         range_count, run_count) = _HEADER.unpack_from(buffer)
+        if magic != _MAGIC:
+            buffer.release()
+            raise ValueError("Not an encoded list of sequences")
+        if version != FORMAT_VERSION:
+            buffer.release()
+            raise ValueError("Unsupported sequence list encoding version "
+                             "{}".format(version))
+        if byte_order != _BYTE_ORDERS[sys.byteorder]:
+            buffer.release()
+            raise ValueError("Sequence list was encoded with a different "
+                             "byte order")
+
+        self._views = [buffer]
+        offset = _HEADER.size
+        self._starts, offset = self._Array(buffer, offset, "q", run_count)
+        self._ends, offset = self._Array(buffer, offset, "q", run_count)
+        self._steps, offset = self._Array(buffer, offset, "q", run_count)
+        self._run_offsets, offset = self._Array(buffer, offset, "I",
+                                                range_count + 1)
+        self._range_strings, offset = self._Array(buffer, offset, "i",
+                                                  range_count)
+        self._string_offsets, offset = self._Array(buffer, offset, "I",
+                                                   string_count + 1)
+        self._columns = []
+        for _ in range(5):
+            column, offset = self._Array(buffer, offset, "i", count)
+            self._columns.append(column)
+        self._string_data = buffer[offset:offset + string_bytes]
+        self._views.append(self._string_data)
+
+        self._count = count
+        self._strings = {}
+        self._frame_sets = {}
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._Sequence(i)
+                    for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("Sequence list index out of range")
+        return self._Sequence(index)
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self._Sequence(index)
+
+    def Release(self):
+        """
+        Release the views of the underlying buffer. Sequences already
+        returned remain valid; the view cannot be used afterwards.
+        """
+        views, self._views = self._views, []
+        for view in reversed(views):
+            view.release()
+
+    def _Array(self, buffer, offset, typecode, length):
+        end = offset + length * struct.calcsize(typecode)
+        view = buffer[offset:end].cast(typecode)
+        self._views.append(view)
+        return view, end
+
+    def _Sequence(self, index):
+        dirname, basename, padding, extension, frame_range = (
+                                column[index] for column in self._columns)
+        if dirname == _DICT:
+            return iosequencedisk.SequenceFromDict(
+                                        json.loads(self._String(basename)))
+
+        sequence = iosequencetypes.FileSequence._FromComponents(
+                    *(self._String(i) for i in (dirname, basename, padding,
+                                                extension)))
+        if frame_range != _NONE:
+            sequence.setFrameSet(self._FrameSet(frame_range).copy())
+        return sequence
+
+    def _String(self, index):
+        string = self._strings.get(index)
+        if string is None:
+            start = self._string_offsets[index]
+            end = self._string_offsets[index + 1]
+            string = bytes(self._string_data[start:end]).decode(
+                                                "utf-8", "surrogateescape")
+            self._strings[index] = string
+        return string
+
+    def _FrameSet(self, index):
+        frame_set = self._frame_sets.get(index)
+        if frame_set is None:
+            string_index = self._range_strings[index]
+            if string_index != _NONE:
+                frame_set = iosequencetypes.FrameSet.Parse(
+                                                self._String(string_index))
+            else:
+                runs = [(self._starts[run], self._ends[run], self._steps[run])
+                        for run in range(self._run_offsets[index],
+                                         self._run_offsets[index + 1])]
+                frame_set = iosequenceranges.RunsToFrameSet(runs)
+            self._frame_sets[index] = frame_set
+        return frame_set
+
+
+class SharedSequenceList(SequenceListView):
+    """
+    List of sequences encoded into a block of shared memory.
+
+    The process that creates the list (see Share) owns the block and
+    unlinks it when the list is closed. Other processes attach to it by
+    name (see Attach) and read the sequences in place. Passing a
+    SharedSequenceList to another process through pickle (for example as
+    an argument to a multiprocessing pool) only sends its name; the
+    receiving process attaches to the same block.
+    """
+    __slots__ = ("_shared_memory", "_owner", "_name")
+
+    def __init__(self, shared_memory_block, owner=False):
+        super(SharedSequenceList, self).__init__(shared_memory_block.buf)
+        self._shared_memory = shared_memory_block
+        self._owner = owner
+        self._name = shared_memory_block.name
+
+    @classmethod
+    def Share(cls, sequences):
+        """
+        Encode a list of fileseq.FileSequence objects into a new block of
+        shared memory. Returns the SharedSequenceList owning the block.
+        """
+        parts, size = _Encode(sequences)
+        block = shared_memory.SharedMemory(create=True, size=size)
+        try:
+            offset = 0
+            for part in parts:
+                part = memoryview(part).cast("B")
+                block.buf[offset:offset + part.nbytes] = part
+                offset += part.nbytes
+            shared = cls(block, owner=True)
+        except BaseException:
+            block.close()
+            block.unlink()
+            raise
+        _created.add(shared.name)
+        return shared
+
+    @classmethod
+    def Attach(cls, name):
+        """
+        Attach to the shared list with the given name, created by another
+        process. The list must be closed once it is no longer needed.
+        """
+        block = shared_memory.SharedMemory(name=name)
+        if (os.name == "posix" and sys.version_info < (3, 13) and
+                name not in _created):
+            # Before Python 3.13 attaching also registers the block with
+            # this process's resource tracker, which would unlink it when
+            # this process exits; the block belongs to the creating process.
+            resource_tracker.unregister(block._name, "shared_memory")
+        try:
+            return cls(block)
+        except BaseException:
+            block.close()
+            raise
+
+    @property
+    def name(self):
+        return self._name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.Close()
+
+    def __reduce__(self):
+        return (SharedSequenceList.Attach, (self.name,))
+
+    def Close(self):
+        """
+        Release the list's view of the shared memory, and unlink the block
+        if this process created it.
+        """
+        if self._shared_memory is None:
+            return
+        self.Release()
+        self._shared_memory.close()
+        if self._owner:
+            self._shared_memory.unlink()
+            _created.discard(self._name)
+        self._shared_memory = None
+
+
+def Share(sequences):
+    """
+    Encode a list of sequences into a new block of shared memory. See
+    SharedSequenceList.Share.
+    """
+    return SharedSequenceList.Share(sequences)
+
+
+def Attach(name):
+    """
+    Attach to a list of sequences shared by another process. See
+    SharedSequenceList.Attach.
+    """
+    return SharedSequenceList.Attach(name)
@@ -0,0 +1,384 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Process-wide cache of directory listings shared by the nodes that search
+the disk for sequences and frames.
+
+A cached listing is used as-is until it is older than the cache's TTL. After
+that the directory's modification time is checked and the directory is only
+listed again if it has changed. Results derived from a listing (for example
+the frames of a sequence) can be cached alongside it with Query and are
+discarded whenever the directory is listed again.
+
+Listings are not updated when files are written within the TTL; call
+Invalidate after writing to a directory that is read again in the same
+graph run. Callers that must see the current contents of a directory (such
+as the frame existence checks) pass revalidate=True to skip the TTL, so
+that only the modification time check is used.
+
+A listing taken within the resolution of the directory's modification time
+of its last change could miss files added without changing it, so such a
+listing is never revalidated by its modification time; the directory is
+listed again instead.
+
+A persistent index (see iosequenceindex) can be attached to the cache with
+SetIndex. Listings, and query results given a codec, are then also read
+from and written to the index, keyed on the directory's modification time,
+so that they survive between processes.
+"""
+
+import collections
+import os
+import stat
+import threading
+import time
+
+
+# Number of seconds a listing is used without checking the directory's
+# modification time.
+DEFAULT_TTL = 2.0
+
+# Maximum number of directories held by the cache.
+DEFAULT_MAX_ENTRIES = 512
+
+# Listings taken less than this many nanoseconds after the directory's last
+# modification cannot be revalidated by its modification time, since files
+# added within the resolution of the modification time would not change it.
+# Filesystems storing whole seconds (or coarser) use the longer window.
+_RACY_NS = 2 * 10 ** 9
+_RACY_FINE_NS = 100 * 10 ** 6
+
+
+class DirectoryListing(object):
+    """
+    The entries of a single directory.
+
+    Attributes:
+        files: List of the names of the non-directory entries in the order
+            they were listed.
+        dirs: Set of the names of the directory entries.
+        existing: Set of the names of all entries that exist; this excludes
+            dangling symlinks.
+    """
+    __slots__ = ("files", "dirs", "existing")
+
+    def __init__(self, files, dirs, existing):
+        self.files = files
+        self.dirs = dirs
+        self.existing = existing
+
+
+class _Entry(object):
+    __slots__ = ("listing", "mtime_ns", "checked", "trusted", "results")
+
+    def __init__(self, listing, mtime_ns, checked, trusted):
+        self.listing = listing
+        self.mtime_ns = mtime_ns
+        self.checked = checked
+        # Whether the listing can be revalidated by the modification time.
+        self.trusted = trusted
+        self.results = {}
+
+
+class DirectoryCache(object):
+    """
+    Thread-safe cache of directory listings with a TTL, modification time
+    based invalidation and least-recently-used eviction.
+    """
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES,
+                 index=None):
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._index = index
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = collections.Counter()
+
+    def Configure(self, ttl=None, max_entries=None):
+        """
+        Update the TTL (in seconds) and/or the maximum number of entries of
+        the cache. A maximum of zero disables caching.
+        """
+        with self._lock:
+            if ttl is not None:
+                self._ttl = ttl
+            if max_entries is not None:
+                self._max_entries = max_entries
+                self._Evict()
+
+    def SetIndex(self, index):
+        """
+        Attach a persistent index (an iosequenceindex.SequenceIndex) to the
+        cache, or detach it if index is None.
+        """
+        with self._lock:
+            self._index = index
+            self._entries.clear()
+
+    def Index(self):
+        """
+        Return the persistent index attached to the cache, or None.
+        """
+        return self._index
+
+    def Listing(self, dirpath, revalidate=False):
+        """
+        Return the DirectoryListing for the given directory or None if the
+        path does not exist or is not a directory. Other errors listing the
+        directory are raised as OSError.
+
+        If revalidate is True a cached listing is only used once the
+        directory's modification time shows it is still current, even
+        within the TTL.
+        """
+        return self._GetEntry(dirpath, revalidate).listing
+
+    def Query(self, dirpath, key, compute, codec=None, revalidate=False):
+        """
+        Return a result derived from the listing of the given directory.
+
+        compute is called with the DirectoryListing (or None) of the
+        directory if no result is cached for the key; its return value is
+        cached until the directory is listed again.
+
+        codec is an optional (encode, decode) tuple of functions converting
+        the result to and from a JSON compatible value other than None. If
+        given, the result is also cached in the persistent index, if there
+        is one.
+
+        revalidate is as for Listing.
+        """
+        entry = self._GetEntry(dirpath, revalidate)
+        with self._lock:
+            if key in entry.results:
+                self._stats["query_hits"] += 1
+                return entry.results[key]
+            self._stats["query_misses"] += 1
+            index = self._index
+
+        persist = (codec is not None and index is not None and
+                   entry.mtime_ns is not None)
+        value = None
+        if persist:
+            value = index.Result(_Key(dirpath), entry.mtime_ns, repr(key))
+
+        if value is not None:
+            result = codec[1](value)
+            with self._lock:
+                self._stats["index_query_hits"] += 1
+        else:
+            result = compute(entry.listing)
+            if persist:
+                index.StoreResult(_Key(dirpath), entry.mtime_ns, repr(key),
+                                  codec[0](result))
+
+        with self._lock:
+            entry.results[key] = result
+        return result
+
+    def Invalidate(self, dirpath=None):
+        """
+        Remove the given directory from the cache, or all directories if no
+        directory is given.
+        """
+        with self._lock:
+            self._stats["invalidations"] += 1
+            if dirpath is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(_Key(dirpath), None)
+
+    def Stats(self):
+        """
+        Return a dictionary of the cache's counters.
+        """
+        with self._lock:
+            stats = {"entries": len(self._entries),
+                     "hits": 0,
+                     "revalidations": 0,
+                     "misses": 0,
+                     "evictions": 0,
+                     "invalidations": 0,
+                     "query_hits": 0,
+                     "query_misses": 0,
+                     "index_hits": 0,
+                     "index_query_hits": 0}
+            stats.update(self._stats)
+            return stats
+
+    def ResetStats(self):
+        """
+        Reset all of the cache's counters to zero.
+        """
+        with self._lock:
+            self._stats.clear()
+
+    def _GetEntry(self, dirpath, revalidate=False):
+        key = _Key(dirpath)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if not revalidate and now - entry.checked < self._ttl:
+                    self._stats["hits"] += 1
+                    return entry
+
+        # The entry is missing, has expired or must be revalidated; check
+        # whether the directory has been modified since it was listed.
+        mtime_ns = _ModifiedTime(dirpath)
+        if (entry is not None and entry.trusted and
+                entry.mtime_ns == mtime_ns):
+            with self._lock:
+                entry.checked = now
+                self._stats["revalidations"] += 1
+            return entry
+
+        listing = None
+        trusted = True
+        index = self._index
+        if mtime_ns is not None:
+            if index is not None:
+                # The index only stores listings that can be trusted.
+                listing = index.Listing(key, mtime_ns)
+            if listing is None:
+                trusted = not IsRacy(mtime_ns)
+                listing = ListDirectory(dirpath)
+                if index is not None and listing is not None and trusted:
+                    index.StoreListing(key, mtime_ns, listing)
+            elif index is not None:
+                with self._lock:
+                    self._stats["index_hits"] += 1
+
+        entry = _Entry(listing, mtime_ns, now, trusted)
+        with self._lock:
+            self._stats["misses"] += 1
+            if self._max_entries > 0:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                self._Evict()
+        return entry
+
+    def _Evict(self):
+        while len(self._entries) > max(self._max_entries, 0):
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+
+def _Key(dirpath):
+    return os.path.abspath(dirpath or os.curdir)
+
+
+def IsRacy(mtime_ns):
+    """
+    Return whether a directory last modified at mtime_ns (in nanoseconds)
+    was modified too recently for a listing taken now to be revalidated by
+    its modification time.
+    """
+    racy_ns = _RACY_FINE_NS if mtime_ns % 10 ** 9 else _RACY_NS
+    return time.time_ns() - mtime_ns < racy_ns
+
+
+def _ModifiedTime(dirpath):
+    """
+    Return the modification time of the directory in nanoseconds, or None
+    if it does not exist or is not a directory.
+    """
+    try:
+        stat_result = os.stat(dirpath or os.curdir)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    if not stat.S_ISDIR(stat_result.st_mode):
+        return None
+    return stat_result.st_mtime_ns
+
+
+def ListDirectory(dirpath):
+    """
+    List a directory without using the cache. Returns a DirectoryListing or
+    None if the path does not exist or is not a directory.
+    """
+    files = []
+    dirs = set()
+    existing = set()
+    try:
+        with os.scandir(dirpath or os.curdir) as entries:
+            for entry in entries:
+                name = entry.name
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+
+                if is_dir:
+                    dirs.add(name)
+                else:
+                    files.append(name)
+                    # A dangling symlink is listed but does not exist.
+                    if entry.is_symlink() and not os.path.exists(entry.path):
+                        continue
+                existing.add(name)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return DirectoryListing(files, dirs, existing)
+
+
+# The cache shared by all nodes in the process.
+cache = DirectoryCache()
+
+
+def Listing(dirpath, revalidate=False):
+    """
+    Return the DirectoryListing for the given directory from the shared
+    cache. See DirectoryCache.Listing.
+    """
+    return cache.Listing(dirpath, revalidate=revalidate)
+
+
+def Query(dirpath, key, compute, codec=None, revalidate=False):
+    """
+    Return a result derived from a directory listing from the shared cache.
+    See DirectoryCache.Query.
+    """
+    return cache.Query(dirpath, key, compute, codec=codec,
+                       revalidate=revalidate)
+
+
+def Invalidate(dirpath=None):
+    """
+    Remove the given directory (or all directories) from the shared cache.
+    """
+    cache.Invalidate(dirpath)
+
+
+def Configure(ttl=None, max_entries=None):
+    """
+    Configure the TTL and maximum number of entries of the shared cache.
+    """
+    cache.Configure(ttl=ttl, max_entries=max_entries)
+
+
+def SetIndex(index):
+    """
+    Attach a persistent index to (or detach it from) the shared cache.
+    """
+    cache.SetIndex(index)
+
+
+def Stats():
+    """
+    Return the counters of the shared cache.
+    """
+    return cache.Stats()
@@ -0,0 +1,182 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Process-wide service running single-sequence lookups (see
+iosequencedisk.FindSequenceOnDisk) concurrently on a bounded pool of
+threads.
+
+Lookups of the same file pattern that are in flight at the same time share
+a single lookup, so nodes evaluated concurrently that ask for the same
+pattern only search the disk once. Completed lookups are not remembered
+here; repeated lookups are answered by the directory cache.
+
+Lookups can be waited on from threads (Find, FindMany) or from asyncio
+coroutines (FindAsync, FindManyAsync).
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+
+import iosequencedisk
+
+
+# Default number of threads running lookups.
+DISCOVERY_WORKERS = 8
+
+
+class DiscoveryService(object):
+    """
+    Run sequence lookups on a bounded pool of threads, sharing the lookups
+    of identical patterns that are in flight at the same time.
+    """
+    def __init__(self, max_workers=DISCOVERY_WORKERS,
+                 lookup=iosequencedisk.FindSequenceOnDisk):
+        self._max_workers = max(max_workers, 1)
+        self._lookup = lookup
+        self._lock = threading.Lock()
+        self._executor = None
+        self._in_flight = {}
+        self._requests = 0
+        self._shared = 0
+
+    def Submit(self, file_pattern):
+        """
+        Start the lookup of the sequence matching the given file pattern,
+        or join the lookup of the same pattern that is already in flight.
+        Returns a concurrent.futures.Future of the fileseq.FileSequence,
+        which is shared between the callers and must not be modified.
+        """
+        with self._lock:
+            self._requests += 1
+            future = self._in_flight.get(file_pattern)
+            if future is not None:
+                self._shared += 1
+                return future
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                                    self._max_workers,
+                                    thread_name_prefix="iosequencediscovery")
+            future = self._executor.submit(self._lookup, file_pattern)
+            self._in_flight[file_pattern] = future
+
+        # Registered outside of the lock; the callback is called straight
+        # away if the lookup has already finished.
+        future.add_done_callback(
+                    lambda done: self._Finished(file_pattern, done))
+        return future
+
+    def Find(self, file_pattern):
+        """
+        Return the sequence matching the given file pattern, waiting for
+        the lookup. Raises fileseq.FileSeqException if no (or more than
+        one) sequence is found.
+        """
+        return self.Submit(file_pattern).result().copy()
+
+    def FindMany(self, file_patterns):
+        """
+        Look up the sequences matching each of the given file patterns
+        concurrently. Returns a list of the sequences in the order of the
+        patterns; the first error is raised after all lookups finish.
+        """
+        futures = [self.Submit(pattern) for pattern in file_patterns]
+        concurrent.futures.wait(futures)
+        return [future.result().copy() for future in futures]
+
+    async def FindAsync(self, file_pattern):
+        """
+        Coroutine returning the sequence matching the given file pattern.
+        """
+        sequence = await asyncio.wrap_future(self.Submit(file_pattern))
+        return sequence.copy()
+
+    async def FindManyAsync(self, file_patterns):
+        """
+        Coroutine returning the sequences matching each of the given file
+        patterns, in the order of the patterns.
+        """
+        return await asyncio.gather(*(self.FindAsync(pattern)
+                                      for pattern in file_patterns))
+
+    def Stats(self):
+        """
+        Return a dictionary of the number of lookups requested, the number
+        that shared a lookup already in flight and the number in flight.
+        """
+        with self._lock:
+            return {"requests": self._requests,
+                    "shared": self._shared,
+                    "in_flight": len(self._in_flight)}
+
+    def Shutdown(self):
+        """
+        Wait for the lookups in flight and stop the pool of threads. A new
+        pool is started by the next lookup.
+        """
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _Finished(self, file_pattern, future):
+        with self._lock:
+            if self._in_flight.get(file_pattern) is future:
+                del self._in_flight[file_pattern]
+
+
+# The service shared by all nodes in the process.
+service = DiscoveryService()
+
+
+def Submit(file_pattern):
+    """
+    Start (or join) a lookup with the shared service. See
+    DiscoveryService.Submit.
+    """
+    return service.Submit(file_pattern)
+
+
+def Find(file_pattern):
+    """
+    Return the sequence matching the given file pattern using the shared
+    service. See DiscoveryService.Find.
+    """
+    return service.Find(file_pattern)
+
+
+def FindMany(file_patterns):
+    """
+    Return the sequences matching each of the given file patterns using
+    the shared service. See DiscoveryService.FindMany.
+    """
+    return service.FindMany(file_patterns)
+
+
+async def FindAsync(file_pattern):
+    """
+    Coroutine returning the sequence matching the given file pattern using
+    the shared service.
+    """
+    return await service.FindAsync(file_pattern)
+
+
+async def FindManyAsync(file_patterns):
+    """
+    Coroutine returning the sequences matching each of the given file
+    patterns using the shared service.
+    """
+    return await service.FindManyAsync(file_patterns)
@@ -0,0 +1,689 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Filesystem helpers shared by the fileseq nodes.
+"""
+
+import array
+import bisect
+import collections
+import concurrent.futures
+import fnmatch
+import itertools
+import os
+import re
+import stat
+import statistics
+
+import fileseq
+
+import iosequencedircache
+import iosequenceranges
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Frame sets with this many frames or fewer are checked with a single stat
+# per frame; for these a stat is cheaper than listing the whole directory.
+STAT_THRESHOLD = 16
+
+# Number of frames checked by each task when probing frames with a pool of
+# worker threads.
+PROBE_CHUNK_SIZE = 64
+
+# Default number of threads used to list directories when walking a tree.
+WALK_WORKERS = 8
+
+# Matches the shell wildcard characters supported by glob.
+_GLOB_CHARS_RE = re.compile(r"[*?[]")
+
+
+def SplitExistingFrames(sequence, stat_threshold=STAT_THRESHOLD,
+                        max_workers=0):
+    """
+    Split the frames of a fileseq.FileSequence into the frames that exist on
+    disk and the frames that are missing.
+
+    By default the sequence's directory is listed once and the entries are
+    matched against the sequence's basename, padding and extension. Small
+    frame sets (and sequences using subframes) fall back to checking each
+    frame path.
+
+    If max_workers is greater than zero the directory is not listed;
+    instead each frame path is checked across a pool of that many threads,
+    which suits storage where listings are unreliable but requests can be
+    issued concurrently.
+
+    Returns a tuple of (existing_frame_set, missing_frame_set).
+    """
+    frame_set = sequence.frameSet()
+    if frame_set is None or frame_set.is_null:
+        return fileseq.FrameSet(""), fileseq.FrameSet("")
+
+    if max_workers > 0:
+        probes = _ProbeFramesParallel(sequence, frame_set, max_workers)
+    else:
+        frames_on_disk = None
+        if len(frame_set) > stat_threshold and not sequence.decimalPlaces():
+            frames_on_disk = _ListFramesOnDisk(sequence)
+
+        if frames_on_disk is None:
+            # Check each frame individually.
+            probes = ((frame, os.path.exists(sequence.frame(frame)))
+                      for frame in frame_set)
+        else:
+            probes = ((frame, frame in frames_on_disk) for frame in frame_set)
+
+    # Accumulate the frames as contiguous runs so that memory use does not
+    # grow with the number of frames in the sequence.
+    existing_frames = iosequenceranges.FrameRangeBuilder()
+    missing_frames = iosequenceranges.FrameRangeBuilder()
+    for frame, exists in probes:
+        if exists:
+            existing_frames.Add(frame)
+        else:
+            missing_frames.Add(frame)
+
+    return existing_frames.FrameSet(), missing_frames.FrameSet()
+
+
+def _ProbeFramesParallel(sequence, frame_set, max_workers,
+                         chunk_size=PROBE_CHUNK_SIZE):
+    """
+    Check whether each frame of the sequence exists using a pool of worker
+    threads. Yields (frame, exists) tuples in the order of the frame set.
+    """
+    def probe(frames):
+        return [os.path.exists(sequence.frame(frame)) for frame in frames]
+
+    return MapChunks(probe, frame_set, max_workers, chunk_size)
+
+
+def MapChunks(function, items, max_workers, chunk_size):
+    """
+    Call function with chunks of up to chunk_size items across a pool of
+    max_workers threads. function returns a list with a result for each
+    item of its chunk. Yields (item, result) tuples in the order of the
+    items.
+    """
+    items = iter(items)
+    max_workers = max(max_workers, 1)
+    pending = collections.deque()
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        while True:
+            # Keep a bounded number of chunks in flight so that the items
+            # are never all expanded at once.
+            while len(pending) < max_workers * 2:
+                chunk = list(itertools.islice(items, chunk_size))
+                if not chunk:
+                    break
+                pending.append((chunk, executor.submit(function, chunk)))
+
+            if not pending:
+                break
+
+            # Chunks are completed in the order they were submitted.
+            chunk, future = pending.popleft()
+            for item, result in zip(chunk, future.result()):
+                yield item, result
+
+
+def ErrorMessage(error):
+    """
+    Return a message for an OSError that includes the path it was raised
+    for, if any.
+    """
+    if error.filename is not None:
+        return "{}: {}".format(error.strerror or error, error.filename)
+    return str(error)
+
+
+def _ListFramesOnDisk(sequence):
+    """
+    Return the set of frame numbers of the sequence that have a matching
+    file in the sequence's directory. Returns None if the directory could
+    not be listed and frames should be checked individually instead.
+    """
+    match_frame = FrameMatcher(sequence)
+
+    def match_frames(listing):
+        if listing is None:
+            # None of the frames can exist.
+            return frozenset()
+
+        frames = set()
+        for name in listing.existing:
+            frame = match_frame(name)
+            if frame is not None:
+                frames.add(frame)
+        return frozenset(frames)
+
+    # The matched frames are cached with the directory listing so that
+    # other nodes checking the same sequence do not repeat the work. The
+    # listing is revalidated on every check so that existence checks see
+    # frames written since the directory was listed.
+    try:
+        return iosequencedircache.Query(sequence.dirname(),
+                                        ("frames", sequence.basename(),
+                                         sequence.extension(),
+                                         sequence.zfill()),
+                                        match_frames, revalidate=True)
+    except OSError:
+        return None
+
+
+def FrameMatcher(sequence):
+    """
+    Return a function taking a file name and returning its frame number if
+    it is a frame of the sequence (padded the same way that the sequence
+    would pad it), or None otherwise.
+    """
+    zfill = sequence.zfill()
+    pattern = re.compile(re.escape(sequence.basename()) + r"(-?\d+)" +
+                         re.escape(sequence.extension()) + r"\Z")
+
+    def match_frame(name):
+        match = pattern.match(name)
+        if match is None:
+            return None
+        frame_str = match.group(1)
+        frame = int(frame_str)
+        if str(frame).zfill(zfill) != frame_str:
+            return None
+        return frame
+    return match_frame
+
+
+def FrameSetContains(frame_set):
+    """
+    Return a function testing whether a frame is in the given
+    fileseq.FrameSet. Frame sets made of ranges that do not interleave are
+    tested against the ranges directly, which is much cheaper than testing
+    the frame set.
+    """
+    runs = iosequenceranges.FrameRanges.FromFrameSet(frame_set).Runs()
+    ranges = sorted(range(min(start, end), max(start, end) + 1, abs(step))
+                    for start, end, step in runs)
+    if len(ranges) == 1:
+        return ranges[0].__contains__
+    for previous, current in zip(ranges, ranges[1:]):
+        if previous[-1] >= current[0]:
+            return frame_set.__contains__
+
+    starts = [frame_range[0] for frame_range in ranges]
+
+    def contains(frame):
+        index = bisect.bisect_right(starts, frame) - 1
+        return index >= 0 and frame in ranges[index]
+    return contains
+
+
+class FrameMetadata(object):
+    """
+    File metadata for the frames of a sequence that exist on disk, stored
+    as parallel arrays ordered by frame.
+
+    Attributes:
+        frames: array of the frame numbers.
+        sizes: array of the file sizes in bytes.
+        mtimes: array of the modification times in seconds since the epoch.
+    """
+    __slots__ = ("frames", "sizes", "mtimes")
+
+    def __init__(self, frames=None, sizes=None, mtimes=None):
+        self.frames = array.array("q") if frames is None else frames
+        self.sizes = array.array("q") if sizes is None else sizes
+        self.mtimes = array.array("d") if mtimes is None else mtimes
+
+    def __len__(self):
+        return len(self.frames)
+
+    def ZeroByteFrames(self):
+        """
+        Return a fileseq.FrameSet of the frames whose files are empty.
+        """
+        if numpy is not None:
+            return self._FramesWhere(numpy.frombuffer(self.sizes,
+                                                      dtype=numpy.int64) == 0)
+        return self._FramesWhere(size == 0 for size in self.sizes)
+
+    def OutlierFrames(self, threshold):
+        """
+        Return a fileseq.FrameSet of the frames whose file size differs from
+        the median size of all of the frames by more than the given fraction
+        of the median (i.e. 0.5 for frames less than half or more than one
+        and a half times the median).
+        """
+        if not self.sizes:
+            return fileseq.FrameSet("")
+
+        if numpy is not None:
+            sizes = numpy.frombuffer(self.sizes, dtype=numpy.int64)
+            median = float(numpy.median(sizes))
+            return self._FramesWhere(
+                        numpy.abs(sizes - median) > threshold * median)
+
+        median = statistics.median(self.sizes)
+        return self._FramesWhere(abs(size - median) > threshold * median
+                                 for size in self.sizes)
+
+    def FramesOlderThan(self, reference_time):
+        """
+        Return a fileseq.FrameSet of the frames whose files were last
+        modified before the given time in seconds since the epoch.
+        """
+        if numpy is not None:
+            return self._FramesWhere(numpy.frombuffer(
+                                self.mtimes, dtype=numpy.float64) <
+                                     reference_time)
+        return self._FramesWhere(mtime < reference_time
+                                 for mtime in self.mtimes)
+
+    def _FramesWhere(self, selected):
+        """
+        Return a fileseq.FrameSet of the frames for which selected (a NumPy
+        boolean array or an iterable of bools parallel to the frames) is
+        true.
+        """
+        if numpy is not None and isinstance(selected, numpy.ndarray):
+            frames = numpy.frombuffer(self.frames, dtype=numpy.int64)
+            frames = frames[selected].tolist()
+        else:
+            frames = itertools.compress(self.frames, selected)
+
+        builder = iosequenceranges.FrameRangeBuilder()
+        for frame in frames:
+            builder.Add(frame)
+        return builder.FrameSet()
+
+
+def CollectFrameMetadata(sequence, stat_threshold=STAT_THRESHOLD):
+    """
+    Gather the size and modification time of every frame of a
+    fileseq.FileSequence that exists on disk.
+
+    The sequence's directory is scanned once and only the entries matching
+    the sequence are stat-ed; small frame sets are stat-ed frame by frame
+    instead. Either way, directories and files that cannot be stat-ed
+    (including those that cannot be accessed) are skipped, like missing
+    frames. Sequences using subframes are not supported.
+
+    Returns a FrameMetadata object.
+    """
+    if sequence.decimalPlaces():
+        raise ValueError("Frame metadata is not supported for sequences "
+                         "with subframes: {}".format(sequence))
+
+    frame_set = sequence.frameSet()
+    metadata = FrameMetadata()
+    if frame_set is None or frame_set.is_null:
+        return metadata
+
+    add_frame = metadata.frames.append
+    add_size = metadata.sizes.append
+    add_mtime = metadata.mtimes.append
+
+    if len(frame_set) <= stat_threshold:
+        for frame in frame_set:
+            stat_result = _StatFrameFile(os.stat, sequence.frame(frame))
+            if stat_result is None:
+                continue
+            add_frame(frame)
+            add_size(stat_result.st_size)
+            add_mtime(stat_result.st_mtime)
+    else:
+        match_frame = FrameMatcher(sequence)
+        contains = FrameSetContains(frame_set)
+        try:
+            with os.scandir(sequence.dirname() or os.curdir) as entries:
+                for entry in entries:
+                    frame = match_frame(entry.name)
+                    if frame is None or not contains(frame):
+                        continue
+                    stat_result = _StatFrameFile(os.DirEntry.stat, entry)
+                    if stat_result is None:
+                        continue
+                    add_frame(frame)
+                    add_size(stat_result.st_size)
+                    add_mtime(stat_result.st_mtime)
+        except _UNREADABLE_ERRORS:
+            return metadata
+
+    # Directory entries are listed in an arbitrary order.
+    if len(metadata) > 1:
+        if numpy is not None:
+            order = numpy.argsort(numpy.frombuffer(metadata.frames,
+                                                   dtype=numpy.int64))
+        else:
+            order = sorted(range(len(metadata)),
+                           key=metadata.frames.__getitem__)
+        metadata.frames = _Reorder(metadata.frames, order)
+        metadata.sizes = _Reorder(metadata.sizes, order)
+        metadata.mtimes = _Reorder(metadata.mtimes, order)
+    return metadata
+
+
+# Errors for files (or directories) treated as missing by
+# CollectFrameMetadata.
+_UNREADABLE_ERRORS = (FileNotFoundError, NotADirectoryError, PermissionError)
+
+
+def _StatFrameFile(stat_function, path):
+    """
+    Return the result of stat_function (following symlinks) for the file of
+    a frame, or None if it is missing, cannot be accessed or is a
+    directory.
+    """
+    try:
+        stat_result = stat_function(path)
+    except _UNREADABLE_ERRORS:
+        # Includes dangling symlinks and files removed during a scan.
+        return None
+    if stat.S_ISDIR(stat_result.st_mode):
+        return None
+    return stat_result
+
+
+def _Reorder(column, order):
+    """
+    Return a copy of an array with its items in the given order of indices.
+    """
+    if numpy is not None:
+        values = numpy.frombuffer(column, dtype=column.typecode)[order]
+        return array.array(column.typecode, values.tobytes())
+    return array.array(column.typecode, (column[i] for i in order))
+
+
+def FindSequenceOnDisk(file_pattern):
+    """
+    Find the single sequence on disk matching the given file pattern using
+    fileseq.findSequenceOnDisk, preserving the pattern's padding. The result
+    is cached with the listing of the pattern's directory (and in the
+    persistent index, if one is enabled).
+
+    Raises fileseq.FileSeqException if no (or more than one) sequence is
+    found.
+    """
+    def find_sequence(listing):
+        try:
+            return fileseq.findSequenceOnDisk(
+                                    file_pattern,
+                                    preserve_padding=True,
+                                    pad_style=fileseq.PAD_STYLE_HASH1)
+        except fileseq.FileSeqException as e:
+            return e
+
+    # Wildcards in the directory cannot be tied to a single directory.
+    dirname = os.path.dirname(file_pattern)
+    if _GLOB_CHARS_RE.search(dirname):
+        result = find_sequence(None)
+    else:
+        result = iosequencedircache.Query(dirname,
+                                          ("sequence", file_pattern),
+                                          find_sequence,
+                                          codec=_SEQUENCE_RESULT_CODEC)
+    if isinstance(result, fileseq.FileSeqException):
+        raise result
+    return result.copy()
+
+
+def DirectorySequences(dirpath, file_pattern="", directory_cache=None):
+    """
+    Return the sequences of the files in a directory, equivalent to calling
+    fileseq.findSequencesOnDisk with the directory (or with the file pattern
+    in the directory, if one is given). Hidden files are skipped.
+
+    The sequences are cached with the directory's listing in the given
+    iosequencedircache.DirectoryCache (or the shared cache), and in its
+    persistent index if it has one.
+
+    Returns a list of fileseq.FileSequence objects.
+    """
+    if directory_cache is None:
+        directory_cache = iosequencedircache.cache
+    match = None
+    if file_pattern:
+        match = _FilePatternMatcher(file_pattern)
+
+    def find_sequences(listing):
+        if listing is None:
+            return []
+        names = [name for name in listing.files if not name.startswith(".")]
+        if match is not None:
+            names = [name for name in names if match(name)]
+        # Sequences are grouped and cached without their directory so that
+        # any spelling of the directory's path shares the result.
+        return fileseq.findSequencesInList(names,
+                                           pad_style=fileseq.PAD_STYLE_HASH1)
+
+    sequences = directory_cache.Query(dirpath,
+                                      ("sequences", file_pattern),
+                                      find_sequences,
+                                      codec=_SEQUENCE_LIST_CODEC)
+
+    if not dirpath.endswith(os.sep):
+        dirpath += os.sep
+    results = []
+    for sequence in sequences:
+        sequence = sequence.copy()
+        sequence.setDirname(dirpath)
+        results.append(sequence)
+    return results
+
+
+def FindSequencesOnDiskBatch(file_patterns):
+    """
+    Find the sequences on disk matching each of the given file patterns,
+    equivalent to calling fileseq.findSequencesOnDisk for each pattern.
+
+    Patterns are grouped by directory so that each directory is only listed
+    once no matter how many patterns refer to it.
+
+    Returns a list containing a list of fileseq.FileSequence objects for each
+    pattern.
+    """
+    def is_directory(path):
+        # Answer from the listing of the parent directory where possible.
+        parent, name = os.path.split(path)
+        if not parent or not name:
+            return os.path.isdir(path)
+        try:
+            listing = iosequencedircache.Listing(parent)
+        except OSError:
+            return False
+        return listing is not None and name in listing.dirs
+
+    results = []
+    for file_pattern in file_patterns:
+        # A pattern naming a directory finds all of the sequences in that
+        # directory, otherwise the file name is used to filter the files.
+        if is_directory(file_pattern):
+            dirpath, filepat = file_pattern, ""
+        else:
+            dirpath, filepat = os.path.split(file_pattern)
+            if not filepat:
+                results.append([])
+                continue
+
+        if not dirpath:
+            results.append([])
+            continue
+        try:
+            results.append(DirectorySequences(dirpath, filepat))
+        except OSError:
+            results.append([])
+    return results
+
+
+def WalkSequences(root, max_depth=-1, include=(), exclude=(),
+                  max_workers=WALK_WORKERS):
+    """
+    Recursively find the sequences in every directory beneath root, listing
+    directories across a pool of worker threads.
+
+    Args:
+        root: Directory to start the search from.
+        max_depth: Maximum number of directories below root to descend
+            into; a negative value has no limit.
+        include: Glob patterns for file names to include; if empty, all
+            files are included.
+        exclude: Glob patterns for file and directory names to exclude.
+            Excluded directories are not descended into.
+        max_workers: Number of threads used to list directories (at least
+            one).
+
+    Yields (dirpath, sequences) tuples for each directory containing
+    sequences as soon as that directory has been listed, so results are
+    available before the walk finishes. Hidden files and directories are
+    skipped.
+    """
+    def excluded(name):
+        return (name.startswith(".") or
+                any(fnmatch.fnmatchcase(name, pattern) for pattern in exclude))
+
+    def included(name):
+        return (not include or
+                any(fnmatch.fnmatchcase(name, pattern) for pattern in include))
+
+    def scan(dirpath, depth):
+        files = []
+        subdirs = []
+        try:
+            with os.scandir(dirpath) as entries:
+                for entry in entries:
+                    if excluded(entry.name):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                            continue
+                        # Links to directories are not followed to avoid
+                        # cycles, and are not files either.
+                        if entry.is_symlink() and entry.is_dir():
+                            continue
+                    except OSError:
+                        pass
+                    if included(entry.name):
+                        files.append(entry.path)
+        except OSError:
+            pass
+
+        sequences = []
+        if files:
+            sequences = fileseq.findSequencesInList(
+                                        files,
+                                        pad_style=fileseq.PAD_STYLE_HASH1)
+        return dirpath, depth, subdirs, sequences
+
+    with concurrent.futures.ThreadPoolExecutor(
+                                    max(max_workers, 1)) as executor:
+        pending = {executor.submit(scan, root, 0)}
+        while pending:
+            done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                dirpath, depth, subdirs, sequences = future.result()
+                if max_depth < 0 or depth < max_depth:
+                    for subdir in subdirs:
+                        pending.add(executor.submit(scan, subdir, depth + 1))
+                if sequences:
+                    yield dirpath, sequences
+
+
+def SequenceFromDict(state):
+    """
+    Rebuild a sequence from the state returned by its to_dict method with
+    fileseq.FileSequence.from_dict, without parsing its pattern again.
+    from_dict cannot read the state of a sequence without a frame set, so
+    those sequences are rebuilt with an empty frame set which is then
+    removed.
+    """
+    if state["_frameSet"] is not None:
+        return fileseq.FileSequence.from_dict(state)
+
+    sequence = fileseq.FileSequence.from_dict(
+                dict(state, _frameSet=fileseq.FrameSet("").__getstate__()))
+    padding = sequence.padding()
+    sequence.setFrameSet(None)
+    if not padding:
+        # Removing the frame set gives a sequence without padding the
+        # default padding.
+        sequence.setPadding(padding)
+    return sequence
+
+
+def _EncodeSequence(sequence):
+    return sequence.to_dict()
+
+
+def _EncodeSequenceResult(result):
+    if isinstance(result, fileseq.FileSeqException):
+        return {"error": str(result)}
+    return {"sequence": _EncodeSequence(result)}
+
+
+def _DecodeSequenceResult(value):
+    if "error" in value:
+        return fileseq.FileSeqException(value["error"])
+    return SequenceFromDict(value["sequence"])
+
+
+# Codecs storing query results in the persistent index.
+_SEQUENCE_LIST_CODEC = (
+        lambda sequences: [_EncodeSequence(sequence)
+                           for sequence in sequences],
+        lambda value: [SequenceFromDict(item) for item in value])
+_SEQUENCE_RESULT_CODEC = (_EncodeSequenceResult, _DecodeSequenceResult)
+
+
+def _FilePatternMatcher(filepat):
+    """
+    Return a match function for file names matching the given file pattern
+    using the same rules as fileseq.findSequencesOnDisk. Padding characters
+    match any frame number and "?", "*" and "{a,b}" are treated as shell
+    wildcards.
+    """
+    try:
+        sequence = fileseq.FileSequence(filepat,
+                                        pad_style=fileseq.PAD_STYLE_HASH1)
+    except fileseq.ParseException:
+        return lambda name: False
+
+    pattern = _GlobToRegex(sequence.basename())
+    if sequence.padding():
+        pattern += r"(\d+)"
+    pattern += _GlobToRegex(sequence.extension())
+    try:
+        return re.compile(r"\A" + pattern + r"\Z").match
+    except re.error:
+        raise fileseq.FileSeqException(
+                        "Invalid file pattern: {!r}".format(filepat))
+
+
+def _GlobToRegex(pattern):
+    """
+    Convert the shell wildcards in a (part of a) file name to a regular
+    expression, escaping everything else.
+    """
+    escaped = re.escape(pattern)
+    escaped = escaped.replace(r"\*", ".*").replace(r"\?", ".")
+
+    def brace_group(match):
+        options = [option.strip() for option in match.group(1).split(",")]
+        return "(?:{})".format("|".join(options))
+    return re.sub(r"\\\{(.*?)\\\}", brace_group, escaped)
@@ -0,0 +1,359 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Copy, move and link the frames of sequences in parallel.
+
+Frames are written to a hidden temporary file alongside their destination
+and renamed into place once complete, so partially written frames are
+never visible under their final name. Copies use os.copy_file_range or
+os.sendfile where the platform supports them so that the data does not
+pass through Python.
+"""
+
+import errno
+import os
+import shutil
+import sys
+import tempfile
+
+import fileseq
+
+import iosequencedircache
+import iosequencedisk
+import iosequenceranges
+
+
+COPY = "copy"
+MOVE = "move"
+SYMLINK = "symlink"
+HARDLINK = "hardlink"
+OPERATIONS = (COPY, MOVE, SYMLINK, HARDLINK)
+
+# Default number of threads transferring frames.
+TRANSFER_WORKERS = 8
+
+# Number of frames transferred by each task.
+TRANSFER_CHUNK_SIZE = 16
+
+# Maximum number of bytes copied by each copy_file_range/sendfile call.
+_COPY_BLOCK_SIZE = 64 * 1024 * 1024
+
+# Errors raised by the zero-copy system calls when they cannot be used for
+# a pair of files, in which case the next method is tried.
+_UNSUPPORTED_ERRNOS = frozenset(
+            error for error in (errno.ENOSYS, errno.EXDEV, errno.EINVAL,
+                                getattr(errno, "ENOTSUP", None),
+                                getattr(errno, "EOPNOTSUPP", None),
+                                errno.EBADF)
+            if error is not None)
+
+# Results of transferring a single frame.
+_TRANSFERRED = 0
+_SKIPPED = 1
+_FAILED = 2
+
+
+class TransferResult(object):
+    """
+    The outcome of transferring the frames of a sequence. Frame sets hold
+    source frame numbers unless stated otherwise.
+
+    Attributes:
+        transferred: fileseq.FrameSet of the frames that were transferred
+            (or would have been, for a dry run).
+        skipped: fileseq.FrameSet of the frames skipped because the
+            destination was already identical.
+        failed: fileseq.FrameSet of the frames that could not be
+            transferred.
+        errors: List of (frame, message) tuples for the failed frames.
+        destination_frames: fileseq.FrameSet of the destination frame
+            numbers of the transferred and skipped frames.
+    """
+    __slots__ = ("transferred", "skipped", "failed", "errors",
+                 "destination_frames")
+
+    def __init__(self, transferred, skipped, failed, errors,
+                 destination_frames):
+        self.transferred = transferred
+        self.skipped = skipped
+        self.failed = failed
+        self.errors = errors
+        self.destination_frames = destination_frames
+
+
+def TransferSequence(source, destination, operation=COPY, frame_offset=0,
+                     max_workers=TRANSFER_WORKERS, dry_run=False,
+                     skip_identical=False):
+    """
+    Copy, move, symlink or hardlink the frames of the source
+    fileseq.FileSequence to the destination.
+
+    Args:
+        source: Sequence whose frames are transferred.
+        destination: Sequence providing the destination path pattern; its
+            frame set is ignored. It must have frame padding so that each
+            frame has its own destination path.
+        operation: One of COPY, MOVE, SYMLINK or HARDLINK.
+        frame_offset: Number added to each source frame to give its
+            destination frame.
+        max_workers: Number of threads transferring frames.
+        dry_run: If True nothing is written; the frames that would be
+            transferred or skipped are reported.
+        skip_identical: If True frames whose destination is already
+            identical are skipped. Copies and moves are identical if the
+            size and modification time match; links are identical if they
+            already refer to the source. A move removes the source of a
+            skipped frame.
+
+    Returns a TransferResult. Errors transferring individual frames are
+    reported in the result rather than raised.
+    """
+    if operation not in OPERATIONS:
+        raise ValueError("Unknown operation {!r}; expected one of: "
+                         "{}".format(operation, ", ".join(OPERATIONS)))
+    if not destination.padding():
+        # Every frame would be written to the same path.
+        raise ValueError("Destination has no frame padding: {}".format(
+                                                            destination))
+
+    transfer = _OPERATIONS[operation]
+    frame_set = source.frameSet()
+    if frame_set is None:
+        frame_set = fileseq.FrameSet("")
+
+    destination_dir = destination.dirname()
+    if destination_dir and not dry_run:
+        os.makedirs(destination_dir, exist_ok=True)
+
+    def transfer_frames(frames):
+        results = []
+        for frame in frames:
+            source_path = source.frame(frame)
+            destination_path = destination.frame(frame + frame_offset)
+            if (os.path.abspath(source_path) ==
+                    os.path.abspath(destination_path)):
+                results.append((_FAILED, "Source and destination are the "
+                                         "same file: {}".format(source_path)))
+                continue
+            try:
+                if skip_identical and _IDENTICAL[operation](
+                                        source_path, destination_path):
+                    if operation == MOVE and not dry_run:
+                        # The frame is already in place; finish the move.
+                        os.unlink(source_path)
+                    results.append((_SKIPPED, None))
+                    continue
+                if dry_run:
+                    # Only check that the source frame exists.
+                    os.stat(source_path)
+                else:
+                    transfer(source_path, destination_path)
+                results.append((_TRANSFERRED, None))
+            except OSError as e:
+                results.append((_FAILED, iosequencedisk.ErrorMessage(e)))
+        return results
+
+    transferred = iosequenceranges.FrameRangeBuilder()
+    skipped = iosequenceranges.FrameRangeBuilder()
+    failed = iosequenceranges.FrameRangeBuilder()
+    destination_frames = iosequenceranges.FrameRangeBuilder()
+    errors = []
+    try:
+        for frame, (status, message) in iosequencedisk.MapChunks(
+                                        transfer_frames, frame_set,
+                                        max_workers, TRANSFER_CHUNK_SIZE):
+            if status == _FAILED:
+                failed.Add(frame)
+                errors.append((frame, message))
+                continue
+            if status == _TRANSFERRED:
+                transferred.Add(frame)
+            else:
+                skipped.Add(frame)
+            destination_frames.Add(frame + frame_offset)
+    finally:
+        if not dry_run:
+            # Cached listings of the directories no longer match the disk.
+            iosequencedircache.Invalidate(destination_dir)
+            if operation == MOVE:
+                iosequencedircache.Invalidate(source.dirname())
+
+    return TransferResult(transferred.FrameSet(), skipped.FrameSet(),
+                          failed.FrameSet(), errors,
+                          destination_frames.FrameSet())
+
+
+def _TemporaryPath(path):
+    """
+    Create an empty hidden file with a unique name in the same directory as
+    path to write to before renaming it into place, and return its path.
+    """
+    dirname, basename = os.path.split(path)
+    fd, temporary_path = tempfile.mkstemp(prefix=".{}.".format(basename),
+                                          suffix=".partial",
+                                          dir=dirname or None)
+    os.close(fd)
+    return temporary_path
+
+
+def _Publish(path, write):
+    """
+    Call write with the path of an empty temporary file and rename the
+    result to path.
+    """
+    temporary_path = _TemporaryPath(path)
+    try:
+        write(temporary_path)
+        os.replace(temporary_path, path)
+    except BaseException:
+        try:
+            os.unlink(temporary_path)
+        except OSError:
+            pass
+        raise
+
+
+def CopyFile(source_path, destination_path):
+    """
+    Copy a file's data and metadata (including its modification time),
+    without the data passing through Python where the platform allows it.
+    """
+    def write(temporary_path):
+        with open(source_path, "rb") as source_file, \
+                open(temporary_path, "wb") as destination_file:
+            _CopyData(source_file, destination_file)
+        shutil.copystat(source_path, temporary_path)
+    _Publish(destination_path, write)
+
+
+def _CopyData(source_file, destination_file):
+    """
+    Copy all of the data of an open file to another, trying
+    os.copy_file_range, then os.sendfile, then a buffered copy.
+    """
+    source_fd = source_file.fileno()
+    destination_fd = destination_file.fileno()
+
+    for zero_copy in (_CopyFileRange, _SendFile):
+        try:
+            if zero_copy(source_fd, destination_fd):
+                return
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+        # Nothing has been written if the call is not supported.
+        if os.lseek(destination_fd, 0, os.SEEK_CUR):
+            break
+
+    source_file.seek(0)
+    destination_file.seek(0)
+    destination_file.truncate()
+    shutil.copyfileobj(source_file, destination_file)
+
+
+def _CopyFileRange(source_fd, destination_fd):
+    """
+    Copy with os.copy_file_range. Returns False if it is not available.
+    """
+    if not hasattr(os, "copy_file_range"):
+        return False
+    while os.copy_file_range(source_fd, destination_fd, _COPY_BLOCK_SIZE):
+        pass
+    return True
+
+
+def _SendFile(source_fd, destination_fd):
+    """
+    Copy with os.sendfile. Returns False if it is not available or cannot
+    write to files on this platform.
+    """
+    if not hasattr(os, "sendfile") or not sys.platform.startswith("linux"):
+        return False
+    offset = 0
+    while True:
+        sent = os.sendfile(destination_fd, source_fd, offset,
+                           _COPY_BLOCK_SIZE)
+        if not sent:
+            return True
+        offset += sent
+
+
+def _MoveFile(source_path, destination_path):
+    try:
+        os.replace(source_path, destination_path)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        # Moving across filesystems; copy then remove the source.
+        CopyFile(source_path, destination_path)
+        os.unlink(source_path)
+
+
+def _Symlink(source_path, destination_path):
+    # Fail rather than create a dangling link for missing frames.
+    os.stat(source_path)
+    source_path = os.path.abspath(source_path)
+    _Publish(destination_path, lambda temporary_path: _ReplaceWithLink(
+                                os.symlink, source_path, temporary_path))
+
+
+def _Hardlink(source_path, destination_path):
+    _Publish(destination_path, lambda temporary_path: _ReplaceWithLink(
+                                os.link, source_path, temporary_path))
+
+
+def _ReplaceWithLink(link, source_path, temporary_path):
+    # The temporary file only reserves a unique name for the link; the link
+    # fails rather than replacing anything created in its place.
+    os.unlink(temporary_path)
+    link(source_path, temporary_path)
+
+
+def _SameData(source_path, destination_path):
+    source_stat = os.stat(source_path)
+    try:
+        destination_stat = os.stat(destination_path)
+    except FileNotFoundError:
+        return False
+    return (source_stat.st_size == destination_stat.st_size and
+            source_stat.st_mtime_ns == destination_stat.st_mtime_ns)
+
+
+def _SameLink(source_path, destination_path):
+    os.stat(source_path)
+    try:
+        return (os.readlink(destination_path) ==
+                os.path.abspath(source_path))
+    except OSError:
+        return False
+
+
+def _SameFile(source_path, destination_path):
+    os.stat(source_path)
+    try:
+        return os.path.samefile(source_path, destination_path)
+    except FileNotFoundError:
+        return False
+
+
+_OPERATIONS = {COPY: CopyFile,
+               MOVE: _MoveFile,
+               SYMLINK: _Symlink,
+               HARDLINK: _Hardlink}
+
+_IDENTICAL = {COPY: _SameData,
+              MOVE: _SameData,
+              SYMLINK: _SameLink,
+              HARDLINK: _SameFile}
@@ -0,0 +1,337 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Content digests of the frames of sequences.
+
+Frames are hashed across a pool of threads; hashlib releases the GIL while
+hashing large buffers, so the threads hash and read in parallel without
+the cost of starting processes. Digests are stored in a persistent SQLite
+cache keyed on the path, size and modification time of each frame so that
+unchanged frames are not read again on later runs.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+
+import fileseq
+
+import iosequencedircache
+import iosequencedisk
+import iosequenceranges
+
+
+DEFAULT_ALGORITHM = "sha256"
+
+# Default number of threads hashing frames.
+HASH_WORKERS = 8
+
+# Size of the buffer each thread reads frames into.
+_READ_BUFFER_SIZE = 4 * 1024 * 1024
+
+# Environment variable overriding the location of the shared cache.
+CACHE_PATH_ENV = "IOSEQUENCE_HASH_CACHE"
+
+# Number of seconds to wait for another process writing to the cache.
+_CACHE_TIMEOUT = 30.0
+
+
+class SequenceDigest(object):
+    """
+    The digests of the frames of a sequence.
+
+    Attributes:
+        frames: List of the frames that were hashed, in frame order.
+        digests: List of the hex digests of the frames, parallel to frames.
+        sequence_digest: Hex digest of the whole sequence. It is computed
+            from the sorted frame digests so it does not depend on the
+            order or numbering of the frames.
+        missing: fileseq.FrameSet of the frames that do not exist.
+        failed: fileseq.FrameSet of the frames that could not be read.
+        errors: List of (frame, message) tuples for the failed frames.
+        cached_count: Number of digests read from the cache.
+    """
+    __slots__ = ("frames", "digests", "sequence_digest", "missing",
+                 "failed", "errors", "cached_count")
+
+    def __init__(self, frames, digests, sequence_digest, missing, failed,
+                 errors, cached_count):
+        self.frames = frames
+        self.digests = digests
+        self.sequence_digest = sequence_digest
+        self.missing = missing
+        self.failed = failed
+        self.errors = errors
+        self.cached_count = cached_count
+
+
+class HashCache(object):
+    """
+    Persistent cache of frame digests stored in an SQLite database. A
+    digest is only returned while the size and modification time of its
+    file are unchanged. Files modified too recently for a rewrite to be
+    guaranteed to change their modification time (see
+    iosequencedircache.IsRacy) are never cached. The database may be shared
+    by several processes.
+    """
+    def __init__(self, path):
+        self._path = path
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def Lookup(self, dirpath, algorithm):
+        """
+        Return a dictionary mapping the absolute paths of the cached files
+        in the given directory to (size, mtime_ns, digest) tuples.
+        """
+        with self._Connect() as connection:
+            rows = connection.execute(
+                        "SELECT path, size, mtime_ns, digest FROM digests "
+                        "WHERE dirname = ? AND algorithm = ?",
+                        (_DirKey(dirpath), algorithm))
+            return {path: (size, mtime_ns, digest)
+                    for path, size, mtime_ns, digest in rows}
+
+    def Store(self, algorithm, entries):
+        """
+        Store digests given as (path, size, mtime_ns, digest) tuples, where
+        path is absolute. Entries whose modification time is racy are
+        skipped.
+        """
+        entries = [entry for entry in entries
+                   if not iosequencedircache.IsRacy(entry[2])]
+        if not entries:
+            return
+        with self._Connect() as connection:
+            connection.executemany(
+                        "INSERT OR REPLACE INTO digests (path, algorithm, "
+                        "dirname, size, mtime_ns, digest) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        ((path, algorithm, os.path.dirname(path), size,
+                          mtime_ns, digest)
+                         for path, size, mtime_ns, digest in entries))
+
+    def Clear(self):
+        """
+        Remove every digest from the cache.
+        """
+        with self._Connect() as connection:
+            connection.execute("DELETE FROM digests")
+
+    def _Connect(self):
+        connection = sqlite3.connect(self._path, timeout=_CACHE_TIMEOUT)
+        with self._lock:
+            if not self._initialized:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute(
+                        "CREATE TABLE IF NOT EXISTS digests ("
+                        "path TEXT NOT NULL, algorithm TEXT NOT NULL, "
+                        "dirname TEXT NOT NULL, size INTEGER NOT NULL, "
+                        "mtime_ns INTEGER NOT NULL, digest TEXT NOT NULL, "
+                        "PRIMARY KEY (path, algorithm))")
+                connection.execute(
+                        "CREATE INDEX IF NOT EXISTS digests_dirname "
+                        "ON digests (dirname, algorithm)")
+                connection.commit()
+                self._initialized = True
+        return _ClosingConnection(connection)
+
+
+class _ClosingConnection(object):
+    """
+    Commit (or roll back) and close an SQLite connection on exit.
+    """
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __enter__(self):
+        return self._connection
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self._connection.commit()
+            else:
+                self._connection.rollback()
+        finally:
+            self._connection.close()
+
+
+def DefaultCachePath():
+    """
+    Return the path of the shared cache database, taken from the
+    IOSEQUENCE_HASH_CACHE environment variable if it is set.
+    """
+    path = os.environ.get(CACHE_PATH_ENV)
+    if path:
+        return path
+    cache_home = (os.environ.get("XDG_CACHE_HOME") or
+                  os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(cache_home, "iograft-fileseq", "frame_digests.db")
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def GetCache(path=None):
+    """
+    Return the HashCache for the given database path (or the default
+    path), creating its directory if needed.
+    """
+    path = os.path.abspath(path or DefaultCachePath())
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            cache = _caches[path] = HashCache(path)
+        return cache
+
+
+def HashFile(path, algorithm=DEFAULT_ALGORITHM, buffer=None):
+    """
+    Return the hex digest of the contents of a file. buffer is an optional
+    bytearray to read the file into.
+    """
+    digest = hashlib.new(algorithm)
+    if buffer is None:
+        buffer = bytearray(_READ_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as frame_file:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(frame_file.fileno(), 0, 0,
+                             os.POSIX_FADV_SEQUENTIAL)
+        while True:
+            size = frame_file.readinto(view)
+            if not size:
+                break
+            digest.update(view[:size])
+    return digest.hexdigest()
+
+
+def HashSequence(sequence, algorithm=DEFAULT_ALGORITHM,
+                 max_workers=HASH_WORKERS, cache=None):
+    """
+    Compute the digest of every frame of a fileseq.FileSequence and of the
+    sequence as a whole.
+
+    Args:
+        sequence: Sequence whose frames are hashed.
+        algorithm: Name of a hashlib algorithm.
+        max_workers: Number of threads hashing frames.
+        cache: Optional HashCache. Frames whose size and modification time
+            match the cache are not read.
+
+    Returns a SequenceDigest. Frames that do not exist or cannot be read
+    are reported in the result rather than raised.
+    """
+    # Fail early for unknown algorithms.
+    hashlib.new(algorithm)
+
+    frame_set = sequence.frameSet()
+    if frame_set is None:
+        frame_set = fileseq.FrameSet("")
+
+    cached = {}
+    if cache is not None:
+        cached = cache.Lookup(sequence.dirname(), algorithm)
+
+    buffers = threading.local()
+
+    def hash_frame(frame):
+        path = os.path.abspath(sequence.frame(frame))
+        before = os.stat(path)
+        # A file modified within its modification time's resolution could
+        # be rewritten at the same size without changing it, so its cached
+        # digest is not trusted and its new digest is not stored.
+        racy = iosequencedircache.IsRacy(before.st_mtime_ns)
+        entry = cached.get(path)
+        if (entry is not None and not racy and
+                entry[0] == before.st_size and
+                entry[1] == before.st_mtime_ns):
+            return entry[2], None, True
+
+        buffer = getattr(buffers, "buffer", None)
+        if buffer is None:
+            buffer = buffers.buffer = bytearray(_READ_BUFFER_SIZE)
+        digest = HashFile(path, algorithm, buffer)
+
+        # Only cache the digest if the frame did not change while it was
+        # being read.
+        after = os.stat(path)
+        if racy or (after.st_size, after.st_mtime_ns) != (before.st_size,
+                                                           before.st_mtime_ns):
+            return digest, None, False
+        return (digest, (path, after.st_size, after.st_mtime_ns, digest),
+                False)
+
+    def hash_frames(frames):
+        # Return a (result, error) tuple for each frame, where error is the
+        # OSError raised for the frame, if any.
+        results = []
+        for frame in frames:
+            try:
+                results.append((hash_frame(frame), None))
+            except OSError as e:
+                results.append((None, e))
+        return results
+
+    frames = []
+    digests = []
+    missing = iosequenceranges.FrameRangeBuilder()
+    failed = iosequenceranges.FrameRangeBuilder()
+    errors = []
+    new_entries = []
+    cached_count = 0
+    # Each frame is hashed by its own task, as frames can be large.
+    for frame, (result, error) in iosequencedisk.MapChunks(
+                                    hash_frames, frame_set, max_workers, 1):
+        if error is not None:
+            if isinstance(error, (FileNotFoundError, NotADirectoryError)):
+                missing.Add(frame)
+            else:
+                failed.Add(frame)
+                errors.append((frame, iosequencedisk.ErrorMessage(error)))
+            continue
+        digest, entry, from_cache = result
+        frames.append(frame)
+        digests.append(digest)
+        if entry is not None:
+            new_entries.append(entry)
+        cached_count += from_cache
+
+    if cache is not None:
+        cache.Store(algorithm, new_entries)
+
+    return SequenceDigest(frames, digests,
+                          CombineDigests(digests, algorithm),
+                          missing.FrameSet(), failed.FrameSet(), errors,
+                          cached_count)
+
+
+def CombineDigests(digests, algorithm=DEFAULT_ALGORITHM):
+    """
+    Return the hex digest of a collection of hex digests that does not
+    depend on their order.
+    """
+    combined = hashlib.new(algorithm)
+    for digest in sorted(digests):
+        combined.update(bytes.fromhex(digest))
+    return combined.hexdigest()
+
+
+def _DirKey(dirpath):
+    return os.path.abspath(dirpath or os.curdir)
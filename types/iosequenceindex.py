@@ -0,0 +1,397 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Persistent index of directory listings and the sequences found in them.
+
+The index is an SQLite database recording, for each directory, its
+modification time, its listing and the results of the sequence queries
+made against it. Once attached to the shared directory cache (see Enable;
+the disk nodes enable it when the IOSEQUENCE_INDEX environment variable is
+set) a directory that has not been modified since it was indexed is answered
+from the index without being listed again; a modified directory is listed
+and its entry replaced.
+
+The index can be pre-warmed for a whole tree from the command line:
+
+    python iosequenceindex.py warm /path/to/archive [--index PATH]
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import weakref
+import zlib
+
+import iosequencedircache
+import iosequencedisk
+
+
+# Environment variable overriding the location of the shared index.
+INDEX_PATH_ENV = "IOSEQUENCE_INDEX"
+
+# Number of seconds to wait for another process writing to the index.
+_INDEX_TIMEOUT = 30.0
+
+_SEPARATOR = "\0"
+
+
+class SequenceIndex(object):
+    """
+    Persistent index of directory listings and query results stored in an
+    SQLite database. Entries are keyed on the absolute path and the
+    modification time of the directory. The database may be shared by
+    several processes.
+
+    Each thread querying the index keeps its own connection open between
+    queries. The connections are closed when their thread exits or when
+    the index is closed (see Close); the index can also be used as a
+    context manager.
+    """
+    def __init__(self, path):
+        self._path = path
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._local = threading.local()
+        self._connections = weakref.WeakSet()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.Close()
+
+    def Close(self):
+        """
+        Close the connections of every thread. It must not be called while
+        other threads are querying the index; a later query opens a new
+        connection.
+        """
+        with self._lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for connection in connections:
+            connection.Close()
+
+    def Listing(self, dirpath, mtime_ns):
+        """
+        Return the indexed iosequencedircache.DirectoryListing of the given
+        directory, or None if it is not indexed at the given modification
+        time.
+        """
+        with self._Connect() as connection:
+            row = connection.execute(
+                        "SELECT files, dirs, missing FROM directories "
+                        "WHERE dirpath = ? AND mtime_ns = ?",
+                        (dirpath, mtime_ns)).fetchone()
+        if row is None:
+            return None
+
+        files, dirs, missing = (_DecodeNames(column) for column in row)
+        dirs = set(dirs)
+        existing = set(files).difference(missing)
+        existing.update(dirs)
+        return iosequencedircache.DirectoryListing(files, dirs, existing)
+
+    def StoreListing(self, dirpath, mtime_ns, listing):
+        """
+        Index the listing of a directory at the given modification time,
+        replacing any previous entry and its query results. Listings of
+        directories whose modification time is racy (see
+        iosequencedircache.IsRacy) are not indexed.
+        """
+        if iosequencedircache.IsRacy(mtime_ns):
+            return
+        missing = [name for name in listing.files
+                   if name not in listing.existing]
+        with self._Connect() as connection:
+            connection.execute("DELETE FROM results WHERE dirpath = ?",
+                               (dirpath,))
+            connection.execute(
+                        "INSERT OR REPLACE INTO directories (dirpath, "
+                        "mtime_ns, files, dirs, missing) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (dirpath, mtime_ns, _EncodeNames(listing.files),
+                         _EncodeNames(sorted(listing.dirs)),
+                         _EncodeNames(missing)))
+
+    def Result(self, dirpath, mtime_ns, query):
+        """
+        Return the indexed result of a query of the given directory, or
+        None if it is not indexed at the given modification time.
+        """
+        with self._Connect() as connection:
+            row = connection.execute(
+                        "SELECT results.value FROM results "
+                        "JOIN directories USING (dirpath) "
+                        "WHERE dirpath = ? AND mtime_ns = ? AND query = ?",
+                        (dirpath, mtime_ns, query)).fetchone()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def StoreResult(self, dirpath, mtime_ns, query, value):
+        """
+        Index the result of a query of the given directory. The result is
+        only stored if the directory's listing is indexed at the given
+        modification time.
+        """
+        if iosequencedircache.IsRacy(mtime_ns):
+            return
+        data = zlib.compress(json.dumps(value,
+                                        separators=(",", ":")).encode("utf-8"))
+        with self._Connect() as connection:
+            connection.execute(
+                        "INSERT OR REPLACE INTO results (dirpath, query, "
+                        "value) SELECT dirpath, ?, ? FROM directories "
+                        "WHERE dirpath = ? AND mtime_ns = ?",
+                        (query, data, dirpath, mtime_ns))
+
+    def Stats(self):
+        """
+        Return a dictionary of the number of directories and query results
+        in the index.
+        """
+        with self._Connect() as connection:
+            directories, = connection.execute(
+                        "SELECT COUNT(*) FROM directories").fetchone()
+            results, = connection.execute(
+                        "SELECT COUNT(*) FROM results").fetchone()
+        return {"directories": directories, "results": results}
+
+    def Clear(self):
+        """
+        Remove every directory from the index.
+        """
+        with self._Connect() as connection:
+            connection.execute("DELETE FROM results")
+            connection.execute("DELETE FROM directories")
+
+    def _Connect(self):
+        thread_connection = getattr(self._local, "connection", None)
+        if thread_connection is not None and thread_connection.IsOpen():
+            return _Transaction(thread_connection.connection)
+
+        thread_connection = _ThreadConnection(self._path)
+        self._local.connection = thread_connection
+        connection = thread_connection.connection
+        with self._lock:
+            self._connections.add(thread_connection)
+            if not self._initialized:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute(
+                        "CREATE TABLE IF NOT EXISTS directories ("
+                        "dirpath TEXT PRIMARY KEY, "
+                        "mtime_ns INTEGER NOT NULL, files BLOB NOT NULL, "
+                        "dirs BLOB NOT NULL, missing BLOB NOT NULL)")
+                connection.execute(
+                        "CREATE TABLE IF NOT EXISTS results ("
+                        "dirpath TEXT NOT NULL, query TEXT NOT NULL, "
+                        "value BLOB NOT NULL, PRIMARY KEY (dirpath, query))")
+                connection.commit()
+                self._initialized = True
+        return _Transaction(connection)
+
+
+class _ThreadConnection(object):
+    """
+    SQLite connection used by a single thread, which is closed once the
+    thread no longer references it or by the index it belongs to (from any
+    thread).
+    """
+    __slots__ = ("connection", "_close", "__weakref__")
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path, timeout=_INDEX_TIMEOUT,
+                                          check_same_thread=False)
+        self._close = weakref.finalize(self, self.connection.close)
+
+    def IsOpen(self):
+        return self._close.alive
+
+    def Close(self):
+        self._close()
+
+
+class _Transaction(object):
+    """
+    Commit (or roll back) an SQLite connection's transaction on exit.
+    """
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __enter__(self):
+        return self._connection
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self._connection.commit()
+        else:
+            self._connection.rollback()
+
+
+def _EncodeNames(names):
+    return zlib.compress(_SEPARATOR.join(names).encode("utf-8",
+                                                       "surrogateescape"))
+
+
+def _DecodeNames(data):
+    names = zlib.decompress(data).decode("utf-8", "surrogateescape")
+    if not names:
+        return []
+    return names.split(_SEPARATOR)
+
+
+def DefaultIndexPath():
+    """
+    Return the path of the shared index database, taken from the
+    IOSEQUENCE_INDEX environment variable if it is set.
+    """
+    path = os.environ.get(INDEX_PATH_ENV)
+    if path:
+        return path
+    cache_home = (os.environ.get("XDG_CACHE_HOME") or
+                  os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(cache_home, "iograft-fileseq", "sequence_index.db")
+
+
+def OpenIndex(path=None):
+    """
+    Open the index at the given path (or the default path), creating its
+    directory if needed.
+    """
+    path = os.path.abspath(path or DefaultIndexPath())
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return SequenceIndex(path)
+
+
+def Enable(path=None):
+    """
+    Attach the index at the given path (or the default path) to the shared
+    directory cache so that all of the disk nodes use it. Returns the
+    SequenceIndex.
+    """
+    index = OpenIndex(path)
+    iosequencedircache.SetIndex(index)
+    return index
+
+
+def EnableFromEnvironment():
+    """
+    Enable the index at the path given by the IOSEQUENCE_INDEX environment
+    variable, if it is set. Returns the SequenceIndex or None.
+    """
+    if not os.environ.get(INDEX_PATH_ENV):
+        return None
+    if iosequencedircache.cache.Index() is not None:
+        return iosequencedircache.cache.Index()
+    return Enable()
+
+
+def Disable():
+    """
+    Detach the index from the shared directory cache and close it.
+    """
+    index = iosequencedircache.cache.Index()
+    iosequencedircache.SetIndex(None)
+    if index is not None:
+        index.Close()
+
+
+def WarmIndex(root, index, max_depth=-1,
+              max_workers=iosequencedisk.WALK_WORKERS):
+    """
+    Index every directory beneath root along with the sequences found in
+    it, listing directories across a pool of worker threads. Directories
+    that are already indexed and unmodified are not listed again. Hidden
+    directories are skipped.
+
+    Returns a dictionary of the number of directories visited and the
+    number that had to be listed.
+    """
+    cache = iosequencedircache.DirectoryCache(index=index)
+
+    def warm(dirpath, depth):
+        listing = cache.Listing(dirpath)
+        iosequencedisk.DirectorySequences(dirpath, directory_cache=cache)
+        subdirs = []
+        if listing is not None:
+            subdirs = [os.path.join(dirpath, name)
+                       for name in sorted(listing.dirs)
+                       if not name.startswith(".")]
+        return depth, subdirs
+
+    visited = 0
+    root = os.path.abspath(root)
+    with concurrent.futures.ThreadPoolExecutor(
+                                    max(max_workers, 1)) as executor:
+        pending = {executor.submit(warm, root, 0)}
+        while pending:
+            done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                depth, subdirs = future.result()
+                visited += 1
+                if max_depth < 0 or depth < max_depth:
+                    for subdir in subdirs:
+                        pending.add(executor.submit(warm, subdir, depth + 1))
+
+    stats = cache.Stats()
+    return {"directories": visited,
+            "listed": stats["misses"] - stats["index_hits"]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+                description="Manage the persistent sequence index.")
+    parser.add_argument("--index", default=None,
+                        help="Path of the index database (default: "
+                             "{})".format(DefaultIndexPath()))
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    warm_parser = commands.add_parser(
+                "warm", help="Index every directory beneath the given roots.")
+    warm_parser.add_argument("roots", nargs="+")
+    warm_parser.add_argument("--max-depth", type=int, default=-1)
+    warm_parser.add_argument("--workers", type=int,
+                             default=iosequencedisk.WALK_WORKERS)
+
+    commands.add_parser("stats", help="Print the size of the index.")
+    commands.add_parser("clear", help="Remove every entry from the index.")
+
+    args = parser.parse_args(argv)
+    with OpenIndex(args.index) as index:
+        if args.command == "warm":
+            for root in args.roots:
+                start = time.perf_counter()
+                stats = WarmIndex(root, index, max_depth=args.max_depth,
+                                  max_workers=args.workers)
+                print("{}: {} directories, {} listed in {:.2f}s".format(
+                            root, stats["directories"], stats["listed"],
+                            time.perf_counter() - start))
+        elif args.command == "stats":
+            for name, value in sorted(index.Stats().items()):
+                print("{}: {}".format(name, value))
+        elif args.command == "clear":
+            index.Clear()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
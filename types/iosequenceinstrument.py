@@ -0,0 +1,437 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Instrumentation of the Process methods of the fileseq nodes.
+
+Each node's Process method is wrapped with Instrumented. While a sink is
+enabled (see Enable; the types plugin enables one when the
+IOSEQUENCE_INSTRUMENT environment variable is set) every call records:
+
+- the wall time of the call;
+- the number of stat, lstat, scandir and listdir calls made through the os
+  module while it ran;
+- the number of frames in the sequences and frame sets it was given and
+  produced;
+- optionally, the size of its outputs serialized by their iograft types.
+
+and passes a ProcessRecord to the sink.
+
+Enabling a sink patches the os module's filesystem functions and
+iograft.GetInput/SetOutput for the whole process, not only for the fileseq
+nodes. Filesystem calls are therefore counted for the whole process, so
+calls made by nodes running concurrently are counted against each of them.
+Measuring the output sizes serializes every output a second time, so it is
+only done when requested (see Enable).
+
+While no sink is enabled nothing is patched and a wrapped Process method
+costs a single extra function call.
+
+IOSEQUENCE_INSTRUMENT takes one of:
+
+    memory              aggregate the records in memory (see EnabledSink)
+    jsonl:/path/file    append each record to a JSON-lines file
+    chrome:/path/file   write the records in the Chrome trace event format
+
+Output sizes are also measured if IOSEQUENCE_INSTRUMENT_OUTPUT_BYTES is set
+to 1. An invalid IOSEQUENCE_INSTRUMENT value is logged and ignored.
+"""
+
+import atexit
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+import fileseq
+import iograft
+
+import iosequencetypes
+
+
+# Environment variable selecting the sink enabled by EnableFromEnvironment.
+INSTRUMENT_ENV = "IOSEQUENCE_INSTRUMENT"
+
+# Environment variable enabling the measurement of the output sizes.
+OUTPUT_BYTES_ENV = "IOSEQUENCE_INSTRUMENT_OUTPUT_BYTES"
+
+# The filesystem calls counted while a sink is enabled.
+FILESYSTEM_CALLS = ("stat", "lstat", "scandir", "listdir")
+
+
+class ProcessRecord(object):
+    """
+    The measurements of a single call to a node's Process method.
+
+    Attributes:
+        node: Name of the node.
+        start_ns: time.perf_counter_ns() when the call started.
+        duration_ns: Wall time of the call in nanoseconds.
+        thread_id: Identifier of the thread the call ran on.
+        filesystem_calls: Dictionary of the number of each of the
+            FILESYSTEM_CALLS made while the call ran.
+        input_frames: Number of frames in the sequence and frame set inputs.
+        output_frames: Number of frames in the sequence and frame set
+            outputs.
+        output_bytes: Size of the serialized outputs, if measured.
+        error: Name of the exception raised by the call, if any.
+    """
+    __slots__ = ("node", "start_ns", "duration_ns", "thread_id",
+                 "filesystem_calls", "input_frames", "output_frames",
+                 "output_bytes", "error")
+
+    def __init__(self, node):
+        self.node = node
+        self.start_ns = 0
+        self.duration_ns = 0
+        self.thread_id = threading.get_ident()
+        self.filesystem_calls = {}
+        self.input_frames = 0
+        self.output_frames = 0
+        self.output_bytes = 0
+        self.error = None
+
+    def ToDict(self):
+        return {"node": self.node,
+                "start_ns": self.start_ns,
+                "duration_ns": self.duration_ns,
+                "thread_id": self.thread_id,
+                "filesystem_calls": dict(self.filesystem_calls),
+                "input_frames": self.input_frames,
+                "output_frames": self.output_frames,
+                "output_bytes": self.output_bytes,
+                "error": self.error}
+
+
+class Sink(object):
+    """
+    Base class of the destinations of ProcessRecords. Record may be called
+    from several threads at once.
+    """
+    def Record(self, record):
+        raise NotImplementedError
+
+    def Close(self):
+        pass
+
+
+class AggregateSink(Sink):
+    """
+    Aggregate the records in memory per node.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nodes = {}
+
+    def Record(self, record):
+        with self._lock:
+            totals = self._nodes.get(record.node)
+            if totals is None:
+                totals = self._nodes[record.node] = dict(
+                            calls=0, errors=0, seconds=0.0, max_seconds=0.0,
+                            input_frames=0, output_frames=0, output_bytes=0,
+                            **{name: 0 for name in FILESYSTEM_CALLS})
+            seconds = record.duration_ns / 1e9
+            totals["calls"] += 1
+            totals["errors"] += record.error is not None
+            totals["seconds"] += seconds
+            totals["max_seconds"] = max(totals["max_seconds"], seconds)
+            totals["input_frames"] += record.input_frames
+            totals["output_frames"] += record.output_frames
+            totals["output_bytes"] += record.output_bytes
+            for name, count in record.filesystem_calls.items():
+                totals[name] += count
+
+    def Summary(self):
+        """
+        Return a dictionary mapping node names to dictionaries of their
+        totals.
+        """
+        with self._lock:
+            return {node: dict(totals)
+                    for node, totals in self._nodes.items()}
+
+    def Reset(self):
+        with self._lock:
+            self._nodes.clear()
+
+
+class JsonLinesSink(Sink):
+    """
+    Append each record to a file as a line of JSON.
+    """
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._file = open(path, "a", buffering=1)
+
+    def Record(self, record):
+        line = json.dumps(record.ToDict(), separators=(",", ":"))
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line + "\n")
+
+    def Close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class ChromeTraceSink(Sink):
+    """
+    Write the records to a file in the Chrome trace event format, which can
+    be opened in chrome://tracing or Perfetto. The file is only complete
+    once the sink is closed.
+    """
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._file = open(path, "w")
+        self._file.write("[")
+        self._separator = "\n"
+        self._pid = os.getpid()
+
+    def Record(self, record):
+        args = dict(record.filesystem_calls)
+        args.update(input_frames=record.input_frames,
+                    output_frames=record.output_frames,
+                    output_bytes=record.output_bytes)
+        if record.error is not None:
+            args["error"] = record.error
+        event = json.dumps({"name": record.node, "cat": "fileseq",
+                            "ph": "X", "pid": self._pid,
+                            "tid": record.thread_id,
+                            "ts": record.start_ns / 1000.0,
+                            "dur": record.duration_ns / 1000.0,
+                            "args": args}, separators=(",", ":"))
+        with self._lock:
+            if self._file is not None:
+                self._file.write(self._separator + event)
+                self._separator = ",\n"
+
+    def Close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.write("\n]\n")
+                self._file.close()
+                self._file = None
+
+
+class _FilesystemCounter(object):
+    """
+    Count the calls made to the FILESYSTEM_CALLS functions of the os
+    module while it is installed.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(FILESYSTEM_CALLS, 0)
+        self._originals = {}
+
+    def Install(self):
+        for name in FILESYSTEM_CALLS:
+            if name not in self._originals:
+                self._originals[name] = getattr(os, name)
+                setattr(os, name, self._Counting(name, self._originals[name]))
+
+    def Uninstall(self):
+        for name, function in self._originals.items():
+            setattr(os, name, function)
+        self._originals.clear()
+
+    def Snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def Since(self, snapshot):
+        with self._lock:
+            return {name: count - snapshot[name]
+                    for name, count in self._counts.items()}
+
+    def _Counting(self, name, function):
+        @functools.wraps(function)
+        def counting(*args, **kwargs):
+            with self._lock:
+                self._counts[name] += 1
+            return function(*args, **kwargs)
+        return counting
+
+
+_log = logging.getLogger(__name__)
+
+_sink = None
+_measure_output_bytes = False
+_state_lock = threading.Lock()
+_filesystem_counter = _FilesystemCounter()
+_iograft_functions = {}
+
+# The record of the Process call running on each thread.
+_local = threading.local()
+
+
+def Instrumented(node_name):
+    """
+    Decorator for the Process method of the node with the given name,
+    recording each call to the enabled sink.
+    """
+    def decorate(process):
+        @functools.wraps(process)
+        def instrumented(self, data):
+            if _sink is None:
+                return process(self, data)
+            return _RecordProcess(node_name, process, self, data)
+        return instrumented
+    return decorate
+
+
+def _RecordProcess(node_name, process, node, data):
+    record = ProcessRecord(node_name)
+    parent = getattr(_local, "record", None)
+    _local.record = record
+    filesystem_calls = _filesystem_counter.Snapshot()
+    record.start_ns = time.perf_counter_ns()
+    try:
+        return process(node, data)
+    except BaseException as e:
+        record.error = type(e).__name__
+        raise
+    finally:
+        record.duration_ns = time.perf_counter_ns() - record.start_ns
+        record.filesystem_calls = _filesystem_counter.Since(filesystem_calls)
+        _local.record = parent
+        sink = _sink
+        if sink is not None:
+            sink.Record(record)
+
+
+def _GetInput(definition, data):
+    value = _iograft_functions["GetInput"](definition, data)
+    record = getattr(_local, "record", None)
+    if record is not None:
+        record.input_frames += _FrameCount(value)
+    return value
+
+
+def _SetOutput(definition, data, value):
+    record = getattr(_local, "record", None)
+    if record is not None:
+        record.output_frames += _FrameCount(value)
+        if _measure_output_bytes:
+            record.output_bytes += _SerializedSize(value)
+    _iograft_functions["SetOutput"](definition, data, value)
+
+
+def _FrameCount(value):
+    if isinstance(value, fileseq.FileSequence):
+        frame_set = value.frameSet()
+        return len(frame_set) if frame_set is not None else 0
+    if isinstance(value, fileseq.FrameSet):
+        return len(value)
+    if (isinstance(value, list) and value and
+            isinstance(value[0], (fileseq.FileSequence, fileseq.FrameSet))):
+        return sum(_FrameCount(item) for item in value)
+    return 0
+
+
+def _SerializedSize(value):
+    if isinstance(value, fileseq.FileSequence):
+        return len(iosequencetypes.FileSequence.SerializeValue(value))
+    if isinstance(value, fileseq.FrameSet):
+        return len(iosequencetypes.FrameSet.SerializeValue(value))
+    if (isinstance(value, list) and value and
+            isinstance(value[0], (fileseq.FileSequence, fileseq.FrameSet))):
+        return sum(_SerializedSize(item) for item in value)
+    try:
+        return len(iograft.SerializeValue(value))
+    except Exception:
+        return 0
+
+
+def Enable(sink, measure_output_bytes=False):
+    """
+    Record every instrumented Process call to the given Sink, replacing any
+    sink that is already enabled. Returns the sink.
+
+    This patches the os module and iograft for the whole process until
+    Disable is called. If measure_output_bytes is True every output is also
+    serialized to record its size.
+    """
+    global _sink, _measure_output_bytes
+    with _state_lock:
+        if not _iograft_functions:
+            for name, function in (("GetInput", _GetInput),
+                                   ("SetOutput", _SetOutput)):
+                _iograft_functions[name] = getattr(iograft, name)
+                setattr(iograft, name, function)
+        _filesystem_counter.Install()
+        _measure_output_bytes = measure_output_bytes
+        _sink = sink
+    return sink
+
+
+def Disable():
+    """
+    Stop recording and restore the patched functions. Returns the sink
+    that was enabled, if any; it is not closed.
+    """
+    global _sink, _measure_output_bytes
+    with _state_lock:
+        sink = _sink
+        _sink = None
+        _measure_output_bytes = False
+        _filesystem_counter.Uninstall()
+        for name, function in _iograft_functions.items():
+            setattr(iograft, name, function)
+        _iograft_functions.clear()
+    return sink
+
+
+def EnabledSink():
+    """
+    Return the enabled sink, or None.
+    """
+    return _sink
+
+
+def EnableFromEnvironment():
+    """
+    Enable the sink given by the IOSEQUENCE_INSTRUMENT environment
+    variable, if it is set and no sink is enabled yet. File sinks are
+    closed when the process exits. Returns the enabled sink or None.
+
+    An invalid value, or a file sink that cannot be opened, is logged as a
+    warning and nothing is enabled.
+    """
+    value = os.environ.get(INSTRUMENT_ENV)
+    if not value or _sink is not None:
+        return _sink
+
+    measure_output_bytes = os.environ.get(OUTPUT_BYTES_ENV) == "1"
+    kind, _, path = value.partition(":")
+    try:
+        if kind == "memory":
+            return Enable(AggregateSink(), measure_output_bytes)
+        if kind == "jsonl" and path:
+            sink = JsonLinesSink(path)
+        elif kind == "chrome" and path:
+            sink = ChromeTraceSink(path)
+        else:
+            _log.warning("Ignoring invalid %s value %r; expected memory, "
+                         "jsonl:PATH or chrome:PATH", INSTRUMENT_ENV, value)
+            return None
+    except OSError as e:
+        _log.warning("Ignoring %s value %r: %s", INSTRUMENT_ENV, value, e)
+        return None
+    atexit.register(sink.Close)
+    return Enable(sink, measure_output_bytes)
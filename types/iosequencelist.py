@@ -0,0 +1,506 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+High-throughput grouping of lists of paths into sequences.
+
+FindSequencesInList produces the same sequences as
+fileseq.findSequencesInList (with the HASH1 padding style used by these
+nodes) but parses each path with a single regular expression match and
+stores the frames of each sequence in compact integer arrays. Frame ranges
+are then built from the sorted arrays, using NumPy when it is available.
+
+SequenceAccumulator groups paths incrementally as they are added so that
+paths can be streamed (for example from a manifest with ReadManifest)
+rather than held in memory. Its frames are merged into ranges of
+consecutive frames as they arrive, so memory use grows with the number of
+sequences (and the gaps in them) rather than with the number of paths.
+"""
+
+import array
+import gzip
+import heapq
+
+import fileseq
+from fileseq import constants
+
+import iosequenceranges
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Parts of a frame range above which a FrameSet is built from its frames
+# rather than from its range string.
+_MAX_RANGE_PARTS = 256
+
+# Minimum number of frames buffered by a SequenceAccumulator for a sequence
+# before they are merged into its ranges.
+_MERGE_SIZE = 4096
+
+# Maps every ASCII digit of an encoded path to zero.
+_DIGITS_TO_ZERO = bytes.maketrans(b"123456789", b"000000000")
+
+# Marks a path shape that has not been matched yet.
+_UNMATCHED = object()
+
+
+class SequenceAccumulator(object):
+    """
+    Group paths into sequences incrementally.
+
+    Paths are added in as many calls to AddPaths as needed and Finalize
+    returns the sequences for all of the paths added so far.
+
+    The sequences are the same as fileseq.findSequencesInList returns for
+    all of the paths, except where a sequence has frames of the same width
+    that are both zero padded and unpadded (i.e. "0100" and "1000" alongside
+    "1"). fileseq splits those depending on the order it iterates the
+    frames in, which the accumulator does not keep.
+    """
+    def __init__(self):
+        # Dictionaries preserve insertion order which keeps the sequences in
+        # the order they were first found in the paths.
+        self._groups = {}
+        self._splits = {}
+
+    def __len__(self):
+        return len(self._groups)
+
+    def AddPaths(self, paths):
+        """
+        Add an iterable of paths to the accumulator. The iterable is
+        consumed one path at a time.
+        """
+        groups = self._groups
+        splits = self._splits
+        match_path = constants.DISK_RE.match
+
+        for path in paths:
+            if not path:
+                continue
+
+            # Every ASCII digit belongs to the same character classes of the
+            # regular expression, so paths that only differ in their digits
+            # (for example the frames of a sequence) are split at the same
+            # positions and the expression only needs to be matched once
+            # for them.
+            shape = path.encode("utf-8", "surrogatepass")
+            shape = shape.translate(_DIGITS_TO_ZERO)
+            split = splits.get(shape, _UNMATCHED)
+            if split is _UNMATCHED:
+                match = match_path(path)
+                split = None
+                if match is not None:
+                    split = (match.end(1), match.end(2), match.end(3))
+                splits[shape] = split
+            if split is None:
+                continue
+
+            dirname_end, basename_end, frame_end = split
+            dirname = path[:dirname_end]
+            basename = path[dirname_end:basename_end]
+
+            # Paths without a frame number are grouped separately from the
+            # sequences with the same name.
+            if frame_end < 0:
+                groups.setdefault((dirname, basename, path[basename_end:],
+                                   True), None)
+                continue
+
+            key = (dirname, basename, path[frame_end:], False)
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = self._NewGroup()
+
+            # Frame strings that cannot be rebuilt from their number and
+            # width (negative zero, non-ASCII digits or frames too large for
+            # the arrays) are left to fileseq.
+            frame_str = path[basename_end:frame_end]
+            frame = int(frame_str)
+            if (not frame_str.isascii() or
+                    (frame == 0 and frame_str.startswith("-"))):
+                group.AddOddPath(path)
+                continue
+            width = len(frame_str)
+            try:
+                group.AddFrame(frame, width, width != len(str(frame)))
+            except OverflowError:
+                group.AddOddPath(path)
+
+    def Finalize(self):
+        """
+        Return the list of fileseq.FileSequence objects for all of the paths
+        added to the accumulator.
+        """
+        sequences = []
+        for key, group in self._groups.items():
+            sequences.extend(_GroupSequences(key, group))
+        return sequences
+
+    def _NewGroup(self):
+        return _RangesGroup()
+
+
+class _OrderedAccumulator(SequenceAccumulator):
+    """
+    Accumulator keeping every frame in the order it was added, so that the
+    sequences always match fileseq.findSequencesInList.
+    """
+    def _NewGroup(self):
+        return _OrderedGroup()
+
+
+def FindSequencesInList(paths):
+    """
+    Return the list of fileseq.FileSequence objects for the sequences within
+    the given paths. Equivalent to calling fileseq.findSequencesInList with
+    the HASH1 padding style.
+    """
+    accumulator = _OrderedAccumulator()
+    accumulator.AddPaths(paths)
+    return accumulator.Finalize()
+
+
+def ReadManifest(manifest_path):
+    """
+    Yield the paths listed in a manifest file, one path per line. Lines may
+    end with LF or CRLF. Manifests compressed with gzip are detected from
+    their contents. Lines are read one at a time so the manifest is never
+    held in memory.
+    """
+    with open(manifest_path, "rb") as manifest_file:
+        compressed = manifest_file.read(2) == b"\x1f\x8b"
+
+    opener = gzip.open if compressed else open
+    with opener(manifest_path, "rt", encoding="utf-8", errors="surrogateescape",
+                newline=None) as manifest_file:
+        for line in manifest_file:
+            path = line.rstrip("\r\n")
+            if path:
+                yield path
+
+
+class _OrderedGroup(object):
+    """
+    The frames found for a single (dirname, basename, extension) in the
+    order they were added. Paths that cannot be stored as frames are kept as
+    (position, path) tuples where position is the number of frames added
+    before them.
+    """
+    __slots__ = ("frames", "widths", "padded", "odd_paths")
+
+    def __init__(self):
+        self.frames = array.array("q")
+        self.widths = array.array("b")
+        self.padded = array.array("b")
+        self.odd_paths = []
+
+    def AddFrame(self, frame, width, padded):
+        self.frames.append(frame)
+        self.widths.append(width)
+        self.padded.append(padded)
+
+    def AddOddPath(self, path):
+        self.odd_paths.append((len(self.frames), path))
+
+    def PaddingClasses(self):
+        """
+        Return a (width, padded, unpadded) tuple for each frame width in
+        ascending order. padded and unpadded identify the zero padded and
+        unpadded frames of that width, or are None if there are none.
+        """
+        classes = []
+        if numpy is not None:
+            widths = numpy.frombuffer(self.widths, dtype=numpy.int8)
+            padded = numpy.frombuffer(self.padded, dtype=numpy.int8) != 0
+            for width in numpy.unique(widths):
+                members = widths == width
+                padded_members = members & padded
+                unpadded_members = members & ~padded
+                classes.append((int(width),
+                                padded_members if padded_members.any()
+                                else None,
+                                unpadded_members if unpadded_members.any()
+                                else None))
+            return classes
+
+        by_class = {}
+        for index, width in enumerate(self.widths):
+            by_class.setdefault((width, self.padded[index]), []).append(index)
+        for width in sorted(set(width for width, _ in by_class)):
+            classes.append((width, by_class.get((width, 1)),
+                            by_class.get((width, 0))))
+        return classes
+
+    def Combine(self, members):
+        """
+        Return the sorted, unique frames of a list of the padding classes
+        returned by PaddingClasses.
+        """
+        if numpy is not None:
+            frames = numpy.frombuffer(self.frames, dtype=numpy.int64)
+            combined = members[0]
+            for mask in members[1:]:
+                combined = combined | mask
+            return numpy.unique(frames[combined])
+        return sorted(set(self.frames[i]
+                          for indices in members for i in indices))
+
+    def Paths(self, dirname, basename, extension):
+        """
+        Return the paths of the group in the order they were added.
+        """
+        paths = [dirname + basename + str(frame).zfill(width) + extension
+                 for frame, width in zip(self.frames, self.widths)]
+        for offset, (position, path) in enumerate(self.odd_paths):
+            paths.insert(position + offset, path)
+        return paths
+
+
+class _RangesGroup(object):
+    """
+    The frames found for a single (dirname, basename, extension), stored as
+    a _FrameRanges for each frame width and padding.
+    """
+    __slots__ = ("classes", "odd_paths")
+
+    def __init__(self):
+        self.classes = {}
+        self.odd_paths = []
+
+    def AddFrame(self, frame, width, padded):
+        frame_ranges = self.classes.get((width, padded))
+        if frame_ranges is None:
+            frame_ranges = self.classes[(width, padded)] = _FrameRanges()
+        frame_ranges.Add(frame)
+
+    def AddOddPath(self, path):
+        self.odd_paths.append(path)
+
+    def PaddingClasses(self):
+        """
+        See _OrderedGroup.PaddingClasses.
+        """
+        widths = sorted(set(width for width, _ in self.classes))
+        return [(width, self.classes.get((width, True)),
+                 self.classes.get((width, False)))
+                for width in widths]
+
+    def Combine(self, members):
+        """
+        See _OrderedGroup.Combine.
+        """
+        return _FrameRanges.Union(members).Frames()
+
+    def Paths(self, dirname, basename, extension):
+        """
+        Return the paths of the group ordered by padding and frame.
+        """
+        paths = []
+        for (width, _), frame_ranges in sorted(self.classes.items()):
+            paths.extend(dirname + basename + str(frame).zfill(width) +
+                         extension
+                         for frame in frame_ranges.Frames())
+        paths.extend(self.odd_paths)
+        return paths
+
+
+class _FrameRanges(object):
+    """
+    Set of frames stored as sorted, disjoint (start, end) ranges of
+    consecutive frames. Added frames are buffered and merged into the ranges
+    in batches.
+    """
+    __slots__ = ("_starts", "_ends", "_pending", "_merge_size")
+
+    def __init__(self):
+        self._starts = array.array("q")
+        self._ends = array.array("q")
+        self._pending = array.array("q")
+        self._merge_size = _MERGE_SIZE
+
+    @classmethod
+    def Union(cls, frame_ranges_list):
+        """
+        Return a new _FrameRanges containing the frames of all of the given
+        _FrameRanges.
+        """
+        union = cls()
+        union._SetRanges(_MergeRanges([frame_ranges.Ranges()
+                                       for frame_ranges in frame_ranges_list]))
+        return union
+
+    def Add(self, frame):
+        self._pending.append(frame)
+        if len(self._pending) >= self._merge_size:
+            self._Merge()
+
+    def Ranges(self):
+        """
+        Return the list of (start, end) ranges of the frames.
+        """
+        self._Merge()
+        return list(zip(self._starts, self._ends))
+
+    def Frames(self):
+        """
+        Return the sorted frames, as a NumPy array when it is available.
+        """
+        self._Merge()
+        if numpy is not None:
+            if not self._starts:
+                return numpy.empty(0, dtype=numpy.int64)
+            return numpy.concatenate([
+                    numpy.arange(start, end + 1, dtype=numpy.int64)
+                    for start, end in zip(self._starts, self._ends)])
+        return [frame for start, end in zip(self._starts, self._ends)
+                for frame in range(start, end + 1)]
+
+    def _Merge(self):
+        if not self._pending:
+            return
+        frames = sorted(set(self._pending))
+        self._pending = array.array("q")
+
+        ranges = []
+        start = end = frames[0]
+        for frame in frames[1:]:
+            if frame != end + 1:
+                ranges.append((start, end))
+                start = frame
+            end = frame
+        ranges.append((start, end))
+
+        self._SetRanges(_MergeRanges([self.Ranges(), ranges]))
+
+    def _SetRanges(self, ranges):
+        self._starts = array.array("q", [start for start, _ in ranges])
+        self._ends = array.array("q", [end for _, end in ranges])
+
+        # Merging costs time in proportion to the number of ranges, so
+        # buffer at least as many frames as there are ranges between merges.
+        self._merge_size = max(_MERGE_SIZE, len(ranges))
+
+
+def _MergeRanges(range_lists):
+    """
+    Merge sorted lists of (start, end) ranges of consecutive frames into a
+    single sorted list of disjoint ranges.
+    """
+    merged = []
+    for start, end in heapq.merge(*range_lists):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _GroupSequences(key, group):
+    """
+    Return the sequences for a single group of frames.
+    """
+    dirname, basename, extension, single = key
+    if single:
+        sequence = _BuildSequence(dirname, basename, extension, "", None)
+        if sequence is None:
+            return fileseq.findSequencesInList(
+                                [dirname + basename + extension],
+                                pad_style=fileseq.PAD_STYLE_HASH1)
+        return [sequence]
+
+    frame_groups = None
+    if not group.odd_paths:
+        frame_groups = _SplitByPadding(group)
+
+    sequences = []
+    if frame_groups is not None:
+        for width, frames in frame_groups:
+            padding = fileseq.FileSequence.getPaddingChars(
+                                        width,
+                                        pad_style=fileseq.PAD_STYLE_HASH1)
+            sequence = _BuildSequence(dirname, basename, extension, padding,
+                                      frames)
+            if sequence is None:
+                break
+            sequences.append(sequence)
+        else:
+            return sequences
+
+    # Fall back to fileseq for anything that could not be handled directly,
+    # rebuilding the paths in their original order where it is known since
+    # fileseq's result can depend on it.
+    return fileseq.findSequencesInList(group.Paths(dirname, basename,
+                                                   extension),
+                                       pad_style=fileseq.PAD_STYLE_HASH1)
+
+
+def _SplitByPadding(group):
+    """
+    Split the frames of a group into (width, sorted_unique_frames) for each
+    padding width in the same way as fileseq. Returns None if the result would
+    depend on the order of the paths.
+    """
+    classes = group.PaddingClasses()
+
+    # Frames are taken in order of their width. A frame that is wider than
+    # the current padding only starts a new sequence if it is zero padded;
+    # otherwise it joins the current sequence.
+    result = []
+    current_width, padded, unpadded = classes[0]
+    current = [members for members in (padded, unpadded)
+               if members is not None]
+    for width, padded, unpadded in classes[1:]:
+        if padded is not None and unpadded is not None:
+            # fileseq's result depends on which of these it sees first.
+            return None
+        if padded is not None:
+            result.append((current_width, group.Combine(current)))
+            current_width, current = width, [padded]
+        else:
+            current.append(unpadded)
+    result.append((current_width, group.Combine(current)))
+    return result
+
+
+def _BuildSequence(dirname, basename, extension, padding, frames):
+    """
+    Build a sequence from its components and sorted frames. Returns None if
+    the components do not survive being parsed as a pattern.
+    """
+    try:
+        sequence = fileseq.FileSequence(
+                            "".join([dirname, basename, padding, extension]),
+                            pad_style=fileseq.PAD_STYLE_HASH1)
+    except fileseq.ParseException:
+        return None
+    if (sequence.dirname() != dirname or
+            sequence.basename() != basename or
+            sequence.extension() != extension or
+            sequence.framePadding() != padding):
+        return None
+
+    if frames is not None:
+        runs = iosequenceranges.FramesToRuns(frames)
+        if len(runs) <= _MAX_RANGE_PARTS:
+            frame_set = fileseq.FrameSet(
+                                iosequenceranges.RunsToFrameRange(runs))
+        else:
+            frame_set = fileseq.FrameSet([int(frame) for frame in frames])
+        sequence.setFrameSet(frame_set)
+    return sequence
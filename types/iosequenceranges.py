@@ -0,0 +1,557 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Helpers for working with the frames of sequences without expanding them into
+per-frame Python objects.
+"""
+
+import array
+import bisect
+import importlib.metadata
+import re
+from collections.abc import Sequence
+
+import fileseq
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Matches a single part of a frame range that can be converted to a run
+# without expanding it (i.e. "1", "1-10" or "1-10x2").
+_RANGE_PART_RE = re.compile(r"^(-?\d+)(?:-(-?\d+)(?:x(-?\d+))?)?$")
+
+
+class FrameRangeBuilder(object):
+    """
+    Accumulate frames one at a time into contiguous (start, end, step) runs.
+    Runs may ascend or descend.
+
+    Memory use scales with the number of runs rather than with the number of
+    frames added.
+    """
+    __slots__ = ("_runs", "_count")
+
+    def __init__(self):
+        self._runs = []
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for start, end, step in self._runs:
+            for frame in range(start, end + (1 if step > 0 else -1), step):
+                yield frame
+
+    def Add(self, frame):
+        """
+        Add a frame to the end of the builder.
+        """
+        self._count += 1
+        if self._runs:
+            run = self._runs[-1]
+            start, end, step = run
+            if start == end:
+                # The second frame of a run determines its step, which is
+                # negative for descending runs.
+                if frame != end:
+                    run[1] = frame
+                    run[2] = frame - start
+                    return
+            elif frame - end == step:
+                run[1] = frame
+                return
+        self._runs.append([frame, frame, 1])
+
+    def AddRun(self, start, end, step):
+        """
+        Add a run of frames from start to end (inclusive) by step to the end
+        of the builder, extending the last run if the new run continues it.
+        """
+        if start == end:
+            self.Add(start)
+            return
+
+        self._count += (end - start) // step + 1
+        if self._runs:
+            run = self._runs[-1]
+            if start - run[1] == step and (run[0] == run[1] or
+                                           run[2] == step):
+                run[1] = end
+                run[2] = step
+                return
+        self._runs.append([start, end, step])
+
+    def Runs(self):
+        """
+        Return the list of (start, end, step) tuples added to the builder.
+        """
+        return [tuple(run) for run in self._runs]
+
+    def FrameRange(self):
+        """
+        Return the frame range string representing the added frames.
+        """
+        return RunsToFrameRange(self._runs)
+
+    def FrameSet(self):
+        """
+        Return a fileseq.FrameSet representing the added frames.
+        """
+        # fileseq builds sized iterables in a single linear pass whereas
+        # range strings with many parts are checked part by part.
+        return fileseq.FrameSet(self)
+
+    def FrameRanges(self):
+        """
+        Return a FrameRanges object representing the added frames.
+        """
+        return FrameRanges(self._runs)
+
+
+class FrameRanges(Sequence):
+    """
+    Immutable, ordered sequence of frames stored as (start, end, step) runs
+    in compact integer arrays.
+
+    The length is available in constant time and indexing is a binary search
+    over the runs, so frames can be counted and sliced without expanding
+    them. Membership is also a binary search when the runs are in ascending
+    order. As the arrays are never modified, copies share them.
+    """
+    __slots__ = ("_starts", "_steps", "_offsets", "_ascending")
+
+    def __init__(self, runs=()):
+        self._starts = array.array("q")
+        self._steps = array.array("q")
+
+        # The offset of the first frame of each run within the frames,
+        # followed by the total number of frames.
+        self._offsets = array.array("q", [0])
+
+        # Whether every run is ascending and starts after the last frame of
+        # the previous run.
+        self._ascending = True
+        last = None
+        for start, end, step in runs:
+            self._starts.append(start)
+            self._steps.append(step)
+            self._offsets.append(self._offsets[-1] +
+                                 (end - start) // step + 1)
+            if step < 0 or (last is not None and start <= last):
+                self._ascending = False
+            last = end
+
+    @classmethod
+    def FromFrameSet(cls, frame_set):
+        """
+        Create a FrameRanges object from a fileseq.FrameSet. Simple frame
+        ranges are converted directly from the frame set's range string;
+        anything else is built by iterating the frame set.
+        """
+        if frame_set is None or frame_set.is_null:
+            return cls()
+
+        runs = _ParseRuns(frame_set.frange)
+        if runs is not None:
+            frame_ranges = cls(runs)
+            # Overlapping parts are de-duplicated by the frame set, in which
+            # case the parsed runs do not represent it.
+            if len(frame_ranges) == len(frame_set):
+                return frame_ranges
+
+        builder = FrameRangeBuilder()
+        for frame in frame_set:
+            builder.Add(frame)
+        return builder.FrameRanges()
+
+    @classmethod
+    def FromFrameRange(cls, frame_range):
+        """
+        Create a FrameRanges object from a frame range string. Strings made
+        of simple parts that do not overlap are converted directly in a
+        single pass; anything else is parsed by fileseq.
+        """
+        runs = _ParseRuns(frame_range)
+        if runs is None or _Overlapping(runs):
+            return cls.FromFrameSet(fileseq.FrameSet(frame_range))
+        return cls(runs)
+
+    def __len__(self):
+        return self._offsets[-1]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return FrameRanges(self._SliceRuns(start, stop))
+            builder = FrameRangeBuilder()
+            for i in range(start, stop, step):
+                builder.Add(self[i])
+            return builder.FrameRanges()
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("FrameRanges index out of range")
+        run = bisect.bisect_right(self._offsets, index) - 1
+        return (self._starts[run] +
+                (index - self._offsets[run]) * self._steps[run])
+
+    def __iter__(self):
+        for start, end, step in self.Runs():
+            for frame in range(start, end + step, step):
+                yield frame
+
+    def __contains__(self, frame):
+        if self._ascending:
+            run = bisect.bisect_right(self._starts, frame) - 1
+            if run < 0:
+                return False
+            start = self._starts[run]
+            step = self._steps[run]
+            count = self._offsets[run + 1] - self._offsets[run]
+            return (frame <= start + (count - 1) * step and
+                    (frame - start) % step == 0)
+
+        for run, start in enumerate(self._starts):
+            step = self._steps[run]
+            end = start + (self._offsets[run + 1] -
+                           self._offsets[run] - 1) * step
+            low, high = min(start, end), max(start, end)
+            if low <= frame <= high and (frame - start) % step == 0:
+                return True
+        return False
+
+    def __eq__(self, other):
+        if not isinstance(other, FrameRanges):
+            return NotImplemented
+        return len(self) == len(other) and list(self) == list(other)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "FrameRanges({!r})".format(self.FrameRange())
+
+    def __str__(self):
+        return self.FrameRange()
+
+    def copy(self):
+        """
+        Return the FrameRanges object itself; it is immutable, so copies
+        can share it.
+        """
+        return self
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def Runs(self):
+        """
+        Return the list of (start, end, step) tuples making up the frames.
+        """
+        runs = []
+        for run, start in enumerate(self._starts):
+            step = self._steps[run]
+            count = self._offsets[run + 1] - self._offsets[run]
+            runs.append((start, start + (count - 1) * step, step))
+        return runs
+
+    def FrameRange(self):
+        """
+        Return the frame range string representing the frames.
+        """
+        return RunsToFrameRange(self.Runs())
+
+    def FrameSet(self):
+        """
+        Return a fileseq.FrameSet representing the frames.
+        """
+        if _ParseIsCheaper(len(self._starts), len(self)):
+            return fileseq.FrameSet(self.FrameRange())
+        return fileseq.FrameSet(self)
+
+    def _SliceRuns(self, start, stop):
+        """
+        Return the runs covering the frames from index start up to (but not
+        including) index stop.
+        """
+        runs = []
+        if start >= stop:
+            return runs
+
+        run = bisect.bisect_right(self._offsets, start) - 1
+        while run < len(self._starts) and self._offsets[run] < stop:
+            first = max(start, self._offsets[run]) - self._offsets[run]
+            last = min(stop, self._offsets[run + 1]) - 1 - self._offsets[run]
+            run_start = self._starts[run]
+            step = self._steps[run]
+            runs.append((run_start + first * step, run_start + last * step,
+                         step))
+            run += 1
+        return runs
+
+
+def _ParseRuns(frame_range):
+    """
+    Convert a frame range string into a list of (start, end, step) runs.
+    Returns None if any part of the frame range cannot be converted without
+    expanding it, or has a step that fileseq rejects (zero or negative) so
+    that fileseq reports the error.
+    """
+    runs = []
+    for part in frame_range.split(","):
+        if not part:
+            continue
+        match = _RANGE_PART_RE.match(part)
+        if match is None:
+            return None
+
+        start, end, step = match.groups()
+        start = int(start)
+        end = start if end is None else int(end)
+        step = 1 if step is None else int(step)
+        if step <= 0:
+            return None
+        if end < start:
+            step = -step
+
+        # Snap the end of the run onto the last frame it includes.
+        end = start + (end - start) // step * step
+        runs.append((start, end, step))
+    return runs
+
+
+def _Overlapping(runs):
+    """
+    Return whether the spans of any two runs overlap.
+    """
+    spans = sorted((min(start, end), max(start, end))
+                   for start, end, _ in runs)
+    return any(low <= previous_high
+               for (_, previous_high), (low, _) in zip(spans, spans[1:]))
+
+
+def _ParseIsCheaper(run_count, frame_count):
+    """
+    Return whether fileseq parses a frame range string of run_count parts
+    faster than it builds a frame set from its frame_count frames. fileseq
+    checks each part of a string against all of the previous parts, whereas
+    building from the frames is linear in the number of frames.
+    """
+    return run_count * run_count // 2 <= frame_count
+
+
+def ParseFrameSet(frame_range):
+    """
+    Return a fileseq.FrameSet for a frame range string, equivalent to
+    fileseq.FrameSet(frame_range) (including its frame range string) but
+    without checking every part of strings with many simple parts against
+    all of the previous parts.
+    """
+    runs = _ParseRuns(frame_range)
+    if runs is None or _Overlapping(runs):
+        return fileseq.FrameSet(frame_range)
+
+    return RunsToFrameSet(runs, frame_range)
+
+
+def RunsToFrameSet(runs, frame_range=None):
+    """
+    Return a fileseq.FrameSet of a list of (start, end, step) runs that do
+    not overlap. The frame set's frame range string is the given one
+    (formatted from the runs by default), as if it had been parsed from it.
+    """
+    if frame_range is None:
+        frame_range = RunsToFrameRange(runs)
+    frame_count = sum((end - start) // step + 1 for start, end, step in runs)
+    if _ParseIsCheaper(len(runs), frame_count):
+        return fileseq.FrameSet(frame_range)
+
+    frame_set = fileseq.FrameSet([frame for start, end, step in runs
+                                  for frame in range(start, end + step, step)])
+    if frame_set.frange == frame_range:
+        return frame_set
+
+    # fileseq formats a different frame range string from the frames than
+    # the one given. Keep the given string, as parsing it would, where the
+    # frame set is known to store it in a writable slot; otherwise parse it.
+    if not _FRAME_RANGE_WRITABLE:
+        return fileseq.FrameSet(frame_range)
+    frame_set._frange = frame_range
+    return frame_set
+
+
+def _FrameRangeWritable():
+    """
+    Return whether the installed fileseq stores a FrameSet's frame range
+    string in the _frange slot of fileseq 3, which RunsToFrameSet sets to
+    keep the string it was given.
+    """
+    try:
+        version = importlib.metadata.version("fileseq")
+    except importlib.metadata.PackageNotFoundError:
+        return False
+    return (version.split(".")[0] == "3" and
+            "_frange" in getattr(fileseq.FrameSet, "__slots__", ()))
+
+
+_FRAME_RANGE_WRITABLE = _FrameRangeWritable()
+
+
+def FrameRangeToRuns(frame_range):
+    """
+    Return the list of (start, end, step) runs of a frame range string made
+    of simple parts that do not overlap, if RunsToFrameRange formats the
+    runs back into the same string. Returns None otherwise.
+    """
+    runs = _ParseRuns(frame_range)
+    if (runs is None or _Overlapping(runs) or
+            RunsToFrameRange(runs) != frame_range):
+        return None
+    return runs
+
+
+def FramesToRuns(frames):
+    """
+    Convert a sorted sequence of unique frames into a list of
+    (start, end, step) runs, grouping the frames in the same way as
+    fileseq.FrameSet.framesToFrameRange. frames may be a list or a NumPy
+    array.
+
+    The frames are only visited once per run; finding the extent of each run
+    is done on the differences between frames, vectorized with NumPy when it
+    is available.
+    """
+    count = len(frames)
+    if count == 0:
+        return []
+    if count == 1:
+        return [(int(frames[0]), int(frames[0]), 1)]
+
+    # For each difference between neighbouring frames, find the index of the
+    # last difference in the run of equal differences containing it.
+    if numpy is not None:
+        frames = numpy.asarray(frames, dtype=numpy.int64)
+        diffs = numpy.diff(frames)
+        ends = numpy.append(numpy.flatnonzero(diffs[1:] != diffs[:-1]),
+                            len(diffs) - 1)
+        run_last = numpy.repeat(ends, numpy.diff(ends, prepend=-1))
+    else:
+        diffs = [frames[i + 1] - frames[i] for i in range(count - 1)]
+        run_last = [0] * len(diffs)
+        last = len(diffs) - 1
+        for i in range(len(diffs) - 1, -1, -1):
+            if i < len(diffs) - 1 and diffs[i] != diffs[i + 1]:
+                last = i
+            run_last[i] = last
+
+    runs = []
+    index = 0
+    while index < count:
+        start = int(frames[index])
+        if index == count - 1:
+            runs.append((start, start, 1))
+            break
+
+        step = int(diffs[index])
+        end_index = int(run_last[index]) + 1
+        if end_index - index == 1 and step != 1:
+            # Like fileseq, a pair of frames with a step other than one is
+            # not a range; the first frame stands alone and the second may
+            # start the next range.
+            runs.append((start, start, 1))
+            if end_index == count - 1:
+                end = int(frames[end_index])
+                runs.append((end, end, 1))
+                break
+            index += 1
+            continue
+
+        runs.append((start, int(frames[end_index]), step))
+        index = end_index + 1
+    return runs
+
+
+def RunsToFrameRange(runs):
+    """
+    Format a list of (start, end, step) runs as a frame range string.
+    """
+    parts = []
+    for start, end, step in runs:
+        if start == end:
+            parts.append(str(start))
+        elif abs(step) == 1:
+            parts.append("{}-{}".format(start, end))
+        else:
+            parts.append("{}-{}x{}".format(start, end, abs(step)))
+    return ",".join(parts)
+
+
+class SequencePaths(Sequence):
+    """
+    Read-only list of the paths of a fileseq.FileSequence. Paths are
+    formatted from the sequence's pattern and frame set when they are
+    accessed rather than being stored.
+    """
+    __slots__ = ("_sequence", "_frame_set")
+
+    def __init__(self, sequence):
+        self._sequence = sequence.copy()
+        frame_set = sequence.frameSet()
+        if frame_set is None:
+            frame_set = fileseq.FrameSet("")
+        self._frame_set = frame_set
+
+    def __len__(self):
+        return len(self._frame_set)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._sequence.frame(self._frame_set[i])
+                    for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Sequence path index out of range")
+        return self._sequence.frame(self._frame_set[index])
+
+    def __iter__(self):
+        for frame in self._frame_set:
+            yield self._sequence.frame(frame)
+
+    def Batch(self, batch_index, batch_size):
+        """
+        Return the list of paths in the given fixed-size batch.
+        """
+        start = batch_index * batch_size
+        return self[start:start + batch_size]
+
+    def BatchCount(self, batch_size):
+        """
+        Return the number of fixed-size batches needed to cover all paths.
+        """
+        return (len(self) + batch_size - 1) // batch_size
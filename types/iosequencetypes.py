@@ -13,18 +13,119 @@
 # limitations under the License.
 
 
+import collections
+import re
+import threading
+
 import iograft
 import fileseq
 
+import iosequencedisk
+import iosequenceranges
+
+
+# Matches the string formatted by FileSequence.ToString for patterns using
+# "#" or "@" padding, i.e. "/path/name.####.exr (1-100)".
+_DISPLAY_STRING_RE = re.compile(
+            r"\s*(?P<dirname>.*[/\\])?(?P<basename>[^/\\#@]*)"
+            r"(?P<padding>[#@]+)(?P<extension>[^/\\#@()]*?)\s*"
+            r"\((?P<frame_range>[^()]*)\)")
+
+# Matches the extensions fileseq always keeps as given when parsing a
+# pattern, e.g. ".exr" or ".tar.gz".
+_SIMPLE_EXTENSION_RE = re.compile(r"(?:\.[A-Za-z0-9_]+)*")
+
+# Matches the end of a basename that fileseq could read as a frame range,
+# e.g. "1", "1-" or "1,3x".
+_FRAME_SUFFIX_RE = re.compile(r"\d[\d,:xy-]*\Z")
+
+
+class ValueCache(object):
+    """
+    Thread-safe, bounded least-recently-used cache used to avoid repeatedly
+    parsing the same values.
+    """
+    def __init__(self, max_size=256):
+        self._max_size = max_size
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def Get(self, key):
+        """
+        Return the cached value for the given key or None if the key is not
+        in the cache.
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def Put(self, key, value):
+        """
+        Add a value to the cache, evicting the least recently used entries
+        if the cache is full.
+        """
+        with self._lock:
+            if self._max_size <= 0:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def SetMaxSize(self, max_size):
+        """
+        Set the maximum number of entries held by the cache. A size of zero
+        disables caching.
+        """
+        with self._lock:
+            self._max_size = max_size
+            while len(self._entries) > max(max_size, 0):
+                self._entries.popitem(last=False)
+
+    def Stats(self):
+        """
+        Return a dictionary of the cache's size and hit/miss counters.
+        """
+        with self._lock:
+            return {"size": len(self._entries),
+                    "max_size": self._max_size,
+                    "hits": self.hits,
+                    "misses": self.misses}
+
+    def Clear(self):
+        """
+        Remove all entries from the cache and reset the hit/miss counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
 
 class FrameSet(iograft.PythonType):
     """
     Type wrapping the fileseq.FrameSet object providing functionality for
     defining a set of frames.
+
+    ToString and SerializeValue also accept iosequenceranges.FrameRanges
+    values, which are formatted the same way.
     """
     type_id = iograft.TypeId("FrameSet", "fileseq")
     value_type = fileseq.FrameSet
 
+    # Cache of parsed frame sets keyed on their frame range string.
+    parse_cache = ValueCache(max_size=1024)
+
     def __init__(self):
         super(FrameSet, self).__init__(FrameSet.type_id,
                                        value_type=FrameSet.value_type)
@@ -32,8 +133,8 @@ class FrameSet(iograft.PythonType):
     @staticmethod
     def ToString(value):
         """
-        Return the string representation of a fileseq.FrameSet object for
-        display in the iograft UI.
+        Return the string representation of a fileseq.FrameSet (or
+        FrameRanges) object for display in the iograft UI.
         """
         return str(value)
 
@@ -42,13 +143,13 @@ class FrameSet(iograft.PythonType):
         """
         Generate a fileseq.FrameSet object from the given string.
         """
-        return fileseq.FrameSet(string_value)
+        return FrameSet.Parse(string_value)
 
     @staticmethod
     def SerializeValue(value):
         """
-        Serialization function for fileseq.FrameSet objects. Uses the
-        frame set's string representation.
+        Serialization function for fileseq.FrameSet (or FrameRanges)
+        objects. Uses the frame set's string representation.
         """
         # First convert to string and then use iograft's default serialization
         # function.
@@ -62,7 +163,20 @@ class FrameSet(iograft.PythonType):
         """
         # First deserialize the string using iograft's default deserialization.
         str_value = iograft.DeserializeValue(serialized_value)
-        return fileseq.FrameSet(str_value)
+        return FrameSet.Parse(str_value)
+
+    @staticmethod
+    def Parse(string_value):
+        """
+        Return a fileseq.FrameSet for the given frame range string. Parsed
+        frame sets are cached and a copy of the cached frame set is returned
+        so that the cached value cannot be modified.
+        """
+        frame_set = FrameSet.parse_cache.Get(string_value)
+        if frame_set is None:
+            frame_set = iosequenceranges.ParseFrameSet(string_value)
+            FrameSet.parse_cache.Put(string_value, frame_set)
+        return frame_set.copy()
 
 
 @iograft.castfunction
@@ -74,6 +188,69 @@ def _FrameSetFromString(value):
     return FrameSet.FromString(value)
 
 
+class FrameRanges(iograft.PythonType):
+    """
+    Type wrapping an iosequenceranges.FrameRanges object providing a compact,
+    range-compressed list of frames that can be indexed and sliced without
+    expanding the frames.
+    """
+    type_id = iograft.TypeId("FrameRanges", "fileseq")
+    value_type = iosequenceranges.FrameRanges
+
+    # Cache of parsed FrameRanges keyed on their frame range string. The
+    # values are immutable so the cached objects are shared.
+    parse_cache = ValueCache(max_size=1024)
+
+    def __init__(self):
+        super(FrameRanges, self).__init__(FrameRanges.type_id,
+                                          value_type=FrameRanges.value_type)
+
+    @staticmethod
+    def ToString(value):
+        """
+        Return the frame range string of a FrameRanges object for display in
+        the iograft UI.
+        """
+        return value.FrameRange()
+
+    @staticmethod
+    def FromString(string_value):
+        """
+        Generate a FrameRanges object from the given frame range string.
+        """
+        frame_ranges = FrameRanges.parse_cache.Get(string_value)
+        if frame_ranges is None:
+            frame_ranges = iosequenceranges.FrameRanges.FromFrameRange(
+                                                                string_value)
+            FrameRanges.parse_cache.Put(string_value, frame_ranges)
+        return frame_ranges
+
+    @staticmethod
+    def SerializeValue(value):
+        """
+        Serialization function for FrameRanges objects. Uses the frame range
+        string.
+        """
+        return iograft.SerializeValue(value.FrameRange())
+
+    @staticmethod
+    def DeserializeValue(serialized_value):
+        """
+        Deserialization function for FrameRanges objects.
+        """
+        str_value = iograft.DeserializeValue(serialized_value)
+        return FrameRanges.FromString(str_value)
+
+
+@iograft.castfunction
+def _FrameRangesToFrameSet(value):
+    return value.FrameSet()
+
+@iograft.castfunction
+def _FrameRangesFromFrameSet(value):
+    return iosequenceranges.FrameRanges.FromFrameSet(value)
+
+
 class FileSequence(iograft.PythonType):
     """
     Type wrapping a fileseq.FileSequence object providing functionality for
@@ -82,6 +259,13 @@ class FileSequence(iograft.PythonType):
     type_id = iograft.TypeId("FileSequence", "fileseq")
     value_type = fileseq.FileSequence
 
+    # Cache of deserialized sequences keyed on their compact serialized form.
+    deserialize_cache = ValueCache(max_size=256)
+
+    # Cache of parsed sequences without frames keyed on their padding, which
+    # are copied to build sequences from their components.
+    pattern_templates = ValueCache(max_size=64)
+
     def __init__(self):
         super(FileSequence, self).__init__(FileSequence.type_id,
                                            value_type=FileSequence.value_type)
@@ -89,7 +273,11 @@ class FileSequence(iograft.PythonType):
     @staticmethod
     def ToString(value):
         """
-
+        Return the string representation of a fileseq.FileSequence object
+        for display in the iograft UI, i.e. "/path/name.####.exr (1-100)".
+        The string is formatted on every call; it is built from attributes
+        stored on the sequence, so its cost does not depend on the number
+        of frames.
         """
         # Create a custom output string format that resembles the Nuke
         # file output.
@@ -104,8 +292,23 @@ class FileSequence(iograft.PythonType):
     @staticmethod
     def FromString(string_value):
         """
-
+        Generate a fileseq.FileSequence object from the given string, either
+        a string formatted by ToString or a pattern fileseq can parse.
         """
+        # Strings formatted by ToString with "#" or "@" padding are split
+        # into their components with a single match rather than parsing the
+        # pattern.
+        match = _DISPLAY_STRING_RE.fullmatch(string_value)
+        if match is not None:
+            sequence = FileSequence._FromComponents(
+                                                match.group("dirname") or "",
+                                                match.group("basename"),
+                                                match.group("padding"),
+                                                match.group("extension"))
+            sequence.setFrameSet(FrameSet.Parse(
+                                    match.group("frame_range").strip(" ")))
+            return sequence
+
         # Detect if the input string matches the format of the ToString
         # function of this iograft wrapping.
         range_start = string_value.rfind("(")
@@ -119,7 +322,7 @@ class FileSequence(iograft.PythonType):
                                             pad_style=fileseq.PAD_STYLE_HASH1)
 
             # Set the frame range.
-            sequence.setFrameSet(range_str)
+            sequence.setFrameSet(FrameSet.Parse(range_str))
             return sequence
 
         # Otherwise, treat as a standard input to the FileSequence constructor.
@@ -133,35 +336,172 @@ class FileSequence(iograft.PythonType):
     @staticmethod
     def SerializeValue(value):
         """
-
+        Serialization function for fileseq.FileSequence objects. Uses a
+        compact list of the pattern components and frame range where the
+        sequence can be rebuilt from them, otherwise its dictionary form.
         """
-        # Convert the sequence to the dictionary form and then use iograft's
-        # default serialization function.
+        # Sequences using the padding style of these nodes are serialized in
+        # a compact list form of their pattern components and frame range.
+        compact_value = FileSequence._ToCompact(value)
+        if compact_value is not None:
+            return iograft.SerializeValue(compact_value)
+
+        # Otherwise, convert the sequence to the dictionary form and then use
+        # iograft's default serialization function.
         seq_dict = value.to_dict()
         return iograft.SerializeValue(seq_dict)
 
     @staticmethod
     def DeserializeValue(serialized_value):
         """
+        Deserialization function for fileseq.FileSequence objects.
+        """
+        # Unpack the serialized value using iograft's default serialization.
+        seq_value = iograft.DeserializeValue(serialized_value)
+        if isinstance(seq_value, dict):
+            # Convert from the dictionary to a FileSequence object.
+            return iosequencedisk.SequenceFromDict(seq_value)
+
+        # Return a copy of the cached sequence if this value has already
+        # been deserialized so that callers cannot modify the cached copy.
+        cache_key = tuple(seq_value)
+        sequence = FileSequence.deserialize_cache.Get(cache_key)
+        if sequence is None:
+            sequence = FileSequence._FromCompact(seq_value)
+            FileSequence.deserialize_cache.Put(cache_key, sequence)
+        return sequence.copy()
+
+    @staticmethod
+    def _ToCompact(value):
+        """
+        Return the compact list form of a sequence, or None if the sequence
+        cannot be rebuilt from its components with a HASH1 padding style.
+        """
+        padding = value.framePadding()
+        if (value.decimalPlaces() or
+                padding.strip("#@") or
+                len(padding) != value.zfill()):
+            return None
+
+        frame_set = value.frameSet()
+        frame_range = None if frame_set is None else frame_set.frange
+        return [value.dirname(), value.basename(), padding,
+                value.extension(), frame_range]
 
+    @staticmethod
+    def _FromCompact(compact_value):
+        """
+        Build a sequence from the compact list form.
         """
-        # Unpack the serialized value using iograft's default serialization
-        # and then convert from the dictionary to a FileSequence object.
-        seq_dict = iograft.DeserializeValue(serialized_value)
-        return fileseq.FileSequence.from_dict(seq_dict)
+        dirname, basename, padding, extension, frame_range = compact_value
+        sequence = FileSequence._FromComponents(dirname, basename, padding,
+                                                extension)
+        if frame_range is not None:
+            sequence.setFrameSet(FrameSet.Parse(frame_range))
+        return sequence
+
+    @staticmethod
+    def _FromComponents(dirname, basename, padding, extension):
+        """
+        Build a sequence with the HASH1 padding style from its components,
+        as if its pattern had been parsed.
+        """
+        # Parsing a pattern is far more expensive than copying a sequence,
+        # so only one pattern is parsed for each padding and the sequences
+        # with that padding are copies given their components.
+        pattern = "".join([dirname, basename, padding, extension])
+
+        # fileseq reads a frame range at the end of the basename as frames,
+        # reads a relative pattern starting with a period as subframe padding
+        # and splits patterns with other extensions (or with padding
+        # characters in the basename) in ways that depend on the whole
+        # pattern; parse those patterns.
+        if (_FRAME_SUFFIX_RE.search(basename) or
+                "#" in basename or "@" in basename or
+                (not dirname and basename.startswith(".")) or
+                _SIMPLE_EXTENSION_RE.fullmatch(extension) is None):
+            return fileseq.FileSequence(pattern,
+                                        pad_style=fileseq.PAD_STYLE_HASH1)
+
+        template = FileSequence.pattern_templates.Get(padding)
+        if template is None:
+            sequence = fileseq.FileSequence(pattern,
+                                            pad_style=fileseq.PAD_STYLE_HASH1)
+            if (sequence.frameSet() is None and
+                    FileSequence._HasComponents(sequence, dirname, basename,
+                                                padding, extension)):
+                FileSequence.pattern_templates.Put(padding, sequence.copy())
+            return sequence
+
+        # The setters normalize separators in the dirname.
+        sequence = template.copy()
+        sequence.setDirname(dirname)
+        sequence.setBasename(basename)
+        sequence.setExtension(extension)
+        if not FileSequence._HasComponents(sequence, dirname, basename,
+                                           padding, extension):
+            return fileseq.FileSequence(pattern,
+                                        pad_style=fileseq.PAD_STYLE_HASH1)
+        return sequence
+
+    @staticmethod
+    def _HasComponents(sequence, dirname, basename, padding, extension):
+        return (sequence.dirname() == dirname and
+                sequence.basename() == basename and
+                sequence.framePadding() == padding and
+                sequence.extension() == extension)
 
 
 class FileSequenceList(iograft.PythonListType):
     """
-    Type representing a list of Python floating point numbers.
+    Type representing a list of fileseq.FileSequence objects.
+
+    iograft serializes the list one sequence at a time with the FileSequence
+    functions. SerializeValues and DeserializeValues are a bulk alternative
+    for handing large lists between processes (see iosequencebulk).
     """
     def __init__(self):
         super(FileSequenceList, self).__init__(
                                         FileSequence.type_id,
                                         base_value_type=FileSequence.value_type)
 
+    @staticmethod
+    def SerializeValues(values):
+        """
+        Serialize a list of fileseq.FileSequence objects in the bulk
+        encoding. Returns bytes.
+        """
+        # Imported here as the bulk encoding uses the types in this module.
+        import iosequencebulk
+        return iosequencebulk.EncodeSequences(values)
+
+    @staticmethod
+    def DeserializeValues(serialized_values):
+        """
+        Return the list of fileseq.FileSequence objects serialized by
+        SerializeValues.
+        """
+        import iosequencebulk
+        return iosequencebulk.DecodeSequences(serialized_values)
+
+
+class FrameSetList(iograft.PythonListType):
+    """
+    Type representing a list of fileseq.FrameSet objects.
+    """
+    def __init__(self):
+        super(FrameSetList, self).__init__(
+                                        FrameSet.type_id,
+                                        base_value_type=FrameSet.value_type)
+
 
 def LoadPlugin(plugin):
+    # Record the Process calls of the nodes if instrumentation is configured;
+    # imported here as the instrumentation serializes values with the types
+    # in this module.
+    import iosequenceinstrument
+    iosequenceinstrument.EnableFromEnvironment()
+
     # Register the FrameSet type.
     frame_set_type = plugin.RegisterPythonType(FrameSet.type_id,
                                                FrameSet(),
@@ -183,6 +523,26 @@ def LoadPlugin(plugin):
     except ImportError:
         pass
 
+    # Also register the list type for FrameSets.
+    plugin.RegisterPythonListType(frame_set_type,
+                                  FrameSetList(),
+                                  menu_path="File Sequence")
+
+    # Register the FrameRanges type and casts to and from FrameSets.
+    plugin.RegisterPythonType(FrameRanges.type_id,
+                              FrameRanges(),
+                              FrameRanges.ToString,
+                              FrameRanges.FromString,
+                              FrameRanges.SerializeValue,
+                              FrameRanges.DeserializeValue,
+                              menu_path="File Sequence")
+    plugin.RegisterTypeCast(FrameSet.type_id,
+                            FrameRanges.type_id,
+                            _FrameRangesFromFrameSet)
+    plugin.RegisterTypeCast(FrameRanges.type_id,
+                            FrameSet.type_id,
+                            _FrameRangesToFrameSet)
+
     # Register the FileSequence type.
     sequence_type = plugin.RegisterPythonType(FileSequence.type_id,
                                               FileSequence(),
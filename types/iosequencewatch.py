@@ -0,0 +1,438 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Incremental tracking of the frames of sequences that are being written.
+
+A SequenceTracker remembers the frames of a sequence it has already seen
+and each call to Poll only processes the directory entries that were
+added or removed since the previous call, returning the newly arrived
+frames.
+
+Changes to the sequence's directory are read from inotify on Linux, so
+the cost of a poll only depends on the number of changes. Where inotify is
+not available the directory's modification time is checked instead and the
+directory is only listed again when it has changed.
+"""
+
+import collections
+import ctypes
+import ctypes.util
+import errno
+import os
+import stat
+import struct
+import sys
+import threading
+import weakref
+
+import iosequencedircache
+import iosequencedisk
+import iosequenceranges
+
+
+# Maximum number of trackers held by the shared registry.
+MAX_TRACKERS = 64
+
+# inotify constants from <sys/inotify.h>.
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+# Files are only added once they have been written (or renamed into
+# place). Entries reported by _IN_CREATE are only added straight away if
+# they will not be written (see _InotifyBackend._IsCreatedComplete).
+_IN_ADDED = _IN_CLOSE_WRITE | _IN_MOVED_TO
+_IN_REMOVED = _IN_DELETE | _IN_MOVED_FROM
+_IN_LOST = _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_IGNORED | _IN_Q_OVERFLOW
+_IN_WATCH_MASK = (_IN_ADDED | _IN_CREATE | _IN_REMOVED | _IN_DELETE_SELF |
+                  _IN_MOVE_SELF | _IN_ONLYDIR)
+
+# Header of each inotify event: wd, mask, cookie and the length of the name.
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _LoadInotify():
+    """
+    Return the C library if it provides inotify, otherwise None.
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6",
+                           use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p,
+                                       ctypes.c_uint32]
+    return libc
+
+
+_libc = _LoadInotify()
+
+
+def InotifyAvailable():
+    """
+    Return whether directories can be watched with inotify.
+    """
+    return _libc is not None
+
+
+class _PollingBackend(object):
+    """
+    Reports the changes to a directory by listing it whenever its
+    modification time changes. Polls that find the modification time
+    unchanged only stat the directory.
+    """
+    def __init__(self, dirpath):
+        self.dirpath = dirpath
+        self._mtime_ns = None
+        self._names = None
+        self._trusted = False
+
+    def Changes(self):
+        """
+        Return a tuple of (added, removed, complete). added and removed are
+        the names of the entries added to and removed from the directory
+        since the last call. If complete is True, added holds every entry
+        of the directory and removed is empty.
+        """
+        try:
+            mtime_ns = os.stat(self.dirpath).st_mtime_ns
+            racy = iosequencedircache.IsRacy(mtime_ns)
+            if self._names is not None and mtime_ns == self._mtime_ns:
+                # Entries added after a listing taken within the racy window
+                # may not have changed the modification time; the listing is
+                # repeated once, after the window has passed, rather than on
+                # every poll until then.
+                if self._trusted or racy:
+                    return (), (), False
+            names = set(os.listdir(self.dirpath))
+            trusted = not racy
+        except (FileNotFoundError, NotADirectoryError):
+            # The directory has not been created yet or has been removed.
+            names = set()
+            mtime_ns = None
+            trusted = False
+        self._mtime_ns = mtime_ns
+        self._trusted = trusted
+
+        if self._names is None:
+            self._names = names
+            return names, (), True
+        added = names - self._names
+        removed = self._names - names
+        self._names = names
+        return added, removed, False
+
+    def Close(self):
+        pass
+
+
+class _InotifyBackend(object):
+    """
+    Reports the changes to a directory from inotify events. The directory
+    is only listed when the watch is first established, or re-established
+    after the directory was replaced or events were lost.
+    """
+    def __init__(self, dirpath):
+        self.dirpath = dirpath
+        self._fd = None
+        self._close_fd = None
+
+    def Changes(self):
+        """
+        See _PollingBackend.Changes.
+        """
+        if self._fd is None:
+            return self._Watch()
+
+        added = set()
+        removed = set()
+        for mask, name in self._ReadEvents():
+            if mask & _IN_LOST:
+                # The directory is gone or events were dropped; start over.
+                self.Close()
+                return self._Watch()
+            if mask & _IN_ADDED or (mask & _IN_CREATE and
+                                    self._IsCreatedComplete(name)):
+                added.add(name)
+                removed.discard(name)
+            elif mask & _IN_REMOVED:
+                removed.add(name)
+                added.discard(name)
+        return added, removed, False
+
+    def Close(self):
+        if self._fd is not None:
+            self._close_fd()
+            self._fd = None
+
+    def _IsCreatedComplete(self, name):
+        """
+        Return whether an entry reported by _IN_CREATE can be added without
+        waiting for _IN_CLOSE_WRITE: anything but a regular file (such as a
+        symbolic link or a node created by mknod) or a hard link to an
+        existing file. New regular files are added once they are closed.
+        """
+        try:
+            status = os.lstat(os.path.join(self.dirpath, name))
+        except OSError:
+            # Already removed; the removal follows in the events.
+            return False
+        return not stat.S_ISREG(status.st_mode) or status.st_nlink > 1
+
+    def _Watch(self):
+        """
+        Watch the directory and list its current entries. The watch is added
+        before listing the directory so that no entries are missed.
+        """
+        fd = _libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        if _libc.inotify_add_watch(fd, os.fsencode(self.dirpath),
+                                   _IN_WATCH_MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(fd)
+            if error in (errno.ENOENT, errno.ENOTDIR):
+                # The directory has not been created yet.
+                return set(), (), True
+            raise OSError(error, os.strerror(error))
+        self._fd = fd
+        # Close the descriptor if the backend is discarded without being
+        # closed.
+        self._close_fd = weakref.finalize(self, os.close, fd)
+
+        try:
+            names = set(os.listdir(self.dirpath))
+        except (FileNotFoundError, NotADirectoryError):
+            names = set()
+        return names, (), True
+
+    def _ReadEvents(self):
+        """
+        Yield the (mask, name) of each pending event.
+        """
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                yield mask, os.fsdecode(name)
+
+
+class SequenceTracker(object):
+    """
+    Track the frames of a fileseq.FileSequence that exist on disk as they
+    are written.
+
+    If the sequence has a frame set only the frames in the frame set are
+    tracked, otherwise every frame matching the sequence's pattern is.
+    Sequences using subframes are not supported.
+    """
+    def __init__(self, sequence, use_inotify=True):
+        if sequence.decimalPlaces():
+            raise ValueError("Sequences with subframes cannot be tracked: "
+                             "{}".format(sequence))
+
+        self._sequence = sequence.copy()
+        self._match_frame = iosequencedisk.FrameMatcher(sequence)
+        self._contains = None
+        self._expected_count = None
+        frame_set = sequence.frameSet()
+        if frame_set is not None and not frame_set.is_null:
+            self._contains = iosequencedisk.FrameSetContains(frame_set)
+            self._expected_count = len(frame_set)
+
+        dirpath = sequence.dirname() or os.curdir
+        if use_inotify and InotifyAvailable():
+            self._backend = _InotifyBackend(dirpath)
+        else:
+            self._backend = _PollingBackend(dirpath)
+        self._closed = False
+        self._frames = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._frames)
+
+    def Poll(self):
+        """
+        Process the changes to the sequence's directory since the last poll
+        and return a fileseq.FrameSet of the frames that have arrived. The
+        first poll returns every frame that exists.
+
+        Raises ValueError if the tracker has been closed.
+        """
+        with self._lock:
+            if self._closed:
+                raise ValueError("Poll on a closed tracker: {}".format(
+                                                            self._sequence))
+            try:
+                added, removed, complete = self._backend.Changes()
+            except OSError:
+                if not isinstance(self._backend, _InotifyBackend):
+                    raise
+                # Out of inotify instances or watches; poll the directory
+                # instead.
+                self._backend.Close()
+                self._backend = _PollingBackend(self._backend.dirpath)
+                added, removed, complete = self._backend.Changes()
+
+            if complete:
+                frames = set(self._Frames(added))
+                new_frames = frames - self._frames
+                self._frames = frames
+            else:
+                self._frames.difference_update(self._Frames(removed))
+                new_frames = set(self._Frames(added)) - self._frames
+                self._frames.update(new_frames)
+        return _FrameSet(sorted(new_frames))
+
+    def Frames(self):
+        """
+        Return a fileseq.FrameSet of every frame seen on disk as of the last
+        poll.
+        """
+        with self._lock:
+            return _FrameSet(sorted(self._frames))
+
+    def IsComplete(self):
+        """
+        Return whether every frame of the sequence's frame set has been seen
+        on disk. Always False for sequences without a frame set.
+        """
+        return self._expected_count == len(self._frames)
+
+    def Sequence(self):
+        """
+        Return a copy of the tracked sequence.
+        """
+        return self._sequence.copy()
+
+    def Close(self):
+        """
+        Release the resources used to watch the sequence's directory. The
+        tracker cannot be polled afterwards. Trackers that are discarded
+        without being closed release their resources when they are garbage
+        collected.
+        """
+        with self._lock:
+            self._closed = True
+            self._backend.Close()
+
+    def _Frames(self, names):
+        """
+        Yield the tracked frames of the given directory entry names.
+        """
+        for name in names:
+            frame = self._match_frame(name)
+            if frame is None:
+                continue
+            if self._contains is None or self._contains(frame):
+                yield frame
+
+
+def _FrameSet(sorted_frames):
+    builder = iosequenceranges.FrameRangeBuilder()
+    for frame in sorted_frames:
+        builder.Add(frame)
+    return builder.FrameSet()
+
+
+class TrackerRegistry(object):
+    """
+    Thread-safe, least-recently-used collection of SequenceTrackers keyed
+    by sequence, so that repeated evaluations of a graph continue from the
+    frames seen by the previous evaluation.
+
+    Trackers evicted or removed from the registry are not closed, as
+    callers may still be polling them; they release their resources once
+    they are no longer referenced.
+    """
+    def __init__(self, max_trackers=MAX_TRACKERS):
+        self._max_trackers = max_trackers
+        self._trackers = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def Get(self, sequence):
+        """
+        Return the tracker for the given sequence, creating it if needed.
+        """
+        key = str(sequence)
+        with self._lock:
+            tracker = self._trackers.get(key)
+            if tracker is None:
+                tracker = self._trackers[key] = SequenceTracker(sequence)
+            self._trackers.move_to_end(key)
+            while len(self._trackers) > max(self._max_trackers, 1):
+                self._trackers.popitem(last=False)
+            return tracker
+
+    def Remove(self, sequence):
+        """
+        Remove the tracker for the given sequence, if any.
+        """
+        with self._lock:
+            self._trackers.pop(str(sequence), None)
+
+    def Clear(self):
+        """
+        Remove all trackers.
+        """
+        with self._lock:
+            self._trackers.clear()
+
+
+# The trackers shared by all nodes in the process.
+registry = TrackerRegistry()
+
+
+def GetTracker(sequence):
+    """
+    Return the shared tracker for the given sequence. See
+    TrackerRegistry.Get.
+    """
+    return registry.Get(sequence)
+
+
+def RemoveTracker(sequence):
+    """
+    Remove the shared tracker for the given sequence. See
+    TrackerRegistry.Remove.
+    """
+    registry.Remove(sequence)